@@ -0,0 +1,248 @@
+"""Local per-key AeroAPI cost ledger.
+
+Every successful AeroAPI page is billed locally at the configured price of its
+endpoint, so key selection reads a month-to-date estimate from SQLite instead
+of calling ``GET /account/usage``. The remote figure is only pulled by the
+periodic reconciliation in ``aeroapi_key_manager``; the estimate is then the
+last remote total plus whatever was billed locally since, and the difference
+between the estimate and the remote total at that point is recorded as drift.
+
+Keys are stored by fingerprint, never in clear; rows are per UTC month, the
+same window the usage endpoint is queried for.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import config.config as cfg
+
+
+_DEFAULT_PAGE_COST_USD = 0.005
+
+_DB_LOCK = threading.Lock()
+_CONNECTIONS: dict[Path, sqlite3.Connection] = {}
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_aeroapi_cost_config() -> dict[str, Any]:
+    raw = cfg.get_config("api.aeroapi.cost_ledger") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+    endpoint_costs = raw.get("endpoint_costs_usd")
+    if not isinstance(endpoint_costs, dict):
+        endpoint_costs = {}
+
+    return {
+        "enabled": bool(raw.get("enabled", True)),
+        "db_path": str(raw.get("db_path") or "database/aeroapi_cost_ledger.db"),
+        "default_page_cost_usd": max(0.0, _as_float(raw.get("default_page_cost_usd"), _DEFAULT_PAGE_COST_USD)),
+        "endpoint_costs_usd": {
+            str(endpoint): max(0.0, _as_float(cost, _DEFAULT_PAGE_COST_USD))
+            for endpoint, cost in endpoint_costs.items()
+        },
+        "reconcile_interval_minutes": max(1.0, _as_float(raw.get("reconcile_interval_minutes"), 60.0)),
+        "drift_warning_pct": max(0.0, _as_float(raw.get("drift_warning_pct"), 10.0)),
+    }
+
+
+def key_fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def page_cost_usd(endpoint: str, config: dict[str, Any] | None = None) -> float:
+    """Price of one result page of ``endpoint`` (``"GET /aeroapi/airports/{id}/flights/..."``)."""
+    config = config or load_aeroapi_cost_config()
+    return config["endpoint_costs_usd"].get(endpoint, config["default_page_cost_usd"])
+
+
+def _current_month() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def _resolve_db_path(raw_path: str) -> Path:
+    path = Path(raw_path)
+    if path.is_absolute():
+        return path
+    return Path(__file__).resolve().parent.parent / path
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS aeroapi_key_costs (
+            key_id TEXT NOT NULL,
+            month TEXT NOT NULL,
+            alias TEXT NOT NULL,
+            local_cost_usd REAL NOT NULL DEFAULT 0,
+            local_calls INTEGER NOT NULL DEFAULT 0,
+            remote_cost_usd REAL,
+            remote_calls INTEGER,
+            local_cost_at_reconcile_usd REAL NOT NULL DEFAULT 0,
+            drift_usd REAL,
+            reconciled_at TEXT,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (key_id, month)
+        )
+        """
+    )
+
+
+def _get_connection(db_path: Path) -> sqlite3.Connection:
+    conn = _CONNECTIONS.get(db_path)
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _ensure_schema(conn)
+        _CONNECTIONS[db_path] = conn
+    return conn
+
+
+def close_cost_ledger() -> None:
+    with _DB_LOCK:
+        for conn in _CONNECTIONS.values():
+            conn.close()
+        _CONNECTIONS.clear()
+
+
+def _connection(config: dict[str, Any] | None) -> sqlite3.Connection:
+    config = config or load_aeroapi_cost_config()
+    return _get_connection(_resolve_db_path(config["db_path"]))
+
+
+def _row_state(row: tuple | None) -> dict[str, Any]:
+    if row is None:
+        return {
+            "local_cost_usd": 0.0,
+            "local_calls": 0,
+            "remote_cost_usd": None,
+            "remote_calls": None,
+            "drift_usd": None,
+            "reconciled_at": None,
+            "estimated_cost_usd": 0.0,
+        }
+    local_cost, local_calls, remote_cost, remote_calls, local_at_reconcile, drift, reconciled_at = row
+    estimated = local_cost if remote_cost is None else remote_cost + (local_cost - local_at_reconcile)
+    return {
+        "local_cost_usd": round(local_cost, 6),
+        "local_calls": int(local_calls),
+        "remote_cost_usd": remote_cost,
+        "remote_calls": remote_calls,
+        "drift_usd": drift,
+        "reconciled_at": reconciled_at,
+        "estimated_cost_usd": round(estimated, 6),
+    }
+
+
+def _select_row(conn: sqlite3.Connection, key_id: str, month: str) -> tuple | None:
+    return conn.execute(
+        """
+        SELECT local_cost_usd, local_calls, remote_cost_usd, remote_calls,
+               local_cost_at_reconcile_usd, drift_usd, reconciled_at
+        FROM aeroapi_key_costs
+        WHERE key_id = ? AND month = ?
+        """,
+        (key_id, month),
+    ).fetchone()
+
+
+def record_billable_call(
+    api_key: str,
+    alias: str,
+    endpoint: str,
+    *,
+    pages: int = 1,
+    config: dict[str, Any] | None = None,
+) -> float:
+    """Bill ``pages`` result pages of ``endpoint`` to ``api_key``; returns the cost added."""
+    config = config or load_aeroapi_cost_config()
+    cost = page_cost_usd(endpoint, config) * max(0, int(pages))
+    now = datetime.now(timezone.utc).isoformat()
+    with _DB_LOCK:
+        conn = _connection(config)
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO aeroapi_key_costs (key_id, month, alias, local_cost_usd, local_calls, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key_id, month) DO UPDATE SET
+                    alias = excluded.alias,
+                    local_cost_usd = local_cost_usd + excluded.local_cost_usd,
+                    local_calls = local_calls + excluded.local_calls,
+                    updated_at = excluded.updated_at
+                """,
+                (key_fingerprint(api_key), _current_month(), alias, cost, int(pages), now),
+            )
+    return cost
+
+
+def key_cost_state(api_key: str, config: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Month-to-date local, remote and estimated cost of one key."""
+    with _DB_LOCK:
+        row = _select_row(_connection(config), key_fingerprint(api_key), _current_month())
+    return _row_state(row)
+
+
+def needs_reconciliation(api_key: str, config: dict[str, Any] | None = None) -> bool:
+    config = config or load_aeroapi_cost_config()
+    reconciled_at = key_cost_state(api_key, config)["reconciled_at"]
+    if not reconciled_at:
+        return True
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(reconciled_at)
+    return age >= timedelta(minutes=config["reconcile_interval_minutes"])
+
+
+def apply_reconciliation(
+    api_key: str,
+    alias: str,
+    *,
+    remote_cost_usd: float,
+    remote_calls: int,
+    config: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Adopt the remote month-to-date total and record how far the local estimate had drifted from it."""
+    key_id = key_fingerprint(api_key)
+    month = _current_month()
+    now = datetime.now(timezone.utc).isoformat()
+    with _DB_LOCK:
+        conn = _connection(config)
+        before = _row_state(_select_row(conn, key_id, month))
+        drift = remote_cost_usd - before["estimated_cost_usd"]
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO aeroapi_key_costs (
+                    key_id, month, alias, remote_cost_usd, remote_calls,
+                    local_cost_at_reconcile_usd, drift_usd, reconciled_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+                ON CONFLICT(key_id, month) DO UPDATE SET
+                    alias = excluded.alias,
+                    remote_cost_usd = excluded.remote_cost_usd,
+                    remote_calls = excluded.remote_calls,
+                    local_cost_at_reconcile_usd = local_cost_usd,
+                    drift_usd = excluded.drift_usd,
+                    reconciled_at = excluded.reconciled_at,
+                    updated_at = excluded.updated_at
+                """,
+                (key_id, month, alias, remote_cost_usd, int(remote_calls), drift, now, now),
+            )
+    return {
+        "estimated_cost_usd": before["estimated_cost_usd"],
+        "remote_cost_usd": remote_cost_usd,
+        "drift_usd": round(drift, 6),
+        "drift_pct": round(drift / remote_cost_usd * 100.0, 2) if remote_cost_usd else None,
+    }
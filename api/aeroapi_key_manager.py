@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import os
 import re
+import threading
 import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
@@ -12,7 +13,11 @@ import aiohttp
 from loguru import logger
 
 import config.config as cfg
+from api import aeroapi_cost_ledger
+from api.aeroapi_key_scheduler import KeyScheduler
 from monitoring.api_usage import record_api_event
+from monitoring.metrics import METRICS
+from utils.http_client import http_session
 
 
 USAGE_ENDPOINT_URL = "https://aeroapi.flightaware.com/aeroapi/account/usage"
@@ -28,8 +33,9 @@ class AeroApiCredential:
 
 
 _USAGE_CACHE: dict[str, tuple[float, dict[str, Any]]] = {}
-_ROUND_ROBIN_INDEX = 0
-_STATE_LOCK = asyncio.Lock()
+_CREDENTIALS_CACHE: dict[tuple[str, str], list[AeroApiCredential]] = {}
+_SCHEDULER_LOCK = threading.Lock()
+_SCHEDULER: tuple[tuple[Any, ...], KeyScheduler] | None = None
 
 
 def mask_key(api_key: str) -> str:
@@ -55,16 +61,15 @@ def _parse_key_token(token: str, default_alias: str) -> AeroApiCredential:
     return AeroApiCredential(alias=default_alias, key=token.strip())
 
 
-def _load_credentials() -> list[AeroApiCredential]:
+def _parse_credentials(raw_multiple: str, raw_single: str) -> list[AeroApiCredential]:
     credentials: list[AeroApiCredential] = []
 
-    raw_multiple = os.getenv("AEROAPI_KEYS", "")
     if raw_multiple.strip():
         tokens = _split_tokens(raw_multiple)
         for index, token in enumerate(tokens, start=1):
             credentials.append(_parse_key_token(token, default_alias=f"key{index}"))
 
-    raw_single = os.getenv("AEROAPI_KEY", "").strip()
+    raw_single = raw_single.strip()
     if raw_single:
         credentials.append(AeroApiCredential(alias=f"key{len(credentials) + 1}", key=raw_single))
 
@@ -76,11 +81,20 @@ def _load_credentials() -> list[AeroApiCredential]:
             continue
         seen.add(normalized_key)
         deduped.append(AeroApiCredential(alias=credential.alias, key=normalized_key))
+    return deduped
 
-    if not deduped and os.getenv("PYTEST_CURRENT_TEST"):
+
+def _load_credentials() -> list[AeroApiCredential]:
+    """Configured keys; parsed once per distinct ``AEROAPI_KEYS``/``AEROAPI_KEY`` value."""
+    env_values = (os.getenv("AEROAPI_KEYS", ""), os.getenv("AEROAPI_KEY", ""))
+    credentials = _CREDENTIALS_CACHE.get(env_values)
+    if credentials is None:
+        credentials = _CREDENTIALS_CACHE[env_values] = _parse_credentials(*env_values)
+
+    if not credentials and os.getenv("PYTEST_CURRENT_TEST"):
         return [AeroApiCredential(alias="test-key", key="test-key")]
 
-    return deduped
+    return credentials
 
 
 def _as_float(value: Any, default: float) -> float:
@@ -143,8 +157,8 @@ async def _fetch_usage_for_key(
 
     try:
         timeout = aiohttp.ClientTimeout(total=30)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(USAGE_ENDPOINT_URL, headers=headers, params=params) as response:
+        async with http_session("aeroapi") as session:
+            async with session.get(USAGE_ENDPOINT_URL, headers=headers, params=params, timeout=timeout) as response:
                 status_code = response.status
                 duration_ms = (time.perf_counter() - started) * 1000.0
 
@@ -185,6 +199,7 @@ async def _fetch_usage_for_key(
                     "fetched_at": datetime.now(timezone.utc).isoformat(),
                 }
                 _USAGE_CACHE[credential.key] = (now_ts, usage)
+                METRICS.set("plane_spotter_aeroapi_key_cost_usd", total_cost, key=credential.alias)
                 return usage
     except Exception as exc:
         duration_ms = (time.perf_counter() - started) * 1000.0
@@ -210,75 +225,194 @@ async def _fetch_usage_for_key(
         return None
 
 
-async def select_aeroapi_credential(
-    *,
-    excluded_keys: set[str] | None = None,
-    force_usage_refresh: bool = False,
-) -> AeroApiCredential:
-    global _ROUND_ROBIN_INDEX
+def _get_scheduler(credentials: list[AeroApiCredential]) -> KeyScheduler:
+    """Scheduler for the current keys, budget and ledger; rebuilt (and re-seeded from the ledger) when any changes."""
+    global _SCHEDULER
 
+    keys = tuple((credential.alias, credential.key) for credential in credentials)
+    budget_usd = _monthly_budget_usd()
+    ledger_config = aeroapi_cost_ledger.load_aeroapi_cost_config()
+    cache_key = (keys, budget_usd, ledger_config["db_path"] if ledger_config["enabled"] else None)
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is not None and _SCHEDULER[0] == cache_key:
+            return _SCHEDULER[1]
+        scheduler = KeyScheduler(keys, budget_usd=budget_usd)
+        if ledger_config["enabled"]:
+            for _alias, key in keys:
+                scheduler.set_cost(key, aeroapi_cost_ledger.key_cost_state(key, ledger_config)["estimated_cost_usd"])
+        _SCHEDULER = (cache_key, scheduler)
+        return scheduler
+
+
+async def _refresh_remote_costs(scheduler: KeyScheduler, credentials: list[AeroApiCredential]) -> None:
+    """Ledger disabled: feed the scheduler from the (cached) usage endpoint, all keys at once."""
+    usages = await asyncio.gather(*(_fetch_usage_for_key(credential) for credential in credentials))
+    for credential, usage in zip(credentials, usages):
+        if usage is not None:
+            scheduler.set_cost(credential.key, _as_float(usage.get("total_cost_usd"), 0.0))
+
+
+async def select_aeroapi_credential(*, excluded_keys: set[str] | None = None) -> AeroApiCredential:
+    """Best-scored key under budget (see ``aeroapi_key_scheduler``); no network I/O with the ledger on."""
     credentials = _load_credentials()
     if not credentials:
         raise RuntimeError("Missing AeroAPI credentials. Set AEROAPI_KEY or AEROAPI_KEYS in .env")
 
-    excluded = excluded_keys or set()
-    budget_usd = _monthly_budget_usd()
-
-    async with _STATE_LOCK:
-        start_index = _ROUND_ROBIN_INDEX % len(credentials)
-        exhausted: list[str] = []
-
-        for offset in range(len(credentials)):
-            idx = (start_index + offset) % len(credentials)
-            credential = credentials[idx]
-            if credential.key in excluded:
-                continue
-
-            usage = await _fetch_usage_for_key(credential, force_refresh=force_usage_refresh)
-            if usage is None:
-                _ROUND_ROBIN_INDEX = (idx + 1) % len(credentials)
-                logger.info(
-                    f"Selected AeroAPI key {credential.alias} ({mask_key(credential.key)}) without fresh usage data"
-                )
-                return AeroApiCredential(
-                    alias=credential.alias,
-                    key=credential.key,
-                    total_cost_usd=None,
-                )
+    scheduler = _get_scheduler(credentials)
+    ledger_config = aeroapi_cost_ledger.load_aeroapi_cost_config()
+    if not ledger_config["enabled"]:
+        excluded = excluded_keys or set()
+        await _refresh_remote_costs(scheduler, [item for item in credentials if item.key not in excluded])
+
+    # The fetch bills at least one page; charge it now so concurrent fetches see the reduced headroom.
+    selected, exhausted = scheduler.select(excluded_keys, reserve_usd=ledger_config["default_page_cost_usd"])
+    if selected is None:
+        exhausted_text = ", ".join(f"{state.alias}:{state.cost_usd:.2f}" for state in exhausted) or "no eligible key"
+        raise RuntimeError(
+            f"No AeroAPI keys available under monthly budget ${scheduler.budget_usd:.2f}. Details: {exhausted_text}"
+        )
 
-            total_cost = _as_float(usage.get("total_cost_usd"), 0.0)
-            if total_cost >= budget_usd:
-                exhausted.append(f"{credential.alias}:{total_cost:.2f}")
-                continue
-
-            _ROUND_ROBIN_INDEX = (idx + 1) % len(credentials)
-            logger.info(
-                f"Selected AeroAPI key {credential.alias} ({mask_key(credential.key)}), monthly cost ${total_cost:.2f}/${budget_usd:.2f}"
-            )
-            return AeroApiCredential(
-                alias=credential.alias,
-                key=credential.key,
-                total_cost_usd=total_cost,
-            )
-
-    exhausted_text = ", ".join(exhausted) if exhausted else "no eligible key"
-    raise RuntimeError(
-        f"No AeroAPI keys available under monthly budget ${budget_usd:.2f}. Details: {exhausted_text}"
+    logger.info(
+        f"Selected AeroAPI key {selected.alias} ({mask_key(selected.key)}), "
+        f"monthly cost ${selected.cost_usd:.2f}/${scheduler.budget_usd:.2f}"
+    )
+    return AeroApiCredential(alias=selected.alias, key=selected.key, total_cost_usd=selected.cost_usd)
+
+
+def note_aeroapi_rate_limited(credential: AeroApiCredential) -> None:
+    """Count a 429 against ``credential`` so the scheduler prefers other keys for a while."""
+    _get_scheduler(_load_credentials()).note_rate_limited(credential.key)
+
+
+def record_aeroapi_page(credential: AeroApiCredential, endpoint: str) -> float:
+    """Bill one successful result page to ``credential`` in the local ledger; returns its cost."""
+    ledger_config = aeroapi_cost_ledger.load_aeroapi_cost_config()
+    if not ledger_config["enabled"]:
+        return 0.0
+    cost = aeroapi_cost_ledger.record_billable_call(credential.key, credential.alias, endpoint, config=ledger_config)
+    state = aeroapi_cost_ledger.key_cost_state(credential.key, ledger_config)
+    _get_scheduler(_load_credentials()).set_cost(credential.key, state["estimated_cost_usd"])
+    METRICS.set("plane_spotter_aeroapi_key_cost_usd", state["estimated_cost_usd"], key=credential.alias)
+    return cost
+
+
+async def _reconcile_key(credential: AeroApiCredential, ledger_config: dict[str, Any]) -> dict[str, Any]:
+    report: dict[str, Any] = {"alias": credential.alias, "key_mask": mask_key(credential.key)}
+    usage = await _fetch_usage_for_key(credential, force_refresh=True)
+    if usage is None:
+        report["ok"] = False
+        return report
+
+    drift = await asyncio.to_thread(
+        aeroapi_cost_ledger.apply_reconciliation,
+        credential.key,
+        credential.alias,
+        remote_cost_usd=_as_float(usage.get("total_cost_usd"), 0.0),
+        remote_calls=int(usage.get("total_calls") or 0),
+        config=ledger_config,
     )
+    report.update(drift, ok=True)
+    _get_scheduler(_load_credentials()).set_cost(credential.key, drift["remote_cost_usd"])
+    METRICS.set("plane_spotter_aeroapi_cost_drift_usd", drift["drift_usd"], key=credential.alias)
+    if drift["drift_pct"] is not None and abs(drift["drift_pct"]) >= ledger_config["drift_warning_pct"]:
+        logger.warning(
+            f"AeroAPI cost drift for {credential.alias}: local estimate ${drift['estimated_cost_usd']:.4f}, "
+            f"remote ${drift['remote_cost_usd']:.4f} ({drift['drift_pct']:+.1f}%)"
+        )
+    return report
+
+
+async def reconcile_aeroapi_usage(*, force: bool = False) -> list[dict[str, Any]]:
+    """Pull ``/account/usage`` for every key whose ledger is due (all keys when ``force``), concurrently."""
+    ledger_config = aeroapi_cost_ledger.load_aeroapi_cost_config()
+    if not ledger_config["enabled"]:
+        return []
+    due = [
+        credential
+        for credential in _load_credentials()
+        if force or aeroapi_cost_ledger.needs_reconciliation(credential.key, ledger_config)
+    ]
+    if not due:
+        return []
+    return list(await asyncio.gather(*(_reconcile_key(credential, ledger_config) for credential in due)))
+
+
+async def run_usage_reconciler() -> None:
+    """Reconcile due keys in the background; the check runs every reconcile interval."""
+    while True:
+        try:
+            reports = await reconcile_aeroapi_usage()
+            if reports:
+                logger.info(f"AeroAPI usage reconciled: {reports}")
+            credentials = _load_credentials()
+            exhausts_at = _get_scheduler(credentials).pool_exhausts_at() if credentials else None
+            if exhausts_at:
+                logger.warning(f"AeroAPI keys projected to exhaust the pooled monthly budget at {exhausts_at}")
+        except Exception as exc:
+            logger.warning(f"AeroAPI usage reconciliation failed: {exc}")
+        interval = aeroapi_cost_ledger.load_aeroapi_cost_config()["reconcile_interval_minutes"]
+        await asyncio.sleep(interval * 60)
+
+
+def start_usage_reconciler() -> asyncio.Task | None:
+    if not aeroapi_cost_ledger.load_aeroapi_cost_config()["enabled"] or not _load_credentials():
+        return None
+    return asyncio.create_task(run_usage_reconciler(), name="aeroapi-usage-reconciler")
 
 
-async def get_aeroapi_usage_snapshot(force_refresh: bool = True) -> list[dict[str, Any]]:
-    snapshots: list[dict[str, Any]] = []
+async def stop_usage_reconciler(task: asyncio.Task | None) -> None:
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def get_aeroapi_usage_snapshot(force_refresh: bool = False) -> list[dict[str, Any]]:
+    """Per-key month-to-date cost from the local ledger; ``force_refresh`` reconciles every key first."""
+    ledger_config = aeroapi_cost_ledger.load_aeroapi_cost_config()
+    if not ledger_config["enabled"]:
+        return await _remote_usage_snapshot(force_refresh=force_refresh)
+    if force_refresh:
+        await reconcile_aeroapi_usage(force=True)
+
     credentials = _load_credentials()
+    forecast = {item["alias"]: item for item in _get_scheduler(credentials).forecast()} if credentials else {}
+    snapshots: list[dict[str, Any]] = []
     for credential in credentials:
-        usage = await _fetch_usage_for_key(credential, force_refresh=force_refresh)
+        state = aeroapi_cost_ledger.key_cost_state(credential.key, ledger_config)
+        projection = forecast.get(credential.alias, {})
         snapshots.append(
             {
                 "alias": credential.alias,
                 "key_mask": mask_key(credential.key),
-                "total_cost_usd": None if usage is None else usage.get("total_cost_usd"),
-                "total_calls": None if usage is None else usage.get("total_calls"),
-                "fetched_at": None if usage is None else usage.get("fetched_at"),
+                "total_cost_usd": state["estimated_cost_usd"],
+                "local_calls": state["local_calls"],
+                "remote_cost_usd": state["remote_cost_usd"],
+                "drift_usd": state["drift_usd"],
+                "reconciled_at": state["reconciled_at"],
+                "projected_month_end_usd": projection.get("projected_month_end_usd"),
+                "exhausts_at": projection.get("exhausts_at"),
+                "recent_rate_limits": projection.get("recent_rate_limits"),
             }
         )
     return snapshots
+
+
+async def _remote_usage_snapshot(force_refresh: bool) -> list[dict[str, Any]]:
+    credentials = _load_credentials()
+    usages = await asyncio.gather(
+        *(_fetch_usage_for_key(credential, force_refresh=force_refresh) for credential in credentials)
+    )
+    return [
+        {
+            "alias": credential.alias,
+            "key_mask": mask_key(credential.key),
+            "total_cost_usd": None if usage is None else usage.get("total_cost_usd"),
+            "total_calls": None if usage is None else usage.get("total_calls"),
+            "fetched_at": None if usage is None else usage.get("fetched_at"),
+        }
+        for credential, usage in zip(credentials, usages)
+    ]
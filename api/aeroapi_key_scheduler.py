@@ -0,0 +1,232 @@
+"""Headroom-aware ordering of AeroAPI keys.
+
+Each key is scored by the share of its monthly budget projected to be left
+at month end (current cost plus its burn rate so far, carried to the end of
+the month), minus a penalty for every 429 it received recently. Sending the
+next fetch to the best-scored key drains the keys evenly: a key that burns
+faster than the others, or keeps getting rate limited, drops in the ranking
+until the rest catch up.
+
+Keys sit in a heap ordered by score. A change to one key (a billed page,
+a 429, a pick) re-scores only that key; its old heap entry is skipped when
+it surfaces. A pick reserves the expected cost of a page against the key
+until the page is billed, so concurrent fetches see its reduced headroom.
+Everything is re-scored when a 429 ages out of the window and at least
+hourly, as projections drift with time. Nothing here does I/O.
+"""
+
+from __future__ import annotations
+
+import calendar
+import heapq
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable
+
+import config.config as cfg
+
+
+_DAY_SECONDS = 86400.0
+_RERANK_SECONDS = 3600.0
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_key_scheduler_config() -> dict[str, float]:
+    raw = cfg.get_config("api.aeroapi.scheduler") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    return {
+        "rate_limit_window_minutes": max(1.0, _as_float(raw.get("rate_limit_window_minutes"), 15.0)),
+        "rate_limit_penalty": max(0.0, _as_float(raw.get("rate_limit_penalty"), 0.25)),
+        "min_burn_days": max(0.1, _as_float(raw.get("min_burn_days"), 1.0)),
+    }
+
+
+def _month_bounds(now: float) -> tuple[float, float]:
+    current = datetime.fromtimestamp(now, timezone.utc)
+    start = current.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    days = calendar.monthrange(current.year, current.month)[1]
+    return start.timestamp(), start.timestamp() + days * _DAY_SECONDS
+
+
+@dataclass
+class KeyState:
+    alias: str
+    key: str
+    cost_usd: float = 0.0
+    reserved_usd: float = 0.0
+    rate_limited_at: deque[float] = field(default_factory=deque)
+    last_selected: float = 0.0
+    version: int = 0
+
+
+class KeyScheduler:
+    """Ranks a fixed set of keys against one monthly budget."""
+
+    def __init__(
+        self,
+        keys: Iterable[tuple[str, str]],
+        *,
+        budget_usd: float,
+        config: dict[str, float] | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.budget_usd = budget_usd
+        self.config = config or load_key_scheduler_config()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._states = {key: KeyState(alias=alias, key=key) for alias, key in keys}
+        self._heap: list[tuple[float, float, int, str, int]] = []
+        self._pushes = 0
+        self._ranking_expires = 0.0
+        self._reservations_expire = 0.0
+
+    def set_cost(self, key: str, cost_usd: float) -> None:
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None and state.cost_usd != cost_usd:
+                # Billed pages settle the reservations made for them.
+                state.reserved_usd = max(0.0, state.reserved_usd - max(0.0, cost_usd - state.cost_usd))
+                state.cost_usd = cost_usd
+                self._push(state, self._clock())
+
+    def note_rate_limited(self, key: str) -> None:
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                now = self._clock()
+                state.rate_limited_at.append(now)
+                self._ranking_expires = min(
+                    self._ranking_expires, now + self.config["rate_limit_window_minutes"] * 60.0
+                )
+                self._push(state, now)
+
+    def _projected_month_end_cost(self, state: KeyState, now: float) -> float:
+        month_start, month_end = _month_bounds(now)
+        elapsed = max(now - month_start, self.config["min_burn_days"] * _DAY_SECONDS)
+        spent = state.cost_usd + state.reserved_usd
+        return spent + state.cost_usd / elapsed * max(0.0, month_end - now)
+
+    def _score(self, state: KeyState, now: float) -> float:
+        if self.budget_usd <= 0:
+            return 0.0
+        horizon = now - self.config["rate_limit_window_minutes"] * 60.0
+        while state.rate_limited_at and state.rate_limited_at[0] < horizon:
+            state.rate_limited_at.popleft()
+        headroom_share = 1.0 - self._projected_month_end_cost(state, now) / self.budget_usd
+        return headroom_share - self.config["rate_limit_penalty"] * len(state.rate_limited_at)
+
+    def _push(self, state: KeyState, now: float) -> None:
+        state.version += 1
+        self._pushes += 1
+        entry = (-self._score(state, now), state.last_selected, self._pushes, state.key, state.version)
+        heapq.heappush(self._heap, entry)
+
+    def _rank(self, now: float) -> None:
+        if now >= self._reservations_expire:
+            # Reservations still open an hour on belong to fetches that never billed a page.
+            for state in self._states.values():
+                state.reserved_usd = 0.0
+            self._reservations_expire = now + _RERANK_SECONDS
+        self._heap = []
+        for state in self._states.values():
+            self._push(state, now)
+        window = self.config["rate_limit_window_minutes"] * 60.0
+        expiries = [state.rate_limited_at[0] + window for state in self._states.values() if state.rate_limited_at]
+        self._ranking_expires = min(expiries, default=self._reservations_expire)
+
+    def select(
+        self,
+        excluded: set[str] | None = None,
+        *,
+        reserve_usd: float = 0.0,
+    ) -> tuple[KeyState | None, list[KeyState]]:
+        """Best key under budget not in ``excluded``, plus the keys skipped for being over budget.
+
+        ``reserve_usd`` is charged against the selected key's headroom until
+        :meth:`set_cost` reports the page billed.
+        """
+        excluded = excluded or set()
+        now = self._clock()
+        with self._lock:
+            if now >= self._ranking_expires:
+                self._rank(now)
+            exhausted: list[KeyState] = []
+            skipped: list[tuple[float, float, int, str, int]] = []
+            selected = None
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                state = self._states[entry[3]]
+                if entry[4] != state.version:
+                    continue
+                if state.key in excluded:
+                    skipped.append(entry)
+                    continue
+                if state.cost_usd >= self.budget_usd:
+                    skipped.append(entry)
+                    exhausted.append(state)
+                    continue
+                selected = state
+                break
+            for entry in skipped:
+                heapq.heappush(self._heap, entry)
+            if selected is not None:
+                selected.last_selected = now
+                selected.reserved_usd += reserve_usd
+                self._push(selected, now)
+            return selected, exhausted
+
+    def forecast(self) -> list[dict[str, Any]]:
+        """Per-key projected month-end cost and, if the budget runs out first, when."""
+        now = self._clock()
+        month_start, month_end = _month_bounds(now)
+        elapsed = max(now - month_start, self.config["min_burn_days"] * _DAY_SECONDS)
+        with self._lock:
+            states = list(self._states.values())
+            report = []
+            for state in states:
+                burn_per_second = state.cost_usd / elapsed
+                headroom = self.budget_usd - state.cost_usd
+                exhausts_at = None
+                if headroom <= 0:
+                    exhausts_at = now
+                elif burn_per_second > 0 and now + headroom / burn_per_second < month_end:
+                    exhausts_at = now + headroom / burn_per_second
+                report.append(
+                    {
+                        "alias": state.alias,
+                        "cost_usd": round(state.cost_usd, 6),
+                        "projected_month_end_usd": round(self._projected_month_end_cost(state, now), 6),
+                        "recent_rate_limits": len(state.rate_limited_at),
+                        "score": round(self._score(state, now), 4),
+                        "exhausts_at": (
+                            None
+                            if exhausts_at is None
+                            else datetime.fromtimestamp(exhausts_at, timezone.utc).isoformat()
+                        ),
+                    }
+                )
+        return report
+
+    def pool_exhausts_at(self, forecast: list[dict[str, Any]] | None = None) -> str | None:
+        """When the pooled budget of all keys runs out before month end at the combined burn, if it does."""
+        forecast = forecast if forecast is not None else self.forecast()
+        now = self._clock()
+        _month_start, month_end = _month_bounds(now)
+        spent = sum(item["cost_usd"] for item in forecast)
+        projected = sum(item["projected_month_end_usd"] for item in forecast)
+        if projected <= self.budget_usd * len(forecast) or month_end <= now:
+            return None
+        burn_per_second = (projected - spent) / (month_end - now)
+        exhausts_at = now + max(0.0, self.budget_usd * len(forecast) - spent) / burn_per_second
+        return datetime.fromtimestamp(exhausts_at, timezone.utc).isoformat()
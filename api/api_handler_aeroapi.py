@@ -1,49 +1,108 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import time
 
 import aiohttp
 from loguru import logger
 
-from api.aeroapi_key_manager import AeroApiCredential, mask_key, select_aeroapi_credential
-from monitoring.api_usage import record_api_event
+from api.aeroapi_key_manager import (
+    AeroApiCredential,
+    mask_key,
+    note_aeroapi_rate_limited,
+    record_aeroapi_page,
+    select_aeroapi_credential,
+)
+from api.rate_limiter import get_credential_bucket, load_aeroapi_rate_limit_config, parse_retry_after
+from api.raw_sink import open_raw_sink
+from api.window_sharding import (
+    dedupe_batch,
+    iter_shard_batches,
+    load_sharding_config,
+    merge_shard_flights,
+    split_window,
+)
+from monitoring.api_usage import enforce_circuit_or_raise, record_api_event
+from monitoring.circuit_breaker import get_breaker
+from monitoring.cycle_ledger import note_retry
+from utils.http_client import http_session
+
+
+AEROAPI_BASE_URL = "https://aeroapi.flightaware.com/aeroapi"
+
+
+class AeroApiWindowError(RuntimeError):
+    """A page could not be fetched, so the window cannot be reported as complete."""
 
 
 async def fetch_aeroapi_scheduled(move, start_time, end_time, airport_icao="LEMD"):
+    """Collect the whole window: deduplicated and sorted by scheduled time, or None if any page failed."""
+    try:
+        batches = [batch async for batch in iter_aeroapi_pages(move, start_time, end_time, airport_icao=airport_icao)]
+    except AeroApiWindowError as exc:
+        logger.error(str(exc))
+        return None
+    all_data = {f"scheduled_{move}": merge_shard_flights("aeroapi", move, batches, airport_icao)}
+    logger.success(f"Total AeroAPI flights collected: {len(all_data[f'scheduled_{move}'])}")
+    return all_data
+
+
+async def iter_aeroapi_pages(move, start_time, end_time, airport_icao="LEMD", on_complete=None):
+    """Yield each page of flights as soon as it arrives.
+
+    Shards are paginated concurrently, so pages come in completion order;
+    flights already yielded by an overlapping shard are dropped. Raw pages go
+    to a background sink instead of being accumulated here. A page that cannot
+    be fetched raises ``AeroApiWindowError``; ``on_complete()`` is called once
+    every shard was paginated to its end.
+    """
     airport_icao = (airport_icao or "LEMD").upper()
+    movement = move
     move = "scheduled_" + move
     endpoint = f"GET /aeroapi/airports/{airport_icao.lower()}/flights/{move}"
+    # Price lookups use the airport-independent form of the endpoint.
+    billing_endpoint = f"GET /aeroapi/airports/{{id}}/flights/{move}"
 
-    base_url = f"https://aeroapi.flightaware.com/aeroapi/airports/{airport_icao.lower()}/flights/{move}"
-    params = {
-        "start": start_time,
-        "end": end_time,
-        "max_pages": 10,
-    }
+    base_url = f"{AEROAPI_BASE_URL}/airports/{airport_icao.lower()}/flights/{move}"
+    sharding = load_sharding_config("aeroapi")
+    shards = split_window(start_time, end_time, sharding["shard_minutes"])
 
-    active_credential = await select_aeroapi_credential(force_usage_refresh=False)
+    active_credential = await select_aeroapi_credential()
     logger.info(
         f"Using AeroAPI key {active_credential.alias} ({mask_key(active_credential.key)}) for airport {airport_icao}"
     )
 
-    async def fetch_page(session, url, credential: AeroApiCredential):
+    async def fetch_page(session, url, params, credential: AeroApiCredential):
         retry_count = 0
         max_retries = 5
         base_delay = 20
         excluded_keys: set[str] = set()
+        breaker = get_breaker("aeroapi")
 
         while retry_count < max_retries:
+            # Raises CircuitOpenError, failing this source at once instead of walking the retry ladder.
+            enforce_circuit_or_raise("aeroapi", endpoint)
             headers = {
                 "Accept": "application/json; charset=UTF-8",
                 "x-apikey": credential.key,
             }
 
+            bucket = get_credential_bucket(credential.key)
+            waited = await bucket.acquire()
+            if waited > 0:
+                logger.debug(f"AeroAPI key {credential.alias} throttled for {waited:.1f}s")
+
             started = time.perf_counter()
+            # Set once the response is in; a body that then fails to decode is not a second breaker outcome.
+            status_code: int | None = None
             try:
                 async with session.get(url, headers=headers, params=params) as response:
+                    status_code = response.status
                     duration_ms = (time.perf_counter() - started) * 1000.0
+                    if response.status >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
 
                     if response.status in (401, 403):
                         body = await response.text()
@@ -64,14 +123,12 @@ async def fetch_aeroapi_scheduled(move, start_time, end_time, airport_icao="LEMD
 
                         excluded_keys.add(credential.key)
                         try:
-                            rotated = await select_aeroapi_credential(
-                                excluded_keys=excluded_keys,
-                                force_usage_refresh=True,
-                            )
+                            rotated = await select_aeroapi_credential(excluded_keys=excluded_keys)
                             logger.warning(
                                 f"AeroAPI auth error with {credential.alias}. Switching to {rotated.alias} ({mask_key(rotated.key)})"
                             )
                             credential = rotated
+                            note_retry("aeroapi")
                             continue
                         except Exception as exc:
                             logger.error(f"No replacement AeroAPI key available after auth error: {exc}")
@@ -93,33 +150,40 @@ async def fetch_aeroapi_scheduled(move, start_time, end_time, airport_icao="LEMD
                             error="rate_limited",
                         )
 
+                        retry_after = parse_retry_after(
+                            response.headers.get("Retry-After"),
+                            load_aeroapi_rate_limit_config()["default_retry_after_seconds"],
+                        )
+                        bucket.record_rate_limited(retry_after)
+                        note_aeroapi_rate_limited(credential)
+
                         excluded_keys.add(credential.key)
                         try:
-                            rotated = await select_aeroapi_credential(
-                                excluded_keys=excluded_keys,
-                                force_usage_refresh=False,
-                            )
+                            rotated = await select_aeroapi_credential(excluded_keys=excluded_keys)
                             if rotated.key != credential.key:
                                 logger.warning(
                                     f"AeroAPI key {credential.alias} hit rate limit. Rotating to {rotated.alias} ({mask_key(rotated.key)})"
                                 )
                                 credential = rotated
+                                note_retry("aeroapi")
                                 continue
                         except Exception:
                             pass
 
-                        retry_after = int(response.headers.get("Retry-After", base_delay))
-                        wait_time = min(retry_after * (2**retry_count), 60)
+                        # The bucket is blocked for Retry-After; the next acquire() waits it out.
                         logger.warning(
-                            f"AeroAPI rate limited for {credential.alias}. Retrying in {wait_time}s "
+                            f"AeroAPI rate limited for {credential.alias}. Retrying in {retry_after:.0f}s "
                             f"(attempt {retry_count + 1}/{max_retries})"
                         )
-                        await asyncio.sleep(wait_time)
                         retry_count += 1
+                        note_retry("aeroapi")
                         continue
 
                     data = await response.json()
                     success = 200 <= response.status < 300
+                    cost_usd = 0.0
+                    if success:
+                        cost_usd = await asyncio.to_thread(record_aeroapi_page, credential, billing_endpoint)
                     record_api_event(
                         provider="aeroapi",
                         endpoint=endpoint,
@@ -127,7 +191,7 @@ async def fetch_aeroapi_scheduled(move, start_time, end_time, airport_icao="LEMD
                         status_code=response.status,
                         success=success,
                         duration_ms=duration_ms,
-                        estimated_cost_usd=0.0,
+                        estimated_cost_usd=cost_usd,
                         metadata={
                             "key_alias": credential.alias,
                             "key_mask": mask_key(credential.key),
@@ -143,12 +207,15 @@ async def fetch_aeroapi_scheduled(move, start_time, end_time, airport_icao="LEMD
                             f"(attempt {retry_count}/{max_retries})"
                         )
                         await asyncio.sleep(wait_time)
+                        note_retry("aeroapi")
                         continue
 
-                    await asyncio.sleep(base_delay)
+                    bucket.record_success()
                     return data, credential
 
             except aiohttp.ClientError as exc:
+                if status_code is None:
+                    breaker.record_failure()
                 duration_ms = (time.perf_counter() - started) * 1000.0
                 record_api_event(
                     provider="aeroapi",
@@ -171,7 +238,10 @@ async def fetch_aeroapi_scheduled(move, start_time, end_time, airport_icao="LEMD
                     f"(attempt {retry_count}/{max_retries})"
                 )
                 await asyncio.sleep(wait_time)
+                note_retry("aeroapi")
             except Exception as exc:
+                if status_code is None:
+                    breaker.record_failure()
                 duration_ms = (time.perf_counter() - started) * 1000.0
                 record_api_event(
                     provider="aeroapi",
@@ -193,27 +263,32 @@ async def fetch_aeroapi_scheduled(move, start_time, end_time, airport_icao="LEMD
         logger.error(f"Max retries ({max_retries}) reached for URL: {url}")
         return None, credential
 
-    async with aiohttp.ClientSession() as session:
-        all_data = {move: []}
+    async def iter_window(session, shard_start, shard_end):
+        credential = active_credential
         url = base_url
-        logger.debug(f"Starting AeroAPI data fetch from {url}")
+        params = {
+            "start": shard_start,
+            "end": shard_end,
+            "max_pages": 10,
+        }
+        logger.debug(f"Starting AeroAPI data fetch from {url} ({shard_start} to {shard_end})")
 
         while url:
             logger.debug(f"Fetching AeroAPI page from {url}")
-            data, active_credential = await fetch_page(session, url, active_credential)
-            if not data:
-                logger.warning("No data fetched from AeroAPI page")
-                break
+            data, credential = await fetch_page(session, url, params, credential)
+            if data is None:
+                # A missing page must not look like the end of the window.
+                raise AeroApiWindowError(f"AeroAPI {move}: no data fetched for {shard_start}..{shard_end} ({url})")
 
             params = None
             batch = data.get(move, [])
             if batch:
                 logger.success(f"Received {len(batch)} flights in this AeroAPI batch")
-                all_data[move].extend(batch)
                 links = data.get("links") or {}
                 next_url = links.get("next") if isinstance(links, dict) else None
+                yield batch
                 if next_url:
-                    url = f"https://aeroapi.flightaware.com/aeroapi{next_url}"
+                    url = f"{AEROAPI_BASE_URL}{next_url}"
                     logger.debug(f"Proceeding to AeroAPI next page: {url}")
                 else:
                     if links is None:
@@ -223,9 +298,23 @@ async def fetch_aeroapi_scheduled(move, start_time, end_time, airport_icao="LEMD
                 logger.warning("AeroAPI returned empty batch, stopping pagination")
                 break
 
-        logger.success(f"Total AeroAPI flights collected: {len(all_data[move])}")
-        output_path = f"api/data/{airport_icao.lower()}_aeroapi_data_{move}.json"
-        with open(output_path, "w", encoding="utf-8") as file_handle:
-            json.dump(all_data, file_handle, indent=4)
-            logger.debug(f"AeroAPI data saved to {output_path}")
-        return all_data
+    sink = open_raw_sink("aeroapi", movement, airport_icao)
+    seen: set[str] = set()
+    async with http_session("aeroapi") as session:
+        try:
+            async for batch in iter_shard_batches(
+                shards,
+                lambda shard_start, shard_end: iter_window(session, shard_start, shard_end),
+                sharding["max_parallel_shards"],
+            ):
+                sink.append(batch)
+                fresh = dedupe_batch("aeroapi", movement, batch, seen)
+                if fresh:
+                    yield fresh
+        except BaseException:
+            sink.abort()
+            raise
+    sink.close()
+    logger.debug(f"AeroAPI {move} pagination finished across {len(shards)} window(s)")
+    if on_complete is not None:
+        on_complete()
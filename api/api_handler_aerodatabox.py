@@ -1,13 +1,92 @@
+import asyncio
 import aiohttp
-import json
 import os
 import time
+from dataclasses import dataclass
+from typing import Any
 
 from loguru import logger
 
-from monitoring.api_usage import record_api_event
+import config.config as cfg
+from api.rate_limiter import parse_retry_after
+from api.raw_sink import open_raw_sink
+from api.window_sharding import dedupe_batch, iter_shard_batches, load_sharding_config, merge_shard_flights, split_window
+from monitoring.api_usage import enforce_circuit_or_raise, record_api_event
+from monitoring.circuit_breaker import CircuitOpenError, get_breaker
+from monitoring.cycle_ledger import note_retry
+from utils.http_client import http_session
+
+
+ADB_BASE_URL = "https://api.magicapi.dev/api/v1/aedbx/aerodatabox"
+_RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_adb_request_config() -> dict[str, float]:
+    raw = cfg.get_config("api.aerodatabox") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    return {
+        "request_timeout_seconds": max(1.0, _as_float(raw.get("request_timeout_seconds"), 20.0)),
+        "connect_timeout_seconds": max(0.5, _as_float(raw.get("connect_timeout_seconds"), 5.0)),
+        "max_attempts": max(1, int(_as_float(raw.get("max_attempts"), 4))),
+        "backoff_base_seconds": max(0.0, _as_float(raw.get("backoff_base_seconds"), 2.0)),
+        "max_backoff_seconds": max(0.0, _as_float(raw.get("max_backoff_seconds"), 30.0)),
+        "default_retry_after_seconds": max(0.0, _as_float(raw.get("default_retry_after_seconds"), 10.0)),
+        "window_deadline_seconds": max(1.0, _as_float(raw.get("window_deadline_seconds"), 90.0)),
+    }
+
+
+@dataclass(frozen=True)
+class AdbWindowResult:
+    """Outcome of one sub-window request: ``ok`` with (possibly no) flights, or failed with the last error."""
+
+    flights: list[dict[str, Any]]
+    status_code: int | None
+    attempts: int
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def empty(self) -> bool:
+        return self.ok and not self.flights
+
+
+class AeroDataBoxWindowError(RuntimeError):
+    """A sub-window request failed, so the window cannot be reported as complete."""
+
+    def __init__(self, message: str, result: AdbWindowResult | None = None) -> None:
+        super().__init__(message)
+        self.result = result
+
 
 async def fetch_adb_data(move, start_time, end_time, airport_icao="LEMD"):
+    """Collect the whole window: deduplicated and sorted by scheduled time, or None if any part failed."""
+    try:
+        batches = [batch async for batch in iter_adb_batches(move, start_time, end_time, airport_icao=airport_icao)]
+    except AeroDataBoxWindowError as exc:
+        logger.error(str(exc))
+        return None
+    data = {move: merge_shard_flights("aerodatabox", move, batches, airport_icao)}
+    logger.success(f"Total flights collected: {len(data[move])}")
+    return data
+
+
+async def iter_adb_batches(move, start_time, end_time, airport_icao="LEMD", on_complete=None):
+    """Yield the flights of each sub-window as soon as its response arrives.
+
+    ``on_complete()`` is called once every sub-window succeeded.
+    """
     airport_icao = (airport_icao or "LEMD").upper()
     api_key = os.getenv("AERODATABOX_KEY")
     if not api_key:
@@ -36,63 +115,180 @@ async def fetch_adb_data(move, start_time, end_time, airport_icao="LEMD"):
         "x-magicapi-key": api_key,
     }
     
+    sharding = load_sharding_config("aerodatabox")
+    request_config = load_adb_request_config()
+    shards = split_window(start_time, end_time, sharding["shard_minutes"])
+    # Every sub-window (retries included) has to finish by this point, so a degraded ADB bounds the cycle.
+    deadline = time.monotonic() + request_config["window_deadline_seconds"]
+    logger.info(f"Fetching data from ADB API in {len(shards)} window(s)")
+    async def iter_shard(shard_start, shard_end):
+        result = await _fetch_adb_window(
+            session,
+            airport_icao,
+            move,
+            shard_start,
+            shard_end,
+            headers,
+            querystring,
+            config=request_config,
+            deadline=deadline,
+        )
+        if not result.ok:
+            failures.append((shard_start, shard_end, result))
+            return
+        yield result.flights
+
+    sink = open_raw_sink("aerodatabox", move, airport_icao)
+    seen = set()
+    # Failed sub-windows do not cancel the others: their flights are still yielded, then the window is failed.
+    failures: list[tuple[str, str, AdbWindowResult]] = []
+    async with http_session("aerodatabox") as session:
+        try:
+            async for batch in iter_shard_batches(shards, iter_shard, sharding["max_parallel_shards"]):
+                sink.append(batch)
+                fresh = dedupe_batch("aerodatabox", move, batch, seen)
+                if fresh:
+                    yield fresh
+        except BaseException:
+            sink.abort()
+            raise
+    if failures:
+        sink.abort()
+        # A missing sub-window must not look like an empty one.
+        shard_start, shard_end, result = failures[0]
+        raise AeroDataBoxWindowError(
+            f"AeroDataBox {move}: {len(failures)}/{len(shards)} window(s) failed, first {shard_start}..{shard_end} "
+            f"after {result.attempts} attempt(s): {result.error}",
+            result,
+        )
+    sink.close()
+    if on_complete is not None:
+        on_complete()
+
+
+def _backoff_seconds(attempt: int, config: dict[str, float]) -> float:
+    return min(config["backoff_base_seconds"] * (2 ** (attempt - 1)), config["max_backoff_seconds"])
+
+
+async def _fetch_adb_window(
+    session,
+    airport_icao,
+    move,
+    start_time,
+    end_time,
+    headers,
+    querystring,
+    *,
+    config: dict[str, float],
+    deadline: float,
+) -> AdbWindowResult:
+    """Request one sub-window, retrying 429/5xx/timeouts with Retry-After-aware backoff until ``deadline``.
+
+    200 and 204 (AeroDataBox's "no flights") are successes; any other 4xx fails at once.
+    """
     url = (
-        "https://api.magicapi.dev/api/v1/aedbx/aerodatabox/flights/airports/"
+        f"{ADB_BASE_URL}/flights/airports/"
         f"Icao/{airport_icao}/{start_time.replace(':', '%3A')}/{end_time.replace(':', '%3A')}"
     )
-    logger.info(f"Fetching data from ADB API")
-    async with aiohttp.ClientSession() as session:
+    endpoint = f"GET /aerodatabox/flights/airports/Icao/{airport_icao}"
+    status_code = None
+    error = "deadline_exceeded"
+    attempt = 0
+
+    breaker = get_breaker("aerodatabox")
+
+    while attempt < config["max_attempts"]:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            error = "deadline_exceeded"
+            break
+        try:
+            enforce_circuit_or_raise("aerodatabox", endpoint)
+        except CircuitOpenError:
+            error = "circuit_open"
+            break
+        attempt += 1
+        timeout = aiohttp.ClientTimeout(
+            total=min(config["request_timeout_seconds"], remaining),
+            connect=min(config["connect_timeout_seconds"], remaining),
+        )
+        retry_after = None
+        # Set once the response is in; a body that then fails to decode is not a second breaker outcome.
+        status_code = None
         started = time.perf_counter()
         try:
-            async with session.get(url, headers=headers, params=querystring) as response:
+            async with session.get(url, headers=headers, params=querystring, timeout=timeout) as response:
+                status_code = response.status
                 duration_ms = (time.perf_counter() - started) * 1000.0
                 logger.debug(f"Received response with status: {response.status}")
-                data = await response.json()
-                record_api_event(
-                    provider="aerodatabox",
-                    endpoint=f"GET /aerodatabox/flights/airports/Icao/{airport_icao}",
-                    method="GET",
-                    status_code=response.status,
-                    success=200 <= response.status < 300,
-                    duration_ms=duration_ms,
-                    estimated_cost_usd=0.0,
-                )
-                if response.status == 200:
-                    # Create data directory if it doesn't exist and save the data to a JSON file
-                    os.makedirs('api/data', exist_ok=True)
-                    file_path = f"api/data/{airport_icao.lower()}_adb_data_{move}.json"
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=4)
-                    logger.debug(f"Data saved to {file_path}")
-                    logger.success(f"Total flights collected: {len(data[move])}")
+                if response.status >= 500:
+                    breaker.record_failure()
                 else:
-                    logger.error(f"API request failed with status code: {response.status}")
-                return data
-        except aiohttp.ClientError as e:
+                    breaker.record_success()
+                data = await response.json(content_type=None) if response.status == 200 else None
+                success = response.status in (200, 204)
+                error = None if success else f"status {response.status}"
+                header = response.headers.get("Retry-After")
+                if response.status == 429 or (response.status in _RETRYABLE_STATUSES and header):
+                    retry_after = parse_retry_after(header, config["default_retry_after_seconds"])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            if status_code is None:
+                breaker.record_failure()
             duration_ms = (time.perf_counter() - started) * 1000.0
-            record_api_event(
-                provider="aerodatabox",
-                endpoint=f"GET /aerodatabox/flights/airports/Icao/{airport_icao}",
-                method="GET",
-                status_code=None,
-                success=False,
-                duration_ms=duration_ms,
-                estimated_cost_usd=0.0,
-                error=str(e),
-            )
-            logger.error(f"Client error occurred: {e}")
-        except Exception as e:
+            status_code = None
+            success = False
+            error = str(exc) or type(exc).__name__
+        except Exception as exc:
+            if status_code is None:
+                breaker.record_failure()
             duration_ms = (time.perf_counter() - started) * 1000.0
             record_api_event(
                 provider="aerodatabox",
-                endpoint=f"GET /aerodatabox/flights/airports/Icao/{airport_icao}",
+                endpoint=endpoint,
                 method="GET",
-                status_code=None,
+                status_code=status_code,
                 success=False,
                 duration_ms=duration_ms,
                 estimated_cost_usd=0.0,
-                error=str(e),
+                error=str(exc),
             )
-            logger.error(f"An unexpected error occurred: {e}")
+            logger.error(f"An unexpected error occurred: {exc}")
+            return AdbWindowResult(flights=[], status_code=status_code, attempts=attempt, error=str(exc))
+
+        record_api_event(
+            provider="aerodatabox",
+            endpoint=endpoint,
+            method="GET",
+            status_code=status_code,
+            success=success,
+            duration_ms=duration_ms,
+            estimated_cost_usd=0.0,
+            error=error,
+            metadata={"attempt": attempt},
+        )
+        if success:
+            flights = (data.get(move) or []) if isinstance(data, dict) else []
+            return AdbWindowResult(flights=flights, status_code=status_code, attempts=attempt)
+
+        if status_code is not None and status_code not in _RETRYABLE_STATUSES:
+            logger.error(f"API request failed with status code: {status_code}")
+            break
+        if attempt >= config["max_attempts"]:
+            break
+
+        delay = retry_after if retry_after is not None else _backoff_seconds(attempt, config)
+        if time.monotonic() + delay >= deadline:
+            logger.warning(f"AeroDataBox {start_time}..{end_time}: retry in {delay:.1f}s would pass the deadline")
+            error = f"{error}; deadline_exceeded"
+            break
+        logger.warning(
+            f"AeroDataBox {start_time}..{end_time} failed ({error}). Retrying in {delay:.1f}s "
+            f"(attempt {attempt}/{config['max_attempts']})"
+        )
+        note_retry("aerodatabox")
+        await asyncio.sleep(delay)
+
+    return AdbWindowResult(flights=[], status_code=status_code, attempts=attempt, error=error)
+
 
 #asyncio.run(fetch_adb_data('departures',  '2025-02-10T06:00', '2025-02-10T07:00'))
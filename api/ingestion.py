@@ -0,0 +1,294 @@
+"""Fetch every movement/provider pair of a cycle concurrently.
+
+Pages are yielded as they arrive, in completion order; a failing source ends
+with ``error`` set instead of aborting the others.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from loguru import logger
+
+import config.config as cfg
+from api import api_handler_aeroapi, api_handler_aerodatabox, raw_archive, window_ledger
+from monitoring.tracing import span
+
+
+MOVEMENTS: tuple[str, ...] = ("arrivals", "departures")
+PROVIDERS: tuple[str, ...] = ("aerodatabox", "aeroapi")
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass(frozen=True)
+class SourceBatch:
+    """One page of a source's flights, or (``final=True``) the end of that source."""
+
+    movement: str
+    provider: str
+    flights: list[dict[str, Any]] = field(default_factory=list)
+    final: bool = False
+    error: str | None = None
+    duration_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_ingestion_config() -> dict[str, Any]:
+    raw = cfg.get_config("api.ingestion") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    return {
+        "max_concurrency": max(1, _as_int(raw.get("max_concurrency"), 4)),
+        "min_start_interval_seconds": max(0.0, _as_float(raw.get("min_start_interval_seconds"), 0.0)),
+    }
+
+
+def source_order(movements: tuple[str, ...] = MOVEMENTS) -> list[tuple[str, str]]:
+    """Merge precedence: AeroDataBox before AeroAPI within each movement, arrivals first."""
+    return [(movement, provider) for movement in movements for provider in PROVIDERS]
+
+
+def _payload_key(provider: str, movement: str) -> str:
+    return f"scheduled_{movement}" if provider == "aeroapi" else movement
+
+
+def _preloaded_candidates(provider: str, movement: str, airport_icao: str) -> list[Path]:
+    airport_prefix = airport_icao.lower()
+    if provider == "aeroapi":
+        names = [
+            f"{airport_prefix}_aeroapi_data_scheduled_{movement}.json",
+            f"aeroapi_data_scheduled_{movement}.json",
+        ]
+    else:
+        names = [
+            f"{airport_prefix}_adb_data_{movement}.json",
+            f"adb_data_{movement}.json",
+        ]
+    return [PROJECT_ROOT / "api" / "data" / name for name in names]
+
+
+def load_preloaded_payload(provider: str, movement: str, airport_icao: str) -> dict[str, Any] | None:
+    """Replay the archived cycle (``api.raw_archive.replay_cycle``, default latest), else the ``api/data`` files."""
+    archive_cfg = raw_archive.load_raw_archive_config()
+    if archive_cfg["enabled"]:
+        payload = raw_archive.get_raw_archive(archive_cfg).read_payload(
+            airport_icao=airport_icao,
+            provider=provider,
+            movement=movement,
+            cycle_started_at=archive_cfg["replay_cycle"],
+        )
+        if payload is not None:
+            logger.info(f"Loaded {provider} {movement} data from the raw archive")
+            return payload
+
+    for candidate in _preloaded_candidates(provider, movement, airport_icao):
+        try:
+            with open(candidate, "r", encoding="utf-8") as file_handle:
+                payload = json.load(file_handle)
+        except FileNotFoundError:
+            continue
+        logger.info(f"Loaded {provider} data from {candidate}")
+        return payload
+    return None
+
+
+def _flights_from_payload(provider: str, movement: str, payload: Any) -> list[dict[str, Any]]:
+    if not isinstance(payload, dict):
+        logger.warning(f"{provider} returned no data for {movement}")
+        raise RuntimeError("no_data")
+    flights = payload.get(_payload_key(provider, movement)) or []
+    if not isinstance(flights, list):
+        raise RuntimeError("malformed_payload")
+    return flights
+
+
+async def _stream_payload(
+    provider: str,
+    movement: str,
+    *,
+    airport_icao: str,
+    start_time: str,
+    end_time: str,
+    preloaded: bool,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    if preloaded:
+        payload = await asyncio.to_thread(load_preloaded_payload, provider, movement, airport_icao)
+        yield _flights_from_payload(provider, movement, payload)
+        return
+    if not window_ledger.load_delta_polling_config()["enabled"]:
+        async for batch in _iter_live(provider, movement, airport_icao, start_time, end_time):
+            yield batch
+        return
+
+    async for batch in window_ledger.stream_window(
+        airport_icao=airport_icao,
+        movement=movement,
+        provider=provider,
+        start_time=start_time,
+        end_time=end_time,
+        iter_slice=lambda slice_start, slice_end, complete: _iter_live(
+            provider, movement, airport_icao, slice_start, slice_end, on_complete=complete
+        ),
+    ):
+        yield batch
+
+
+def _iter_live(
+    provider: str,
+    movement: str,
+    airport_icao: str,
+    start_time: str,
+    end_time: str,
+    on_complete: Callable[[], None] | None = None,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    if provider == "aeroapi":
+        return api_handler_aeroapi.iter_aeroapi_pages(
+            movement, start_time, end_time, airport_icao=airport_icao, on_complete=on_complete
+        )
+    return api_handler_aerodatabox.iter_adb_batches(
+        movement, start_time, end_time, airport_icao=airport_icao, on_complete=on_complete
+    )
+
+
+_STREAM_OVERRIDE: ContextVar[Callable[..., AsyncIterator[list[dict[str, Any]]]] | None] = ContextVar(
+    "plane_spotter_ingestion_stream",
+    default=None,
+)
+
+
+@contextmanager
+def use_stream(stream: Callable[..., AsyncIterator[list[dict[str, Any]]]]) -> Iterator[None]:
+    """Serve every source from ``stream(provider, movement, **kwargs)`` instead of the providers (replays)."""
+    token = _STREAM_OVERRIDE.set(stream)
+    try:
+        yield
+    finally:
+        _STREAM_OVERRIDE.reset(token)
+
+
+class _StartSpacer:
+    """Shared budget: at most ``max_concurrency`` fetches in flight, spaced by a minimum interval."""
+
+    def __init__(self, max_concurrency: int, min_interval_seconds: float) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._min_interval = min_interval_seconds
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def __aenter__(self) -> None:
+        await self._semaphore.acquire()
+        if self._min_interval <= 0:
+            return
+        async with self._lock:
+            delay = self._next_start - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = time.monotonic() + self._min_interval
+
+    async def __aexit__(self, *_exc: object) -> None:
+        self._semaphore.release()
+
+
+async def _run_source(
+    provider: str,
+    movement: str,
+    budget: _StartSpacer,
+    stream: Callable[..., AsyncIterator[list[dict[str, Any]]]],
+    batches: asyncio.Queue[SourceBatch],
+    **kwargs: Any,
+) -> None:
+    async with budget:
+        started = time.perf_counter()
+        error: str | None = None
+        received = 0
+        with span(f"fetch.{provider}", movement=movement) as fetch_span:
+            try:
+                async for flights in stream(provider, movement, **kwargs):
+                    received += len(flights)
+                    await batches.put(SourceBatch(movement, provider, flights))
+            except Exception as exc:
+                error = str(exc) or type(exc).__name__
+                logger.error(f"{provider} {movement} fetch failed: {error}")
+                if fetch_span:
+                    fetch_span.set_error(error)
+            if fetch_span:
+                fetch_span.set_attribute("flights", received)
+
+        duration_ms = (time.perf_counter() - started) * 1000.0
+        await batches.put(SourceBatch(movement, provider, final=True, error=error, duration_ms=duration_ms))
+
+
+async def iter_source_batches(
+    *,
+    airport_icao: str,
+    start_time: str,
+    end_time: str,
+    preloaded: bool = False,
+    movements: tuple[str, ...] = MOVEMENTS,
+    stream: Callable[..., AsyncIterator[list[dict[str, Any]]]] | None = None,
+) -> AsyncIterator[SourceBatch]:
+    """Start every movement/provider stream at once and yield each page of flights as it arrives.
+
+    Every source ends with exactly one ``final`` batch carrying its error (if
+    any) and duration. Only a few batches are buffered, so pages are consumed
+    while later ones are still downloading.
+    """
+    stream = stream or _STREAM_OVERRIDE.get() or _stream_payload
+    ingestion_cfg = load_ingestion_config()
+    budget = _StartSpacer(ingestion_cfg["max_concurrency"], ingestion_cfg["min_start_interval_seconds"])
+    sources = source_order(movements)
+    batches: asyncio.Queue[SourceBatch] = asyncio.Queue(maxsize=ingestion_cfg["max_concurrency"] * 2)
+    tasks = [
+        asyncio.create_task(
+            _run_source(
+                provider,
+                movement,
+                budget,
+                stream,
+                batches,
+                airport_icao=airport_icao,
+                start_time=start_time,
+                end_time=end_time,
+                preloaded=preloaded,
+            )
+        )
+        for movement, provider in sources
+    ]
+    try:
+        pending = len(sources)
+        while pending:
+            batch = await batches.get()
+            if batch.final:
+                pending -= 1
+            yield batch
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,186 @@
+"""Per-credential token buckets for AeroAPI paging.
+
+A bucket refills at ``requests_per_minute`` up to ``burst`` tokens. A 429
+blocks the bucket for the advertised Retry-After and halves its rate; every
+success then adds the rate back a step at a time, up to the configured value.
+All coroutines using the same key share one bucket.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+
+import config.config as cfg
+
+
+_DEFAULT_REQUESTS_PER_MINUTE = 10.0
+_DEFAULT_BURST = 10.0
+_DEFAULT_MIN_REQUESTS_PER_MINUTE = 1.0
+_DEFAULT_BACKOFF_FACTOR = 0.5
+_DEFAULT_RECOVERY_PER_SUCCESS = 1.0
+_DEFAULT_RETRY_AFTER_SECONDS = 20.0
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_aeroapi_rate_limit_config() -> dict[str, float]:
+    raw = cfg.get_config("api.aeroapi.rate_limit") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    requests_per_minute = max(0.1, _as_float(raw.get("requests_per_minute"), _DEFAULT_REQUESTS_PER_MINUTE))
+    return {
+        "requests_per_minute": requests_per_minute,
+        "burst": max(1.0, _as_float(raw.get("burst"), _DEFAULT_BURST)),
+        "min_requests_per_minute": min(
+            requests_per_minute,
+            max(0.1, _as_float(raw.get("min_requests_per_minute"), _DEFAULT_MIN_REQUESTS_PER_MINUTE)),
+        ),
+        "backoff_factor": min(1.0, max(0.05, _as_float(raw.get("backoff_factor"), _DEFAULT_BACKOFF_FACTOR))),
+        "recovery_per_success": max(0.0, _as_float(raw.get("recovery_per_success"), _DEFAULT_RECOVERY_PER_SUCCESS)),
+        "default_retry_after_seconds": max(
+            0.0,
+            _as_float(raw.get("default_retry_after_seconds"), _DEFAULT_RETRY_AFTER_SECONDS),
+        ),
+    }
+
+
+def parse_retry_after(value: str | None, default: float) -> float:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+    if value is None or not str(value).strip():
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AsyncTokenBucket:
+    """Reservation-based bucket: each caller takes a token (possibly going into debt) and sleeps off the debt.
+
+    Reservations are taken before sleeping, so concurrent callers are spaced in
+    arrival order and no lock is held while waiting.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: float,
+        burst: float,
+        min_requests_per_minute: float = _DEFAULT_MIN_REQUESTS_PER_MINUTE,
+        backoff_factor: float = _DEFAULT_BACKOFF_FACTOR,
+        recovery_per_success: float = _DEFAULT_RECOVERY_PER_SUCCESS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.configured_rpm = requests_per_minute
+        self.rpm = requests_per_minute
+        self.burst = burst
+        self.min_rpm = min_requests_per_minute
+        self.backoff_factor = backoff_factor
+        self.recovery_per_success = recovery_per_success
+        self._tokens = burst
+        self._updated = clock()
+
+    def configure(self, settings: dict[str, float]) -> None:
+        with self._lock:
+            new_rpm = settings["requests_per_minute"]
+            if new_rpm != self.configured_rpm:
+                # Keep a learned (lowered) rate, but never exceed the new ceiling.
+                learned = self.rpm < self.configured_rpm
+                self.configured_rpm = new_rpm
+                self.rpm = min(self.rpm, new_rpm) if learned else new_rpm
+            self.burst = settings["burst"]
+            self.min_rpm = settings["min_requests_per_minute"]
+            self.backoff_factor = settings["backoff_factor"]
+            self.recovery_per_success = settings["recovery_per_success"]
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rpm / 60.0)
+            self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take ``tokens`` now and return how many seconds the caller must wait before using them."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= tokens
+            wait = max(0.0, self._updated - now)
+            if self._tokens < 0:
+                wait += -self._tokens * 60.0 / self.rpm
+            return wait
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.rpm = min(self.configured_rpm, self.rpm + self.recovery_per_success)
+
+    def record_rate_limited(self, retry_after_seconds: float) -> None:
+        """Block the bucket for ``retry_after_seconds`` and lower its rate."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now + max(0.0, retry_after_seconds))
+            self.rpm = max(self.min_rpm, self.rpm * self.backoff_factor)
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return {
+                "requests_per_minute": round(self.rpm, 3),
+                "configured_requests_per_minute": self.configured_rpm,
+                "tokens": round(self._tokens, 3),
+                "blocked_for_seconds": round(max(0.0, self._updated - now), 3),
+            }
+
+
+_BUCKETS: dict[str, AsyncTokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def get_credential_bucket(api_key: str) -> AsyncTokenBucket:
+    settings = load_aeroapi_rate_limit_config()
+    with _BUCKETS_LOCK:
+        bucket = _BUCKETS.get(api_key)
+        if bucket is None:
+            bucket = _BUCKETS[api_key] = AsyncTokenBucket(
+                requests_per_minute=settings["requests_per_minute"],
+                burst=settings["burst"],
+                min_requests_per_minute=settings["min_requests_per_minute"],
+                backoff_factor=settings["backoff_factor"],
+                recovery_per_success=settings["recovery_per_success"],
+            )
+            return bucket
+    bucket.configure(settings)
+    return bucket
+
+
+def clear_credential_buckets() -> None:
+    with _BUCKETS_LOCK:
+        _BUCKETS.clear()
@@ -0,0 +1,328 @@
+"""Append-only archive of raw provider responses.
+
+Every page a handler receives is appended as its own gzip member to one
+segment file per UTC day (``<dir>/YYYY-MM-DD.seg``), and a SQLite index maps
+(airport, provider, movement, fetched_at) to the byte ranges of its pages. A
+reader seeks straight to those ranges, so pulling one past fetch never
+decompresses the rest of the segment; a whole segment is still a valid
+multi-member gzip file for ``zcat``.
+
+``fetched_at`` identifies one handler call; ``cycle_started_at`` groups the
+calls of one cycle (all delta slices of a source).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import config.config as cfg
+
+
+_LOCK = threading.Lock()
+_ARCHIVES: dict[Path, "RawArchive"] = {}
+
+
+def _as_int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_raw_archive_config() -> dict[str, Any]:
+    raw = cfg.get_config("api.raw_archive") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    replay_cycle = raw.get("replay_cycle")
+    return {
+        "enabled": bool(raw.get("enabled", True)),
+        "dir": str(raw.get("dir") or "api/data/archive"),
+        "compression_level": min(9, max(1, _as_int(raw.get("compression_level"), 6))),
+        "replay_cycle": str(replay_cycle) if replay_cycle else None,
+    }
+
+
+def payload_key(provider: str, movement: str) -> str:
+    return f"scheduled_{movement}" if provider == "aeroapi" else movement
+
+
+class RawArchive:
+    """Segment files plus their index for one archive directory."""
+
+    def __init__(self, directory: Path, *, compression_level: int = 6) -> None:
+        self.directory = directory
+        self.compression_level = compression_level
+        directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(directory / "index.db", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS archive_index (
+                airport_icao TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                movement TEXT NOT NULL,
+                cycle_started_at TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                flights INTEGER NOT NULL,
+                complete INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (airport_icao, provider, movement, fetched_at, seq)
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_archive_cycle
+            ON archive_index (airport_icao, provider, movement, cycle_started_at)
+            """
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def append(
+        self,
+        *,
+        airport_icao: str,
+        provider: str,
+        movement: str,
+        cycle_started_at: str,
+        fetched_at: str,
+        seq: int,
+        flights: list[dict[str, Any]],
+    ) -> None:
+        """Compress ``flights`` as one record, append it to today's segment and index it."""
+        record = gzip.compress(
+            json.dumps(flights, separators=(",", ":")).encode("utf-8"),
+            compresslevel=self.compression_level,
+        )
+        segment = f"{datetime.now(timezone.utc):%Y-%m-%d}.seg"
+        with self._lock:
+            with open(self.directory / segment, "ab") as handle:
+                offset = handle.tell()
+                handle.write(record)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO archive_index VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                    (
+                        airport_icao,
+                        provider,
+                        movement,
+                        cycle_started_at,
+                        fetched_at,
+                        seq,
+                        segment,
+                        offset,
+                        len(record),
+                        len(flights),
+                    ),
+                )
+
+    def mark_complete(self, *, airport_icao: str, provider: str, movement: str, fetched_at: str) -> None:
+        """Flag a fetch whose pages were all received; readers skip incomplete fetches by default."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                UPDATE archive_index SET complete = 1
+                WHERE airport_icao = ? AND provider = ? AND movement = ? AND fetched_at = ?
+                """,
+                (airport_icao, provider, movement, fetched_at),
+            )
+
+    def list_fetches(
+        self,
+        *,
+        airport_icao: str | None = None,
+        provider: str | None = None,
+        movement: str | None = None,
+        limit: int = 50,
+    ) -> list[dict[str, Any]]:
+        """Newest fetches first, one entry per handler call."""
+        clauses, params = [], []
+        for column, value in (("airport_icao", airport_icao), ("provider", provider), ("movement", movement)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT airport_icao, provider, movement, cycle_started_at, fetched_at,
+                       COUNT(*), SUM(flights), SUM(length), MIN(complete)
+                FROM archive_index
+                {where}
+                GROUP BY airport_icao, provider, movement, cycle_started_at, fetched_at
+                ORDER BY fetched_at DESC
+                LIMIT ?
+                """,
+                (*params, limit),
+            ).fetchall()
+        return [
+            {
+                "airport_icao": row[0],
+                "provider": row[1],
+                "movement": row[2],
+                "cycle_started_at": row[3],
+                "fetched_at": row[4],
+                "records": row[5],
+                "flights": row[6],
+                "compressed_bytes": row[7],
+                "complete": bool(row[8]),
+            }
+            for row in rows
+        ]
+
+    def list_cycles(self, *, airport_icao: str, limit: int = 1000) -> list[str]:
+        """``cycle_started_at`` of every cycle with a complete fetch, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT DISTINCT cycle_started_at FROM archive_index
+                WHERE airport_icao = ? AND complete = 1
+                ORDER BY cycle_started_at DESC
+                LIMIT ?
+                """,
+                (airport_icao.upper(), limit),
+            ).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def _read_records(self, rows: list[tuple[str, int, int]]) -> list[dict[str, Any]]:
+        flights: list[dict[str, Any]] = []
+        for segment, offset, length in rows:
+            with open(self.directory / segment, "rb") as handle:
+                handle.seek(offset)
+                flights.extend(json.loads(gzip.decompress(handle.read(length))))
+        return flights
+
+    def read_payload(
+        self,
+        *,
+        airport_icao: str,
+        provider: str,
+        movement: str,
+        fetched_at: str | None = None,
+        cycle_started_at: str | None = None,
+    ) -> dict[str, Any] | None:
+        """Rebuild ``{payload_key: flights}`` for one fetch, one cycle, or (neither given) the latest cycle.
+
+        Without an explicit fetch only complete fetches are returned.
+        """
+        source = (airport_icao.upper(), provider, movement)
+        with self._lock:
+            if fetched_at is not None:
+                rows = self._conn.execute(
+                    """
+                    SELECT segment, offset, length FROM archive_index
+                    WHERE airport_icao = ? AND provider = ? AND movement = ? AND fetched_at = ?
+                    ORDER BY seq
+                    """,
+                    (*source, fetched_at),
+                ).fetchall()
+            else:
+                if cycle_started_at is None:
+                    latest = self._conn.execute(
+                        """
+                        SELECT MAX(cycle_started_at) FROM archive_index
+                        WHERE airport_icao = ? AND provider = ? AND movement = ? AND complete = 1
+                        """,
+                        source,
+                    ).fetchone()
+                    cycle_started_at = latest[0] if latest else None
+                    if cycle_started_at is None:
+                        return None
+                rows = self._conn.execute(
+                    """
+                    SELECT segment, offset, length FROM archive_index
+                    WHERE airport_icao = ? AND provider = ? AND movement = ? AND cycle_started_at = ?
+                      AND complete = 1
+                    ORDER BY fetched_at, seq
+                    """,
+                    (*source, cycle_started_at),
+                ).fetchall()
+        if not rows:
+            return None
+        return {payload_key(provider, movement): self._read_records(rows)}
+
+
+def _resolve_dir(raw_dir: str) -> Path:
+    path = Path(raw_dir)
+    if path.is_absolute():
+        return path
+    return Path(__file__).resolve().parent.parent / path
+
+
+def get_raw_archive(config: dict[str, Any] | None = None) -> RawArchive:
+    config = config or load_raw_archive_config()
+    directory = _resolve_dir(config["dir"])
+    with _LOCK:
+        archive = _ARCHIVES.get(directory)
+        if archive is None:
+            archive = _ARCHIVES[directory] = RawArchive(directory, compression_level=config["compression_level"])
+        return archive
+
+
+def close_raw_archives() -> None:
+    with _LOCK:
+        for archive in _ARCHIVES.values():
+            archive.close()
+        _ARCHIVES.clear()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="List or read archived provider responses")
+    parser.add_argument("--dir", default="", help="Archive directory (default: api.raw_archive.dir)")
+    parser.add_argument("--airport", default="", help="Filter by airport ICAO")
+    parser.add_argument("--provider", default="", choices=["", "aeroapi", "aerodatabox"])
+    parser.add_argument("--movement", default="", choices=["", "arrivals", "departures"])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--read", default="", metavar="FETCHED_AT", help="Print the payload of one fetch")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    config = load_raw_archive_config()
+    if args.dir:
+        config["dir"] = args.dir
+    archive = get_raw_archive(config)
+    airport = args.airport.upper() or None
+
+    if args.read:
+        if not (airport and args.provider and args.movement):
+            print(json.dumps({"ok": False, "error": "--read needs --airport, --provider and --movement"}))
+            return 1
+        payload = archive.read_payload(
+            airport_icao=airport,
+            provider=args.provider,
+            movement=args.movement,
+            fetched_at=args.read,
+        )
+        print(json.dumps({"ok": payload is not None, "payload": payload}, ensure_ascii=True, indent=2))
+        return 0 if payload is not None else 1
+
+    fetches = archive.list_fetches(
+        airport_icao=airport,
+        provider=args.provider or None,
+        movement=args.movement or None,
+        limit=args.limit,
+    )
+    print(json.dumps({"ok": True, "fetches": fetches}, ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
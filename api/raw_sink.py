@@ -0,0 +1,181 @@
+"""Background persistence of raw provider flights.
+
+Handlers hand each page to a sink as soon as it arrives; compression and disk
+writes happen on a single writer thread, so the event loop never blocks and no
+handler has to keep the whole window in memory just to save it.
+
+With ``api.raw_archive.enabled`` (the default) pages are appended to the
+compressed archive (:mod:`api.raw_archive`). Otherwise a sink streams its
+pages into ``<file>.tmp`` and renames it over the previous ``api/data`` file
+on close; an aborted sink leaves the last complete file in place.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+from loguru import logger
+
+from api.raw_archive import RawArchive, get_raw_archive, load_raw_archive_config, payload_key
+from monitoring.cycle_ledger import current_cycle
+
+
+RAW_DATA_DIR = Path("api/data")
+
+_QUEUE: queue.Queue[Callable[[], None]] = queue.Queue()
+_THREAD: threading.Thread | None = None
+_THREAD_LOCK = threading.Lock()
+
+
+def _run_writer() -> None:
+    while True:
+        operation = _QUEUE.get()
+        try:
+            operation()
+        except Exception as exc:  # pragma: no cover - keep the writer alive
+            logger.warning(f"Raw payload writer failed: {exc}")
+        finally:
+            _QUEUE.task_done()
+
+
+def _submit(operation: Callable[[], None]) -> None:
+    global _THREAD
+    if _THREAD is None:
+        with _THREAD_LOCK:
+            if _THREAD is None:
+                _THREAD = threading.Thread(target=_run_writer, name="raw-payload-writer", daemon=True)
+                _THREAD.start()
+    _QUEUE.put(operation)
+
+
+def flush_raw_sinks() -> None:
+    """Block until every queued page has been written."""
+    if _THREAD is not None:
+        _QUEUE.join()
+
+
+atexit.register(flush_raw_sinks)
+
+
+class RawPayloadSink:
+    """Streams ``{payload_key: [flight, ...]}`` to ``path`` one page at a time."""
+
+    def __init__(self, path: Path, payload_key: str) -> None:
+        self.path = path
+        self.payload_key = payload_key
+        self.flights_written = 0
+        self._tmp_path = path.with_name(f"{path.name}.tmp")
+        self._handle: Any = None
+        self._finished = False
+
+    def _write_page(self, flights: list[dict[str, Any]]) -> None:
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self._tmp_path, "w", encoding="utf-8")
+            self._handle.write(f"{{{json.dumps(self.payload_key)}:[")
+        for flight in flights:
+            if self.flights_written:
+                self._handle.write(",")
+            self._handle.write(json.dumps(flight, separators=(",", ":")))
+            self.flights_written += 1
+
+    def _finish(self) -> None:
+        self._write_page([])
+        self._handle.write("]}")
+        self._handle.close()
+        os.replace(self._tmp_path, self.path)
+        logger.debug(f"Raw data saved to {self.path} ({self.flights_written} flights)")
+
+    def _discard(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._tmp_path.unlink(missing_ok=True)
+
+    def append(self, flights: list[dict[str, Any]]) -> None:
+        if flights and not self._finished:
+            _submit(lambda: self._write_page(flights))
+
+    def close(self) -> None:
+        if not self._finished:
+            self._finished = True
+            _submit(self._finish)
+
+    def abort(self) -> None:
+        if not self._finished:
+            self._finished = True
+            _submit(self._discard)
+
+
+class ArchiveSink:
+    """Appends each page as one archive record; the fetch is marked complete on close."""
+
+    def __init__(
+        self,
+        archive: RawArchive,
+        *,
+        airport_icao: str,
+        provider: str,
+        movement: str,
+        cycle_started_at: str,
+        fetched_at: str,
+    ) -> None:
+        self.archive = archive
+        self.fetched_at = fetched_at
+        self._source = {"airport_icao": airport_icao, "provider": provider, "movement": movement}
+        self._cycle_started_at = cycle_started_at
+        self._seq = 0
+        self._finished = False
+
+    def append(self, flights: list[dict[str, Any]]) -> None:
+        if not flights or self._finished:
+            return
+        seq = self._seq
+        self._seq += 1
+        _submit(
+            lambda: self.archive.append(
+                **self._source,
+                cycle_started_at=self._cycle_started_at,
+                fetched_at=self.fetched_at,
+                seq=seq,
+                flights=flights,
+            )
+        )
+
+    def close(self) -> None:
+        if not self._finished:
+            self._finished = True
+            _submit(lambda: self.archive.mark_complete(**self._source, fetched_at=self.fetched_at))
+
+    def abort(self) -> None:
+        # Records already appended stay in the archive, flagged incomplete.
+        self._finished = True
+
+
+def open_raw_sink(provider: str, movement: str, airport_icao: str) -> RawPayloadSink | ArchiveSink:
+    """Sink for one handler call: the archive, or the file ``api.preloaded_data`` mode reads back."""
+    archive_cfg = load_raw_archive_config()
+    if archive_cfg["enabled"]:
+        fetched_at = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        cycle = current_cycle()
+        return ArchiveSink(
+            get_raw_archive(archive_cfg),
+            airport_icao=airport_icao.upper(),
+            provider=provider,
+            movement=movement,
+            cycle_started_at=cycle.started_at.isoformat() if cycle else fetched_at,
+            fetched_at=fetched_at,
+        )
+
+    airport_prefix = airport_icao.lower()
+    if provider == "aeroapi":
+        name = f"{airport_prefix}_aeroapi_data_scheduled_{movement}.json"
+    else:
+        name = f"{airport_prefix}_adb_data_{movement}.json"
+    return RawPayloadSink(RAW_DATA_DIR / name, payload_key(provider, movement))
@@ -0,0 +1,393 @@
+"""Incremental polling: fetch only the part of a window not covered recently.
+
+For every (airport, movement, provider) the ledger records which time ranges
+were fetched and when, and keeps the raw flights of those fetches. A cycle then
+asks the provider only for the uncovered tail plus a short head refresh, and
+rebuilds the full window from the local cache.
+
+Window times use the same naive local timestamps ``main`` passes to the
+handlers; provider timestamps with an offset are converted to the airport's
+local time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from loguru import logger
+
+import config.config as cfg
+from utils import clock
+from utils.timestamps import airport_timezone, parse_timestamp
+
+
+_TIME_FORMAT = "%Y-%m-%dT%H:%M"
+
+_DB_LOCK = threading.Lock()
+_CONNECTIONS: dict[Path, sqlite3.Connection] = {}
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_delta_polling_config() -> dict[str, Any]:
+    raw = cfg.get_config("api.delta_polling") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    return {
+        "enabled": bool(raw.get("enabled", True)),
+        "db_path": str(raw.get("db_path") or "database/flight_window_cache.db"),
+        "head_refresh_minutes": max(0.0, _as_float(raw.get("head_refresh_minutes"), 0.0)),
+        "max_window_age_minutes": max(1.0, _as_float(raw.get("max_window_age_minutes"), 240.0)),
+        "cache_retention_hours": max(1.0, _as_float(raw.get("cache_retention_hours"), 24.0)),
+    }
+
+
+def _resolve_db_path(raw_path: str) -> Path:
+    path = Path(raw_path)
+    if path.is_absolute():
+        return path
+    return Path(__file__).resolve().parent.parent / path
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS fetch_windows (
+            airport_icao TEXT NOT NULL,
+            movement TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            window_start TEXT NOT NULL,
+            window_end TEXT NOT NULL,
+            fetched_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_fetch_windows_source
+        ON fetch_windows (airport_icao, movement, provider, fetched_at)
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS flight_cache (
+            airport_icao TEXT NOT NULL,
+            movement TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            flight_key TEXT NOT NULL,
+            scheduled_at TEXT NOT NULL,
+            payload_json TEXT NOT NULL,
+            fetched_at TEXT NOT NULL,
+            PRIMARY KEY (airport_icao, movement, provider, flight_key)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_flight_cache_scheduled
+        ON flight_cache (airport_icao, movement, provider, scheduled_at)
+        """
+    )
+
+
+def _get_connection(db_path: Path) -> sqlite3.Connection:
+    conn = _CONNECTIONS.get(db_path)
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        _ensure_schema(conn)
+        _CONNECTIONS[db_path] = conn
+    return conn
+
+
+def close_window_ledger() -> None:
+    with _DB_LOCK:
+        for conn in _CONNECTIONS.values():
+            conn.close()
+        _CONNECTIONS.clear()
+
+
+def _parse_window_time(value: str) -> datetime:
+    return datetime.strptime(value[:16], _TIME_FORMAT)
+
+
+def _format_window_time(value: datetime) -> str:
+    return value.strftime(_TIME_FORMAT)
+
+
+def flight_identity(
+    provider: str,
+    movement: str,
+    flight: dict[str, Any],
+    airport_icao: str | None = None,
+) -> tuple[str, datetime] | None:
+    """Return ``(flight_key, scheduled local time at airport_icao)`` for a raw provider flight."""
+    tz = airport_timezone(airport_icao)
+    if provider == "aeroapi":
+        fields = ("scheduled_in", "scheduled_on") if movement == "arrivals" else ("scheduled_out", "scheduled_off")
+        scheduled = next((parse_timestamp(flight.get(name), tz) for name in fields if flight.get(name)), None)
+        key = flight.get("fa_flight_id") or flight.get("ident")
+    else:
+        side = "arrival" if movement == "arrivals" else "departure"
+        times = (flight.get(side) or {}).get("scheduledTime") or {}
+        scheduled = parse_timestamp(times.get("utc"), tz) or parse_timestamp(times.get("local"), tz)
+        number = flight.get("number")
+        key = f"{number}|{times.get('utc')}" if number else None
+
+    if not key or scheduled is None:
+        return None
+    return str(key), scheduled
+
+
+def _merge_ranges(ranges: list[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
+    merged: list[tuple[datetime, datetime]] = []
+    for start, end in sorted(ranges):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def plan_fetch_slices(
+    start: datetime,
+    end: datetime,
+    covered: list[tuple[datetime, datetime]],
+    *,
+    head_refresh_minutes: float,
+) -> list[tuple[datetime, datetime]]:
+    """Ranges of ``[start, end)`` to request: everything not covered plus the head refresh."""
+    gaps: list[tuple[datetime, datetime]] = []
+    cursor = start
+    for covered_start, covered_end in _merge_ranges(covered):
+        if covered_end <= cursor or covered_start >= end:
+            continue
+        if covered_start > cursor:
+            gaps.append((cursor, min(covered_start, end)))
+        cursor = max(cursor, covered_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+
+    if head_refresh_minutes > 0:
+        gaps.append((start, min(end, start + timedelta(minutes=head_refresh_minutes))))
+    return _merge_ranges(gaps)
+
+
+def _covered_ranges(
+    conn: sqlite3.Connection,
+    source: tuple[str, str, str],
+    fresh_after: datetime,
+) -> list[tuple[datetime, datetime]]:
+    rows = conn.execute(
+        """
+        SELECT window_start, window_end
+        FROM fetch_windows
+        WHERE airport_icao = ? AND movement = ? AND provider = ? AND fetched_at >= ?
+        """,
+        (*source, fresh_after.isoformat()),
+    ).fetchall()
+    return [(_parse_window_time(row[0]), _parse_window_time(row[1])) for row in rows]
+
+
+def _upsert_flights(
+    conn: sqlite3.Connection,
+    source: tuple[str, str, str],
+    flights: list[dict[str, Any]],
+    fetched_at: datetime,
+) -> list[str]:
+    rows = []
+    for flight in flights:
+        identity = flight_identity(source[2], source[1], flight, source[0])
+        if identity is None:
+            continue
+        flight_key, scheduled = identity
+        rows.append(
+            (
+                *source,
+                flight_key,
+                scheduled.isoformat(timespec="minutes"),
+                json.dumps(flight, separators=(",", ":")),
+                fetched_at.isoformat(),
+            )
+        )
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO flight_cache VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+    return [row[3] for row in rows]
+
+
+def _complete_slice(
+    conn: sqlite3.Connection,
+    source: tuple[str, str, str],
+    slice_range: tuple[datetime, datetime],
+    fetched_keys: set[str],
+    fetched_at: datetime,
+) -> None:
+    slice_start, slice_end = slice_range
+    with conn:
+        # Flights that disappeared from the slice (cancelled, retimed away) are dropped.
+        conn.execute(
+            """
+            DELETE FROM flight_cache
+            WHERE airport_icao = ? AND movement = ? AND provider = ?
+              AND scheduled_at >= ? AND scheduled_at < ?
+              AND flight_key NOT IN (SELECT value FROM json_each(?))
+            """,
+            (
+                *source,
+                slice_start.isoformat(timespec="minutes"),
+                slice_end.isoformat(timespec="minutes"),
+                json.dumps(sorted(fetched_keys)),
+            ),
+        )
+        conn.execute(
+            "INSERT INTO fetch_windows VALUES (?, ?, ?, ?, ?, ?)",
+            (*source, _format_window_time(slice_start), _format_window_time(slice_end), fetched_at.isoformat()),
+        )
+
+
+def _flights_outside(
+    conn: sqlite3.Connection,
+    source: tuple[str, str, str],
+    start: datetime,
+    end: datetime,
+    excluded: list[tuple[datetime, datetime]],
+    excluded_keys: set[str] | None = None,
+) -> list[dict[str, Any]]:
+    """Cached flights in ``[start, end]`` outside every ``excluded`` range (and not in ``excluded_keys``)."""
+    rows = conn.execute(
+        """
+        SELECT flight_key, scheduled_at, payload_json
+        FROM flight_cache
+        WHERE airport_icao = ? AND movement = ? AND provider = ?
+          AND scheduled_at >= ? AND scheduled_at <= ?
+        ORDER BY scheduled_at, flight_key
+        """,
+        (*source, start.isoformat(timespec="minutes"), end.isoformat(timespec="minutes")),
+    ).fetchall()
+    flights = []
+    for flight_key, scheduled_at, payload_json in rows:
+        scheduled = datetime.fromisoformat(scheduled_at)
+        if any(range_start <= scheduled < range_end for range_start, range_end in excluded):
+            continue
+        if excluded_keys and flight_key in excluded_keys:
+            continue
+        flights.append(json.loads(payload_json))
+    return flights
+
+
+def _prune(conn: sqlite3.Connection, now: datetime, retention_hours: float) -> None:
+    cutoff = now - timedelta(hours=retention_hours)
+    with conn:
+        conn.execute("DELETE FROM fetch_windows WHERE fetched_at < ?", (cutoff.isoformat(),))
+        conn.execute("DELETE FROM flight_cache WHERE scheduled_at < ?", (cutoff.isoformat(timespec="minutes"),))
+
+
+def plan_for_source(
+    source: tuple[str, str, str],
+    start: datetime,
+    end: datetime,
+    *,
+    now: datetime | None = None,
+    config: dict[str, Any] | None = None,
+) -> list[tuple[datetime, datetime]]:
+    config = config or load_delta_polling_config()
+    current = now or clock.now()
+    with _DB_LOCK:
+        conn = _get_connection(_resolve_db_path(config["db_path"]))
+        covered = _covered_ranges(conn, source, current - timedelta(minutes=config["max_window_age_minutes"]))
+    return plan_fetch_slices(start, end, covered, head_refresh_minutes=config["head_refresh_minutes"])
+
+
+async def stream_window(
+    *,
+    airport_icao: str,
+    movement: str,
+    provider: str,
+    start_time: str,
+    end_time: str,
+    iter_slice: Callable[[str, str, Callable[[], None]], AsyncIterator[list[dict[str, Any]]]],
+    now: datetime | None = None,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Yield every flight of ``[start_time, end_time]``: cached ones first, then fetched pages as they arrive.
+
+    Each fetched page is written to the cache before it is yielded.
+    ``iter_slice(start, end, complete)`` must call ``complete()`` once it has
+    fetched the whole slice; only then does the slice count as covered. A
+    slice that raises, or ends without calling ``complete()``, has failed:
+    its cached flights that were not refreshed are yielded instead. Raises
+    ``RuntimeError`` when every slice failed and nothing was cached.
+    """
+    config = load_delta_polling_config()
+    source = (airport_icao.upper(), movement, provider)
+    start = _parse_window_time(start_time)
+    end = _parse_window_time(end_time)
+    current = now or clock.now()
+    db_path = _resolve_db_path(config["db_path"])
+
+    def on_db(operation: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+        def run() -> Any:
+            with _DB_LOCK:
+                return operation(_get_connection(db_path), source, *args)
+
+        return asyncio.to_thread(run)
+
+    slices = await asyncio.to_thread(plan_for_source, source, start, end, now=current, config=config)
+    logger.info(
+        f"{provider} {movement}: fetching {len(slices)} slice(s) "
+        + ", ".join(f"{_format_window_time(a)}..{_format_window_time(b)}" for a, b in slices)
+    )
+
+    cached = await on_db(_flights_outside, start, end, slices)
+    if cached:
+        yield cached
+    yielded = bool(cached)
+
+    failed = 0
+    for slice_start, slice_end in slices:
+        fetched_keys: set[str] = set()
+        completed: list[bool] = []
+        try:
+            async for batch in iter_slice(
+                _format_window_time(slice_start),
+                _format_window_time(slice_end),
+                lambda: completed.append(True),
+            ):
+                fetched_keys.update(await on_db(_upsert_flights, batch, current))
+                yielded = yielded or bool(batch)
+                yield batch
+            # Ending quietly is not success: pruning on a short read would drop the cached flights.
+            if not completed:
+                raise RuntimeError("ended without reporting completion")
+        except Exception as exc:
+            failed += 1
+            logger.warning(f"{provider} {movement}: slice {_format_window_time(slice_start)} failed ({exc})")
+            stale = await on_db(_flights_outside, slice_start, slice_end, [], fetched_keys)
+            if stale:
+                yielded = True
+                yield stale
+            continue
+        await on_db(_complete_slice, (slice_start, slice_end), fetched_keys, current)
+
+    await on_db(lambda conn, _source: _prune(conn, current, config["cache_retention_hours"]))
+    if failed:
+        if failed == len(slices) and not yielded:
+            raise RuntimeError(f"{provider} {movement}: every slice failed and nothing is cached")
+        logger.warning(f"{provider} {movement}: {failed}/{len(slices)} slice(s) failed, using cached flights")
+
@@ -0,0 +1,168 @@
+"""Split a fetch window into sub-windows and fetch them concurrently.
+
+Both handlers use this so a long window at a busy hub becomes several short
+requests in flight at once (AeroAPI shards still share the per-key token
+bucket) instead of one truncated request or a serial page chain. Streaming
+callers get each page as soon as any shard produces it; the collecting
+wrappers deduplicate by flight identity and return scheduled order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, TypeVar
+
+import config.config as cfg
+from api.window_ledger import flight_identity
+
+
+_TIME_FORMAT = "%Y-%m-%dT%H:%M"
+
+T = TypeVar("T")
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_sharding_config(provider: str) -> dict[str, Any]:
+    """Return shard settings for ``provider``; ``api.sharding.providers.<provider>`` overrides the shared values."""
+    raw = cfg.get_config("api.sharding") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+    providers = raw.get("providers") if isinstance(raw.get("providers"), dict) else {}
+    override = providers.get(provider) if isinstance(providers.get(provider), dict) else {}
+    merged = {**raw, **override}
+
+    return {
+        "shard_minutes": max(15.0, _as_float(merged.get("shard_minutes"), 180.0)),
+        "max_parallel_shards": max(1, _as_int(merged.get("max_parallel_shards"), 4)),
+    }
+
+
+def split_window(start_time: str, end_time: str, shard_minutes: float) -> list[tuple[str, str]]:
+    """Consecutive ``(start, end)`` sub-windows of at most ``shard_minutes`` covering the window."""
+    start = datetime.strptime(start_time[:16], _TIME_FORMAT)
+    end = datetime.strptime(end_time[:16], _TIME_FORMAT)
+    if end <= start:
+        return [(start_time, end_time)]
+
+    step = timedelta(minutes=shard_minutes)
+    shards: list[tuple[str, str]] = []
+    cursor = start
+    while cursor < end:
+        shard_end = min(end, cursor + step)
+        shards.append((cursor.strftime(_TIME_FORMAT), shard_end.strftime(_TIME_FORMAT)))
+        cursor = shard_end
+    return shards
+
+
+async def iter_shard_batches(
+    shards: list[tuple[str, str]],
+    iter_shard: Callable[[str, str], AsyncIterator[T]],
+    max_parallel: int,
+) -> AsyncIterator[T]:
+    """Run ``iter_shard`` for every shard, at most ``max_parallel`` at a time, and yield batches as they arrive.
+
+    At most ``max_parallel`` batches are buffered, so a slow consumer holds the
+    producers back instead of the whole window piling up in memory. A failing
+    shard cancels the others and the error is raised to the consumer.
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+    batches: asyncio.Queue[T] = asyncio.Queue(maxsize=max_parallel)
+
+    async def run(shard_start: str, shard_end: str) -> None:
+        async with semaphore:
+            async for batch in iter_shard(shard_start, shard_end):
+                await batches.put(batch)
+
+    async def run_all() -> None:
+        tasks = [asyncio.create_task(run(shard_start, shard_end)) for shard_start, shard_end in shards]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    producer = asyncio.create_task(run_all())
+    getter: asyncio.Future[T] | None = None
+    try:
+        while True:
+            getter = asyncio.ensure_future(batches.get())
+            await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+                continue
+            getter.cancel()
+            while not batches.empty():
+                yield batches.get_nowait()
+            producer.result()
+            return
+    finally:
+        if getter is not None and not getter.done():
+            getter.cancel()
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+
+def dedupe_batch(
+    provider: str,
+    movement: str,
+    batch: list[dict[str, Any]],
+    seen: set[str],
+) -> list[dict[str, Any]]:
+    """Drop flights of ``batch`` whose identity is already in ``seen`` (and record the new ones)."""
+    fresh: list[dict[str, Any]] = []
+    for flight in batch:
+        identity = flight_identity(provider, movement, flight)
+        if identity is not None:
+            if identity[0] in seen:
+                continue
+            seen.add(identity[0])
+        fresh.append(flight)
+    return fresh
+
+
+def merge_shard_flights(
+    provider: str,
+    movement: str,
+    batches: list[list[dict[str, Any]]],
+    airport_icao: str | None = None,
+) -> list[dict[str, Any]]:
+    """Concatenate shard batches, drop repeats of the same flight and sort by scheduled time.
+
+    Shards overlap at their boundaries, so a flight scheduled exactly on one
+    can come back twice. Flights without a usable identity are kept as-is,
+    after the dated ones.
+    """
+    seen: set[str] = set()
+    dated: list[tuple[datetime, int, dict[str, Any]]] = []
+    undated: list[dict[str, Any]] = []
+    for batch in batches:
+        for flight in batch:
+            identity = flight_identity(provider, movement, flight, airport_icao)
+            if identity is None:
+                undated.append(flight)
+                continue
+            flight_key, scheduled = identity
+            if flight_key in seen:
+                continue
+            seen.add(flight_key)
+            dated.append((scheduled, len(dated), flight))
+
+    dated.sort(key=lambda item: (item[0], item[1]))
+    return [flight for _scheduled, _order, flight in dated] + undated
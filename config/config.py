@@ -1,4 +1,6 @@
+import copy
 import os
+import threading
 import yaml
 from pathlib import Path
 from typing import Any
@@ -24,6 +26,68 @@ DEFAULT_CONFIG = {
         'aeroapi': {
             'monthly_budget_per_key_usd': 5.0,
             'usage_cache_ttl_seconds': 600,
+            'cost_ledger': {
+                'enabled': True,
+                'db_path': 'database/aeroapi_cost_ledger.db',
+                'default_page_cost_usd': 0.005,
+                'endpoint_costs_usd': {
+                    'GET /aeroapi/airports/{id}/flights/scheduled_arrivals': 0.005,
+                    'GET /aeroapi/airports/{id}/flights/scheduled_departures': 0.005,
+                },
+                'reconcile_interval_minutes': 60,
+                'drift_warning_pct': 10.0,
+            },
+            'scheduler': {
+                'rate_limit_window_minutes': 15,
+                'rate_limit_penalty': 0.25,
+                'min_burn_days': 1.0,
+            },
+            'rate_limit': {
+                'requests_per_minute': 10,
+                'burst': 10,
+                'min_requests_per_minute': 1,
+                'backoff_factor': 0.5,
+                'recovery_per_success': 1,
+                'default_retry_after_seconds': 20,
+            },
+        },
+        'aerodatabox': {
+            'request_timeout_seconds': 20,
+            'connect_timeout_seconds': 5,
+            'max_attempts': 4,
+            'backoff_base_seconds': 2.0,
+            'max_backoff_seconds': 30.0,
+            'default_retry_after_seconds': 10.0,
+            'window_deadline_seconds': 90,
+        },
+        'ingestion': {
+            'max_concurrency': 4,
+            'min_start_interval_seconds': 0.0,
+        },
+        'sharding': {
+            'shard_minutes': 180,
+            'max_parallel_shards': 4,
+            'providers': {
+                'aerodatabox': {'shard_minutes': 360},
+            },
+        },
+        'raw_archive': {
+            'enabled': True,
+            'dir': 'api/data/archive',
+            'compression_level': 6,
+            'replay_cycle': None,
+        },
+        'delta_polling': {
+            'enabled': True,
+            'db_path': 'database/flight_window_cache.db',
+            'head_refresh_minutes': 0,
+            'max_window_age_minutes': 240,
+            'cache_retention_hours': 24,
+        },
+        'merge': {
+            'source_precedence': ['aerodatabox', 'aeroapi'],
+            'field_precedence': {},
+            'registration_bucket_minutes': 30,
         },
     },
     'database': {
@@ -50,9 +114,58 @@ DEFAULT_CONFIG = {
     'execution': {
         'interval': (2 * 60 * 60) - 600  # 2 hours minus 10 minutes
     },
+    'metrics': {
+        'enabled': False,
+        'host': '127.0.0.1',
+        'port': 9108,
+    },
+    'http_client': {
+        'limit': 32,
+        'limit_per_host': 8,
+        'dns_cache_ttl_seconds': 300,
+        'keepalive_timeout_seconds': 60,
+        'total_timeout_seconds': 60,
+        'connect_timeout_seconds': 10,
+        'clients': {
+            'supabase': {'limit_per_host': 16},
+        },
+    },
+    'cycle_ledger': {
+        'enabled': True,
+        'recent_cycles': 5,
+        'baseline_cycles': 20,
+        'regression_threshold_pct': 25.0,
+        'min_phase_seconds': 0.05,
+    },
+    'tracing': {
+        'enabled': True,
+        'sample_rate': 1.0,
+        'file': 'logs/traces.jsonl',
+        'max_bytes': 10485760,
+        'backup_count': 5,
+    },
+    'circuit_breakers': {
+        'enabled': True,
+        'window_seconds': 120,
+        'min_calls': 5,
+        'failure_rate_threshold': 0.5,
+        'open_seconds': 60,
+        'half_open_probes': 1,
+        'providers': {},
+    },
     'usage_monitoring': {
         'enabled': True,
         'db_path': 'database/usage_metrics.db',
+        'writer': {
+            'batch_size': 50,
+            'flush_interval_seconds': 2.0,
+        },
+        'retention': {
+            'enabled': True,
+            'raw_event_days': 30,
+            'compaction_interval_hours': 24,
+            'incremental_vacuum_pages': 0,
+        },
         'x': {
             'enforce_budget': True,
             'monthly_budget_usd': 10.0,
@@ -118,26 +231,77 @@ def _coerce_value(value: Any) -> Any:
     except ValueError:
         return value
 
-def load_config():
-    """Load configuration from YAML file"""
+def _file_signature() -> tuple[Any, ...] | None:
+    try:
+        stat = CONFIG_PATH.stat()
+    except FileNotFoundError:
+        return None
+    env_values = tuple(os.getenv(env_key) for env_key in ENV_OVERRIDES)
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size, env_values)
+
+
+def _build_config() -> dict[str, Any]:
+    """Read config.yaml from disk and merge it over the defaults."""
     if not CONFIG_PATH.exists():
         save_config(DEFAULT_CONFIG)
-        return _apply_env_overrides(dict(DEFAULT_CONFIG))
+        return _apply_env_overrides(copy.deepcopy(DEFAULT_CONFIG))
 
     with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
         loaded = yaml.safe_load(f)
 
     if not isinstance(loaded, dict):
         save_config(DEFAULT_CONFIG)
-        return _apply_env_overrides(dict(DEFAULT_CONFIG))
+        return _apply_env_overrides(copy.deepcopy(DEFAULT_CONFIG))
 
-    merged = _deep_merge(DEFAULT_CONFIG, loaded)
+    merged = _deep_merge(copy.deepcopy(DEFAULT_CONFIG), loaded)
     return _apply_env_overrides(merged)
 
+
+_SNAPSHOT_LOCK = threading.RLock()
+_snapshot: dict[str, Any] | None = None
+_snapshot_signature: tuple[Any, ...] | None = None
+
+
+def _get_snapshot() -> dict[str, Any]:
+    """Return the parsed config, re-reading the file only when it changed on disk.
+
+    The returned dict is shared; callers must copy before mutating it.
+    """
+    global _snapshot, _snapshot_signature
+
+    signature = _file_signature()
+    snapshot = _snapshot
+    if snapshot is not None and signature is not None and signature == _snapshot_signature:
+        return snapshot
+
+    with _SNAPSHOT_LOCK:
+        if _snapshot is not None and signature is not None and signature == _snapshot_signature:
+            return _snapshot
+        built = _build_config()
+        _snapshot = built
+        # Keep the pre-read signature so an edit racing the read is picked up
+        # next time; stat again only when _build_config had to create the file.
+        _snapshot_signature = signature if signature is not None else _file_signature()
+        return built
+
+
+def invalidate_config_cache() -> None:
+    """Drop the in-memory snapshot so the next read goes back to config.yaml."""
+    global _snapshot, _snapshot_signature
+    with _SNAPSHOT_LOCK:
+        _snapshot = None
+        _snapshot_signature = None
+
+
+def load_config():
+    """Load configuration from YAML file"""
+    return copy.deepcopy(_get_snapshot())
+
 def save_config(config):
     """Save configuration to YAML file"""
     with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
         yaml.safe_dump(config, f, sort_keys=False)
+    invalidate_config_cache()
 
 def update_config(key, value):
     """Update a specific configuration value"""
@@ -155,15 +319,16 @@ def update_config(key, value):
 
 def get_config(key):
     """Get a specific configuration value"""
-    config = load_config()
+    current = _get_snapshot()
     keys = key.split('.')
-    current = config
-    
+
     for k in keys:
-        if k not in current:
+        if not isinstance(current, dict) or k not in current:
             return None
         current = current[k]
-    
+
+    if isinstance(current, (dict, list)):
+        return copy.deepcopy(current)
     return current
 
 # Load initial configuration
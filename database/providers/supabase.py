@@ -11,7 +11,10 @@ import aiohttp
 from dotenv import load_dotenv
 from loguru import logger
 
-from monitoring.api_usage import record_api_event
+from monitoring.api_usage import enforce_circuit_or_raise, record_api_event
+from monitoring.circuit_breaker import get_breaker
+from utils.http_client import http_session
+from utils.timestamps import parse_timestamp
 
 from .base import DatabaseProvider
 
@@ -29,20 +32,7 @@ def _normalize_code(value: Any) -> str | None:
 
 
 def _to_iso_datetime(value: Any) -> str:
-    if isinstance(value, datetime):
-        dt = value
-    elif isinstance(value, str):
-        for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S"):
-            try:
-                dt = datetime.strptime(value, fmt)
-                break
-            except ValueError:
-                dt = datetime.now(timezone.utc)
-        else:
-            dt = datetime.now(timezone.utc)
-    else:
-        dt = datetime.now(timezone.utc)
-
+    dt = parse_timestamp(value) or datetime.now(timezone.utc)
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
     return dt.isoformat()
@@ -125,16 +115,19 @@ class SupabaseProvider(DatabaseProvider):
 
         status_code: int | None = None
         recorded = False
+        breaker = get_breaker("supabase")
+        enforce_circuit_or_raise("supabase", endpoint, method.upper())
         started = time.perf_counter()
 
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with http_session("supabase") as session:
                 async with session.request(
                     method.upper(),
                     url,
                     headers=self._headers(prefer=prefer),
                     params=params,
                     json=payload,
+                    timeout=timeout,
                 ) as response:
                     status_code = response.status
                     raw_body = await response.text()
@@ -160,6 +153,10 @@ class SupabaseProvider(DatabaseProvider):
                         error=None if success else str(body),
                     )
                     recorded = True
+                    if status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
 
                     if not success:
                         raise RuntimeError(f"Supabase request failed ({status_code}): {body}")
@@ -167,6 +164,7 @@ class SupabaseProvider(DatabaseProvider):
                     return body
         except Exception as exc:
             if not recorded:
+                breaker.record_failure()
                 duration_ms = (time.perf_counter() - started) * 1000.0
                 record_api_event(
                     provider="supabase",
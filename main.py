@@ -1,6 +1,6 @@
 import asyncio
-import json
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
 import sys
 from pathlib import Path
 
@@ -8,12 +8,22 @@ import config.config as cfg
 import socials.socials_processing as sp
 import socials.telegram as tg
 import utils.data_processing as dp
-from api.aeroapi_key_manager import get_aeroapi_usage_snapshot
-from api import api_handler_aeroapi, api_handler_aerodatabox
+from api.aeroapi_key_manager import get_aeroapi_usage_snapshot, start_usage_reconciler, stop_usage_reconciler
+from api import ingestion
 from database import get_database_provider
 from dotenv import load_dotenv
 from loguru import logger
-from monitoring.api_usage import log_monthly_usage_summary
+from monitoring.api_usage import log_monthly_usage_summary, shutdown_usage_sink
+from monitoring.cycle_ledger import cycle_phase, start_cycle
+from monitoring.metrics import record_cycle_metrics, start_metrics_server, stop_metrics_server
+from monitoring.retention import run_usage_retention
+from monitoring.tracing import span, start_trace
+from utils import clock
+from utils.flight import Flight
+from utils.flight_batch import normalize_page
+from utils.flight_merge import FlightMergeEngine
+from utils.model_matcher import ModelMatcher
+from utils.http_client import close_http_clients, open_http_clients
 
 # Add project root to Python path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -36,6 +46,12 @@ all_flights = {}
 
 # loads the flight information from the api
 async def main(all_flights):
+    with start_trace("cycle"), start_cycle() as stats:
+        await _run_cycle(all_flights, stats)
+
+
+async def _run_cycle(all_flights, stats):
+    cycle_started = time.perf_counter()
     database_provider = get_database_provider()
     airport_icao = (
         cfg.get_config("api.airport_icao")
@@ -43,121 +59,145 @@ async def main(all_flights):
         or "LEMD"
     )
     airport_icao = str(airport_icao).upper()
+    stats.airport_icao = airport_icao
     preloaded_data = bool(cfg.get_config("api.preloaded_data"))
     time_range_hours = int(cfg.get_config("api.time_range_hours") or 2)
 
-    now = datetime.now()
+    now = clock.now()
     start_time = now.strftime("%Y-%m-%dT%H:%M")
     end_time = (now + timedelta(hours=time_range_hours)).strftime("%Y-%m-%dT%H:%M")
 
-    for movement in ['arrivals', 'departures']:
-        # fetch the data from the api
-
-        if preloaded_data:
-            logger.info("Loading data from preloaded files")
-            airport_prefix = airport_icao.lower()
-            aeroapi_candidates = [
-                f"api/data/{airport_prefix}_aeroapi_data_scheduled_{movement}.json",
-                f"api/data/aeroapi_data_scheduled_{movement}.json",
-            ]
-            try:
-                temp_aeroapi_data = None
-                for aeroapi_file in aeroapi_candidates:
-                    try:
-                        with open(aeroapi_file, "r", encoding="utf-8") as f:
-                            temp_aeroapi_data = json.load(f)
-                            logger.info(f"Loaded aeroapi data from {aeroapi_file}")
-                            break
-                    except FileNotFoundError:
-                        continue
-                if temp_aeroapi_data is None:
-                    raise FileNotFoundError("No preloaded aeroapi file found")
-            except Exception:
-                logger.info("Preloaded files not found")
-                break
-            # Check if aerodatabox data file exists
-            adb_candidates = [
-                f"api/data/{airport_prefix}_adb_data_{movement}.json",
-                f"api/data/adb_data_{movement}.json",
-            ]
-            try:
-                temp_adb_data = None
-                for adb_file in adb_candidates:
-                    try:
-                        with open(adb_file, "r", encoding="utf-8") as f:
-                            temp_adb_data = json.load(f)
-                            logger.info(f"Loaded aerodatabox data from {adb_file}")
-                            break
-                    except FileNotFoundError:
-                        continue
-                if temp_adb_data is None:
-                    raise FileNotFoundError("No preloaded aerodatabox file found")
-            except Exception:
-                logger.info("Preloaded files not found")
+    if not preloaded_data:
+        logger.info(f"Fetching data from API between {start_time} and {end_time}")
+    else:
+        logger.info("Loading data from preloaded files")
+
+    # The indexes do not depend on the fetched flights; load them while pages download.
+    indexes_task = asyncio.create_task(_load_indexes(database_provider, airport_icao))
+
+    # Fetch all movement/provider pairs at once and normalize every page as it
+    # arrives. Field conflicts are settled by the merge engine's source
+    # precedence; merges still follow source_order() (later sources wait,
+    # already normalized, until every source before them has finished) so
+    # its first-seen tie-break does not depend on which provider answered first.
+    merge_order = ingestion.source_order()
+    merge_engine = FlightMergeEngine()
+    pending: dict[tuple[str, str], list[Flight]] = {source: [] for source in merge_order}
+    finished: set[tuple[str, str]] = set()
+    next_merge = 0
+    batches = ingestion.iter_source_batches(
+        airport_icao=airport_icao,
+        start_time=start_time,
+        end_time=end_time,
+        preloaded=preloaded_data,
+    )
+    try:
+        while True:
+            with cycle_phase("fetch"):
+                batch = await anext(batches, None)
+            if batch is None:
                 break
-        else:
-            logger.info(f"Fetching data from API between {start_time} and {end_time}")
-            temp_aeroapi_data = await api_handler_aeroapi.fetch_aeroapi_scheduled(
-                movement,
-                start_time,
-                end_time,
-                airport_icao=airport_icao,
-            )
-            temp_adb_data = await api_handler_aerodatabox.fetch_adb_data(
-                movement,
-                start_time,
-                end_time,
-                airport_icao=airport_icao,
-            )
 
-        # iterate over every flight and merge sources
-        logger.info(f"Processing ADB data for {movement}")
-        logger.info(f"Vuelos {len(temp_adb_data.get(movement, []))}")
-
-        for flight in temp_adb_data.get(movement, []):
-            try:
-                processed_data = dp.process_flight_data_adb(flight, movement)
-                flight_name = processed_data.get("flight_name_iata", processed_data.get("flight_name", None))
-                logger.debug(f"Parsed {movement} flight {flight_name}")
-            except Exception as e:
-                logger.error(f"Error procesando vuelo {e}")
-                continue
-
-            dp.check_existing(all_flights, processed_data)
-
-        logger.info(f"Total vuelos {len(all_flights)}")
-
-        logger.info(f"Processing AeroAPI data for {movement}")
-        scheduled_key = f"scheduled_{movement}"
-        logger.info(f"Vuelos {len(temp_aeroapi_data.get(scheduled_key, []))}")
-        for flight in temp_aeroapi_data.get(scheduled_key, []):
-            try:
-                processed_data = dp.process_flight_data_aeroapi(flight)
-                if not processed_data:
-                    continue
-                flight_name = processed_data.get("flight_name_iata", processed_data.get("flight_name", None))
-                logger.debug(f"Parsed {movement} flight {flight_name}", color="yellow")
-            except Exception as e:
-                logger.error(f"Error procesando vuelo {e}")
-                continue
-
-            dp.check_existing(all_flights, processed_data)
-
-        logger.info(f"Total vuelos {len(all_flights)}")
+            source = (batch.movement, batch.provider)
+            if batch.final:
+                if not batch.ok:
+                    logger.warning(f"Skipping {batch.provider} {batch.movement}: {batch.error}")
+                finished.add(source)
+            else:
+                stats.add_flights(batch.provider, len(batch.flights))
+                pending[source].extend(_normalize_batch(batch))
+
+            while next_merge < len(merge_order):
+                movement, provider = merge_order[next_merge]
+                if pending[(movement, provider)]:
+                    with span(f"merge.{provider}", movement=movement), cycle_phase("merge"):
+                        for processed_data in pending[(movement, provider)]:
+                            merge_engine.add(processed_data, provider)
+                    pending[(movement, provider)] = []
+                if (movement, provider) not in finished:
+                    break
+                next_merge += 1
+                logger.info(f"Total vuelos {len(merge_engine)}")
+    except BaseException:
+        indexes_task.cancel()
+        raise
+
+    all_flights.update(merge_engine.flights())
+    stats.merge_stats = merge_engine.stats()
+    logger.info(f"Merge: {stats.merge_stats}")
 
     if not preloaded_data:
+        # Read from the local cost ledger; /account/usage is only polled by the background reconciler.
         try:
-            usage_snapshots = await get_aeroapi_usage_snapshot(force_refresh=False)
+            with span("aeroapi.usage_snapshot"):
+                usage_snapshots = await get_aeroapi_usage_snapshot(force_refresh=False)
             logger.info(f"AeroAPI usage snapshot: {usage_snapshots}")
         except Exception as exc:
-            logger.warning(f"Unable to fetch AeroAPI usage snapshot: {exc}")
+            logger.warning(f"Unable to read AeroAPI usage snapshot: {exc}")
 
-    reg_db_copy = await database_provider.get_registrations_index(airport_icao)
-    interesting_reg_db = await database_provider.get_interesting_registrations_index(airport_icao)
-    model_db_copy = await database_provider.get_interesting_models_index(airport_icao)
+    with cycle_phase("index_load"):
+        reg_db_copy, interesting_reg_db, model_db_copy = await indexes_task
 
+    interesting_count = 0
     for flight_key, raw_flight_data in all_flights.items():
-        logger.debug(f"Processing flight {flight_key} in configured database provider")
+        with span("flight", **{"flight.key": str(flight_key)}):
+            interesting_count += await _process_flight(
+                flight_key,
+                raw_flight_data,
+                reg_db_copy,
+                interesting_reg_db,
+                model_db_copy,
+                database_provider,
+                airport_icao,
+            )
+
+    stats.flights_merged = len(all_flights)
+    stats.interesting_count = interesting_count
+    with span("usage.maintenance"):
+        log_monthly_usage_summary()
+        await asyncio.to_thread(run_usage_retention)
+    record_cycle_metrics(
+        time.perf_counter() - cycle_started,
+        {"processed": len(all_flights), "interesting": interesting_count},
+    )
+    all_flights.clear()
+
+
+async def _load_indexes(database_provider, airport_icao):
+    with span("index.registrations"):
+        reg_db_copy = await database_provider.get_registrations_index(airport_icao)
+    with span("index.interesting_registrations"):
+        interesting_reg_db = await database_provider.get_interesting_registrations_index(airport_icao)
+    with span("index.interesting_models"):
+        model_db_copy = ModelMatcher(await database_provider.get_interesting_models_index(airport_icao))
+    return reg_db_copy, interesting_reg_db, model_db_copy
+
+
+def _normalize_batch(batch: ingestion.SourceBatch) -> list[Flight]:
+    movement = batch.movement
+    logger.info(f"Processing {len(batch.flights)} {batch.provider} {movement} flights")
+
+    with span(f"normalize.{batch.provider}", movement=movement) as phase, cycle_phase("normalize"):
+        normalized = normalize_page(batch.provider, movement, batch.flights)
+        if normalized.skipped:
+            logger.error(f"Skipped {normalized.skipped} malformed {batch.provider} {movement} flight(s)")
+        processed_flights = normalized.dedupe().records()
+        if phase:
+            phase.set_attribute("flights", len(processed_flights))
+    return processed_flights
+
+
+async def _process_flight(
+    flight_key,
+    raw_flight_data,
+    reg_db_copy,
+    interesting_reg_db,
+    model_db_copy,
+    database_provider,
+    airport_icao,
+) -> int:
+    logger.debug(f"Processing flight {flight_key} in configured database provider")
+    with span("check_flight"), cycle_phase("enrichment"):
         flight_data, interesting_registration, interesting_model, first_seen = await dp.check_flight(
             raw_flight_data,
             reg_db_copy,
@@ -167,37 +207,44 @@ async def main(all_flights):
             airport_icao=airport_icao,
         )
 
+    with span("record_flight_history"), cycle_phase("enrichment"):
         await database_provider.record_flight_history(flight_data, airport_icao=airport_icao)
 
-        interesting = {
-            "MODEL": interesting_model,
-            "REGISTRATION": interesting_registration,
-            "FIRST_SEEN": first_seen,
-            "DIVERTED": False if flight_data.get("diverted") == "null" else bool(flight_data.get("diverted")),
-        }
-
-        if any(interesting.values()):
-            logger.level("INFO", color="<red>")
-            logger.info(
-                f"Flight {flight_data['flight_name'] if flight_data['flight_name'] not in [None, 'null'] else flight_data['flight_name_iata']} "
-                f"is interesting - generating socials message because of {interesting}"
-            )
-            logger.level("INFO", color="<white>")
-            logger.debug(flight_data)
-            await sp.call_socials(flight_data, interesting)
+    interesting = {
+        "MODEL": interesting_model,
+        "REGISTRATION": interesting_registration,
+        "FIRST_SEEN": first_seen,
+        "DIVERTED": bool(flight_data.get("diverted")),
+    }
 
-    log_monthly_usage_summary()
-    all_flights.clear()
+    if not any(interesting.values()):
+        return 0
+
+    logger.level("INFO", color="<red>")
+    logger.info(
+        f"Flight {flight_data['flight_name'] or flight_data['flight_name_iata']} "
+        f"is interesting - generating socials message because of {interesting}"
+    )
+    logger.level("INFO", color="<white>")
+    logger.debug(flight_data)
+    with span("socials"), cycle_phase("socials"):
+        await sp.call_socials(flight_data, interesting)
+    return 1
 
 
 async def run_periodically():
     interval_seconds = int(cfg.get_config("execution.interval") or ((2 * 60 * 60) - 600))
 
+    metrics_runner = None
+    usage_reconciler = None
     try:
+        await open_http_clients()
+        metrics_runner = await start_metrics_server()
+        usage_reconciler = start_usage_reconciler()
         await tg.ensure_command_listener()
         while True:
             await main(all_flights)
-            next_round = datetime.now() + timedelta(seconds=interval_seconds)
+            next_round = clock.now() + timedelta(seconds=interval_seconds)
             logger.info("Next round at " + next_round.strftime("%Y-%m-%d %H:%M"))
             await asyncio.sleep(interval_seconds)
     except asyncio.CancelledError:
@@ -205,6 +252,10 @@ async def run_periodically():
         raise
     finally:
         await tg.shutdown_command_listener()
+        await stop_usage_reconciler(usage_reconciler)
+        await stop_metrics_server(metrics_runner)
+        await close_http_clients()
+        shutdown_usage_sink()
 
 
 if __name__ == "__main__":
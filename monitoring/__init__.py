@@ -3,11 +3,14 @@ from .api_usage import (
     XBudgetExceededError,
     check_budget,
     enforce_budget_or_raise,
+    flush_usage_events,
     get_endpoint_cost,
+    get_latency_percentiles,
     get_monthly_cost,
     get_monthly_usage_summary,
     log_monthly_usage_summary,
     record_api_event,
+    shutdown_usage_sink,
 )
 
 __all__ = [
@@ -15,9 +18,12 @@ __all__ = [
     "XBudgetExceededError",
     "check_budget",
     "enforce_budget_or_raise",
+    "flush_usage_events",
     "get_endpoint_cost",
+    "get_latency_percentiles",
     "get_monthly_cost",
     "get_monthly_usage_summary",
     "log_monthly_usage_summary",
     "record_api_event",
+    "shutdown_usage_sink",
 ]
@@ -1,16 +1,28 @@
 from __future__ import annotations
 
+import atexit
 import json
 import sqlite3
 import threading
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
 from loguru import logger
 
 import config.config as cfg
+from monitoring.latency import (
+    LATENCY_BUCKET_COUNT,
+    LATENCY_HISTOGRAMS,
+    empty_latency_buckets,
+    latency_bucket_index,
+    status_class,
+    summarize_buckets,
+)
+from monitoring.circuit_breaker import CircuitOpenError, breaker_states, get_breaker
+from monitoring.metrics import METRICS
+from monitoring.tracing import record_completed_span
 
 
 @dataclass(frozen=True)
@@ -29,18 +41,31 @@ class XBudgetExceededError(RuntimeError):
     pass
 
 
-_DB_LOCK = threading.Lock()
+_DB_LOCK = threading.RLock()
+_SINK_LOCK = threading.Lock()
+_DEFAULT_WRITER_BATCH_SIZE = 50
+_DEFAULT_WRITER_FLUSH_INTERVAL_SECONDS = 2.0
+_LATENCY_BUCKET_COLUMNS = tuple(f"bucket_{index:02d}" for index in range(LATENCY_BUCKET_COUNT))
 
 
 def _load_usage_config() -> dict[str, Any]:
-    config = cfg.load_config()
-    usage_cfg = config.get("usage_monitoring", {}) if isinstance(config, dict) else {}
+    usage_cfg = cfg.get_config("usage_monitoring") or {}
+    if not isinstance(usage_cfg, dict):
+        usage_cfg = {}
 
-    x_cfg = usage_cfg.get("x", {}) if isinstance(usage_cfg, dict) else {}
+    x_cfg = usage_cfg.get("x", {}) if isinstance(usage_cfg.get("x"), dict) else {}
+    writer_cfg = usage_cfg.get("writer", {}) if isinstance(usage_cfg.get("writer"), dict) else {}
 
     return {
         "enabled": bool(usage_cfg.get("enabled", True)),
         "db_path": str(usage_cfg.get("db_path", "database/usage_metrics.db")),
+        "writer": {
+            "batch_size": max(1, int(_as_float(writer_cfg.get("batch_size"), _DEFAULT_WRITER_BATCH_SIZE))),
+            "flush_interval_seconds": max(
+                0.05,
+                _as_float(writer_cfg.get("flush_interval_seconds"), _DEFAULT_WRITER_FLUSH_INTERVAL_SECONDS),
+            ),
+        },
         "x": {
             "enforce_budget": bool(x_cfg.get("enforce_budget", True)),
             "monthly_budget_usd": float(x_cfg.get("monthly_budget_usd", 10.0)),
@@ -50,8 +75,8 @@ def _load_usage_config() -> dict[str, Any]:
     }
 
 
-def _resolve_db_path() -> Path:
-    config = _load_usage_config()
+def _resolve_db_path(config: dict[str, Any] | None = None) -> Path:
+    config = config or _load_usage_config()
     raw_path = Path(config["db_path"])
     if raw_path.is_absolute():
         return raw_path
@@ -60,40 +85,397 @@ def _resolve_db_path() -> Path:
     return project_root / raw_path
 
 
-def _ensure_schema() -> None:
-    db_path = _resolve_db_path()
-    db_path.parent.mkdir(parents=True, exist_ok=True)
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS api_usage_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            provider TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            method TEXT NOT NULL,
+            status_code INTEGER,
+            success INTEGER NOT NULL,
+            blocked INTEGER NOT NULL DEFAULT 0,
+            duration_ms REAL,
+            estimated_cost_usd REAL NOT NULL DEFAULT 0,
+            error TEXT,
+            metadata_json TEXT,
+            created_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_api_usage_provider_month
+        ON api_usage_events(provider, created_at)
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_api_usage_created_at
+        ON api_usage_events(created_at)
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS api_usage_hourly (
+            provider TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            hour TEXT NOT NULL,
+            total_calls INTEGER NOT NULL DEFAULT 0,
+            successful_calls INTEGER NOT NULL DEFAULT 0,
+            blocked_calls INTEGER NOT NULL DEFAULT 0,
+            total_cost_usd REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (provider, endpoint, hour)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS api_usage_monthly (
+            provider TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            month TEXT NOT NULL,
+            total_calls INTEGER NOT NULL DEFAULT 0,
+            successful_calls INTEGER NOT NULL DEFAULT 0,
+            blocked_calls INTEGER NOT NULL DEFAULT 0,
+            total_cost_usd REAL NOT NULL DEFAULT 0,
+            billable_cost_usd REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (provider, endpoint, month)
+        )
+        """
+    )
+    bucket_columns_sql = ",\n            ".join(
+        f"{column} INTEGER NOT NULL DEFAULT 0" for column in _LATENCY_BUCKET_COLUMNS
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS api_usage_latency (
+            provider TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            status_class TEXT NOT NULL,
+            hour TEXT NOT NULL,
+            duration_count INTEGER NOT NULL DEFAULT 0,
+            duration_ms_sum REAL NOT NULL DEFAULT 0,
+            {bucket_columns_sql},
+            PRIMARY KEY (provider, endpoint, status_class, hour)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_api_usage_latency_hour
+        ON api_usage_latency(hour)
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS api_usage_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        """
+    )
+    conn.commit()
+    _backfill_monthly_rollup(conn)
+    _backfill_latency_rollup(conn)
 
-    with _DB_LOCK:
-        conn = sqlite3.connect(db_path)
-        try:
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS api_usage_events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    provider TEXT NOT NULL,
-                    endpoint TEXT NOT NULL,
-                    method TEXT NOT NULL,
-                    status_code INTEGER,
-                    success INTEGER NOT NULL,
-                    blocked INTEGER NOT NULL DEFAULT 0,
-                    duration_ms REAL,
-                    estimated_cost_usd REAL NOT NULL DEFAULT 0,
-                    error TEXT,
-                    metadata_json TEXT,
-                    created_at TEXT NOT NULL
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_api_usage_provider_month
-                ON api_usage_events(provider, created_at)
-                """
+
+def _backfill_monthly_rollup(conn: sqlite3.Connection) -> None:
+    """Build api_usage_monthly from raw events once for databases created before the rollup existed."""
+    row = conn.execute(
+        "SELECT value FROM api_usage_meta WHERE key = 'monthly_rollup_backfilled'"
+    ).fetchone()
+    if row is not None:
+        return
+
+    with conn:
+        conn.execute("DELETE FROM api_usage_monthly")
+        conn.execute(
+            """
+            INSERT INTO api_usage_monthly (
+                provider,
+                endpoint,
+                month,
+                total_calls,
+                successful_calls,
+                blocked_calls,
+                total_cost_usd,
+                billable_cost_usd
             )
-            conn.commit()
-        finally:
-            conn.close()
+            SELECT
+                provider,
+                endpoint,
+                substr(created_at, 1, 7),
+                COUNT(*),
+                COALESCE(SUM(success), 0),
+                COALESCE(SUM(blocked), 0),
+                COALESCE(SUM(estimated_cost_usd), 0),
+                COALESCE(SUM(CASE WHEN blocked = 0 THEN estimated_cost_usd ELSE 0 END), 0)
+            FROM api_usage_events
+            GROUP BY provider, endpoint, substr(created_at, 1, 7)
+            """
+        )
+        conn.execute(
+            "INSERT INTO api_usage_meta (key, value) VALUES ('monthly_rollup_backfilled', ?)",
+            (datetime.now(timezone.utc).isoformat(),),
+        )
+
+
+def _backfill_latency_rollup(conn: sqlite3.Connection) -> None:
+    """Build api_usage_latency from raw events once for databases created before the histograms existed."""
+    row = conn.execute(
+        "SELECT value FROM api_usage_meta WHERE key = 'latency_rollup_backfilled'"
+    ).fetchone()
+    if row is not None:
+        return
+
+    with conn:
+        conn.execute("DELETE FROM api_usage_latency")
+        cursor = conn.execute(
+            """
+            SELECT provider, endpoint, method, status_code, success, blocked, duration_ms,
+                   estimated_cost_usd, error, metadata_json, created_at
+            FROM api_usage_events
+            """
+        )
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            conn.executemany(_UPSERT_LATENCY_SQL, _latency_rollup_rows(rows))
+        conn.execute(
+            "INSERT INTO api_usage_meta (key, value) VALUES ('latency_rollup_backfilled', ?)",
+            (datetime.now(timezone.utc).isoformat(),),
+        )
+
+
+def _open_connection(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    # Only takes effect on a brand-new file; the offline retention copy converts older files.
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    _ensure_schema(conn)
+    return conn
+
+
+_INSERT_EVENT_SQL = """
+    INSERT INTO api_usage_events (
+        provider,
+        endpoint,
+        method,
+        status_code,
+        success,
+        blocked,
+        duration_ms,
+        estimated_cost_usd,
+        error,
+        metadata_json,
+        created_at
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_UPSERT_MONTHLY_SQL = """
+    INSERT INTO api_usage_monthly (
+        provider,
+        endpoint,
+        month,
+        total_calls,
+        successful_calls,
+        blocked_calls,
+        total_cost_usd,
+        billable_cost_usd
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (provider, endpoint, month) DO UPDATE SET
+        total_calls = total_calls + excluded.total_calls,
+        successful_calls = successful_calls + excluded.successful_calls,
+        blocked_calls = blocked_calls + excluded.blocked_calls,
+        total_cost_usd = total_cost_usd + excluded.total_cost_usd,
+        billable_cost_usd = billable_cost_usd + excluded.billable_cost_usd
+"""
+
+
+def _monthly_rollup_rows(batch: list[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+    """Collapse a batch of event rows into per (provider, endpoint, month) deltas."""
+    totals: dict[tuple[str, str, str], list[float]] = {}
+    for provider, endpoint, _method, _status, success, blocked, _duration, cost, _error, _meta, created_at in batch:
+        key = (provider, endpoint, created_at[:7])
+        bucket = totals.get(key)
+        if bucket is None:
+            bucket = totals[key] = [0, 0, 0, 0.0, 0.0]
+        bucket[0] += 1
+        bucket[1] += success
+        bucket[2] += blocked
+        bucket[3] += cost
+        if not blocked:
+            bucket[4] += cost
+    return [
+        (provider, endpoint, month, int(calls), int(ok), int(blocked), cost, billable)
+        for (provider, endpoint, month), (calls, ok, blocked, cost, billable) in totals.items()
+    ]
+
+
+_UPSERT_LATENCY_SQL = f"""
+    INSERT INTO api_usage_latency (
+        provider,
+        endpoint,
+        status_class,
+        hour,
+        duration_count,
+        duration_ms_sum,
+        {", ".join(_LATENCY_BUCKET_COLUMNS)}
+    )
+    VALUES ({", ".join("?" for _ in range(6 + LATENCY_BUCKET_COUNT))})
+    ON CONFLICT (provider, endpoint, status_class, hour) DO UPDATE SET
+        duration_count = duration_count + excluded.duration_count,
+        duration_ms_sum = duration_ms_sum + excluded.duration_ms_sum,
+        {", ".join(f"{column} = {column} + excluded.{column}" for column in _LATENCY_BUCKET_COLUMNS)}
+"""
+
+
+def _latency_rollup_rows(batch: list[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+    """Collapse a batch of event rows into per (provider, endpoint, status class, hour) histograms."""
+    totals: dict[tuple[str, str, str, str], tuple[list[int], list[float]]] = {}
+    for provider, endpoint, _method, status_code, _success, blocked, duration_ms, _cost, _error, _meta, created_at in batch:
+        if blocked or duration_ms is None:
+            continue
+        key = (provider, endpoint, status_class(status_code), f"{created_at[:13]}:00:00+00:00")
+        entry = totals.get(key)
+        if entry is None:
+            entry = totals[key] = (empty_latency_buckets(), [0.0])
+        entry[0][latency_bucket_index(duration_ms)] += 1
+        entry[1][0] += float(duration_ms)
+    return [
+        (provider, endpoint, status, hour, sum(buckets), total[0], *buckets)
+        for (provider, endpoint, status, hour), (buckets, total) in totals.items()
+    ]
+
+
+class _UsageEventSink:
+    """Single WAL connection plus an in-memory queue drained by a writer thread.
+
+    Producers only append to the queue. The writer commits the queued rows in one
+    transaction when ``batch_size`` rows are pending or ``flush_interval_seconds``
+    elapsed. Reads call :meth:`flush` first so budget checks see every event.
+    """
+
+    def __init__(self, db_path: Path, *, batch_size: int, flush_interval_seconds: float) -> None:
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.connection = _open_connection(db_path)
+        self._pending: list[tuple[Any, ...]] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run,
+            name="usage-event-writer",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def enqueue(self, row: tuple[Any, ...]) -> bool:
+        with self._condition:
+            if self._closed:
+                return False
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+            return True
+
+    def flush(self) -> int:
+        # Take the batch while holding the DB lock so a batch already taken by
+        # the writer thread is committed before this one.
+        with _DB_LOCK:
+            with self._condition:
+                batch = self._pending
+                self._pending = []
+            if not batch:
+                return 0
+            try:
+                with self.connection:
+                    self.connection.executemany(_INSERT_EVENT_SQL, batch)
+                    self.connection.executemany(_UPSERT_MONTHLY_SQL, _monthly_rollup_rows(batch))
+                    self.connection.executemany(_UPSERT_LATENCY_SQL, _latency_rollup_rows(batch))
+            except sqlite3.Error as exc:
+                logger.warning(f"Dropping {len(batch)} usage events after write failure: {exc}")
+                return 0
+            return len(batch)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval_seconds)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as exc:  # pragma: no cover - keep the writer alive
+                logger.warning(f"Usage event writer failed: {exc}")
+
+    def close(self) -> None:
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout=max(1.0, self.flush_interval_seconds * 2))
+        self.flush()
+        with _DB_LOCK:
+            self.connection.close()
+
+
+_SINK: _UsageEventSink | None = None
+
+
+def _get_sink(config: dict[str, Any] | None = None) -> _UsageEventSink:
+    global _SINK
+
+    config = config or _load_usage_config()
+    db_path = _resolve_db_path(config)
+    writer_cfg = config["writer"]
+
+    sink = _SINK
+    if sink is not None and sink.db_path == db_path:
+        return sink
+
+    with _SINK_LOCK:
+        if _SINK is not None and _SINK.db_path == db_path:
+            return _SINK
+        if _SINK is not None:
+            _SINK.close()
+        _SINK = _UsageEventSink(
+            db_path,
+            batch_size=writer_cfg["batch_size"],
+            flush_interval_seconds=writer_cfg["flush_interval_seconds"],
+        )
+        return _SINK
+
+
+def flush_usage_events() -> int:
+    """Write every queued usage event now. Returns the number of rows written."""
+    sink = _SINK
+    if sink is None:
+        return 0
+    return sink.flush()
+
+
+def shutdown_usage_sink() -> None:
+    """Flush pending events and close the shared usage database connection."""
+    global _SINK
+    with _SINK_LOCK:
+        sink = _SINK
+        _SINK = None
+    if sink is not None:
+        sink.close()
+
+
+atexit.register(shutdown_usage_sink)
 
 
 def _current_month() -> str:
@@ -137,72 +519,65 @@ def record_api_event(
     error: str | None = None,
     metadata: dict[str, Any] | None = None,
 ) -> None:
+    record_completed_span(
+        endpoint,
+        None if blocked else duration_ms,
+        error=error if not success else None,
+        **{"peer.service": provider, "http.method": method, "http.status_code": status_code, "blocked": blocked},
+    )
     usage_cfg = _load_usage_config()
     if not usage_cfg.get("enabled", True):
         return
 
-    _ensure_schema()
-    db_path = _resolve_db_path()
-
-    with _DB_LOCK:
-        conn = sqlite3.connect(db_path)
-        try:
-            conn.execute(
-                """
-                INSERT INTO api_usage_events (
-                    provider,
-                    endpoint,
-                    method,
-                    status_code,
-                    success,
-                    blocked,
-                    duration_ms,
-                    estimated_cost_usd,
-                    error,
-                    metadata_json,
-                    created_at
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    provider,
-                    endpoint,
-                    method,
-                    status_code,
-                    1 if success else 0,
-                    1 if blocked else 0,
-                    duration_ms,
-                    _as_float(estimated_cost_usd, 0.0),
-                    error,
-                    json.dumps(metadata or {}),
-                    datetime.now(timezone.utc).isoformat(),
-                ),
-            )
-            conn.commit()
-        finally:
-            conn.close()
+    row = (
+        provider,
+        endpoint,
+        method,
+        status_code,
+        1 if success else 0,
+        1 if blocked else 0,
+        duration_ms,
+        _as_float(estimated_cost_usd, 0.0),
+        error,
+        json.dumps(metadata or {}),
+        datetime.now(timezone.utc).isoformat(),
+    )
+    status = status_class(status_code)
+    METRICS.inc("plane_spotter_api_calls_total", provider=provider, status_class=status)
+    if blocked:
+        METRICS.inc("plane_spotter_api_blocked_total", provider=provider)
+    elif not success:
+        METRICS.inc("plane_spotter_api_errors_total", provider=provider, status_class=status)
+    if estimated_cost_usd:
+        METRICS.inc("plane_spotter_api_cost_usd_total", _as_float(estimated_cost_usd, 0.0), provider=provider)
+    if duration_ms is not None and not blocked:
+        LATENCY_HISTOGRAMS.observe(provider, endpoint, status, duration_ms)
+    if not _get_sink(usage_cfg).enqueue(row):
+        # The sink was swapped or shut down between lookup and enqueue.
+        _get_sink(usage_cfg).enqueue(row)
 
 
 def get_monthly_cost(provider: str, year_month: str | None = None) -> float:
-    _ensure_schema()
     month = year_month or _current_month()
-    db_path = _resolve_db_path()
+    sink = _get_sink()
+    sink.flush()
 
     with _DB_LOCK:
-        conn = sqlite3.connect(db_path)
-        try:
-            cursor = conn.execute(
-                """
-                SELECT COALESCE(SUM(estimated_cost_usd), 0)
-                FROM api_usage_events
-                WHERE provider = ? AND blocked = 0 AND substr(created_at, 1, 7) = ?
-                """,
-                (provider, month),
-            )
-            row = cursor.fetchone()
-            return _as_float(row[0] if row else 0.0, 0.0)
-        finally:
-            conn.close()
+        cursor = sink.connection.execute(
+            """
+            SELECT COALESCE(SUM(billable_cost_usd), 0)
+            FROM api_usage_monthly
+            WHERE provider = ? AND month = ?
+            """,
+            (provider, month),
+        )
+        row = cursor.fetchone()
+        return _as_float(row[0] if row else 0.0, 0.0)
+
+
+def _publish_x_budget(month_cost: float, budget: float) -> None:
+    METRICS.set("plane_spotter_x_month_cost_usd", month_cost)
+    METRICS.set("plane_spotter_x_budget_headroom_usd", budget - month_cost)
 
 
 def check_budget(
@@ -229,6 +604,7 @@ def check_budget(
     month_cost = get_monthly_cost("x")
     projected = month_cost + cost
     budget = _as_float(x_cfg.get("monthly_budget_usd"), 10.0)
+    _publish_x_budget(month_cost, budget)
 
     if not x_cfg.get("enforce_budget", True):
         return BudgetDecision(
@@ -284,54 +660,139 @@ def enforce_budget_or_raise(
     raise XBudgetExceededError(decision.reason or "X budget exceeded")
 
 
+def enforce_circuit_or_raise(provider: str, endpoint: str, method: str = "GET") -> None:
+    """Refuse a call to ``provider`` while its circuit breaker is open; the refusal is recorded as blocked."""
+    if get_breaker(provider).allow():
+        return
+
+    record_api_event(
+        provider=provider,
+        endpoint=endpoint,
+        method=method,
+        status_code=None,
+        success=False,
+        blocked=True,
+        duration_ms=0.0,
+        estimated_cost_usd=0.0,
+        error="circuit_open",
+    )
+    raise CircuitOpenError(f"{provider} circuit is open")
+
+
 def get_monthly_usage_summary(year_month: str | None = None) -> dict[str, dict[str, float | int]]:
-    _ensure_schema()
     month = year_month or _current_month()
-    db_path = _resolve_db_path()
+    sink = _get_sink()
+    sink.flush()
 
     with _DB_LOCK:
-        conn = sqlite3.connect(db_path)
-        try:
-            cursor = conn.execute(
-                """
-                SELECT
-                    provider,
-                    COUNT(*) AS total_calls,
-                    COALESCE(SUM(success), 0) AS successful_calls,
-                    COALESCE(SUM(blocked), 0) AS blocked_calls,
-                    COALESCE(SUM(estimated_cost_usd), 0) AS total_cost
-                FROM api_usage_events
-                WHERE substr(created_at, 1, 7) = ?
-                GROUP BY provider
-                ORDER BY provider
-                """,
-                (month,),
-            )
-            summary: dict[str, dict[str, float | int]] = {}
-            for provider, total_calls, successful_calls, blocked_calls, total_cost in cursor.fetchall():
-                summary[provider] = {
-                    "total_calls": int(total_calls),
-                    "successful_calls": int(successful_calls),
-                    "blocked_calls": int(blocked_calls),
-                    "total_cost_usd": _as_float(total_cost, 0.0),
-                }
-
-            if "x" not in summary:
-                summary["x"] = {
-                    "total_calls": 0,
-                    "successful_calls": 0,
-                    "blocked_calls": 0,
-                    "total_cost_usd": 0.0,
-                }
-
-            return summary
-        finally:
-            conn.close()
+        cursor = sink.connection.execute(
+            """
+            SELECT
+                provider,
+                COALESCE(SUM(total_calls), 0) AS total_calls,
+                COALESCE(SUM(successful_calls), 0) AS successful_calls,
+                COALESCE(SUM(blocked_calls), 0) AS blocked_calls,
+                COALESCE(SUM(total_cost_usd), 0) AS total_cost
+            FROM api_usage_monthly
+            WHERE month = ?
+            GROUP BY provider
+            ORDER BY provider
+            """,
+            (month,),
+        )
+        rows = cursor.fetchall()
+
+    summary: dict[str, dict[str, float | int]] = {}
+    for provider, total_calls, successful_calls, blocked_calls, total_cost in rows:
+        summary[provider] = {
+            "total_calls": int(total_calls),
+            "successful_calls": int(successful_calls),
+            "blocked_calls": int(blocked_calls),
+            "total_cost_usd": _as_float(total_cost, 0.0),
+        }
+
+    if "x" not in summary:
+        summary["x"] = {
+            "total_calls": 0,
+            "successful_calls": 0,
+            "blocked_calls": 0,
+            "total_cost_usd": 0.0,
+        }
+
+    return summary
+
+
+def _hour_bounds(start: datetime, end: datetime) -> tuple[str, str]:
+    """Widen ``[start, end)`` to whole UTC hours, matching the keys of api_usage_latency."""
+
+    def as_utc(value: datetime) -> datetime:
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    start_utc = as_utc(start).replace(minute=0, second=0, microsecond=0)
+    end_utc = as_utc(end)
+    end_floor = end_utc.replace(minute=0, second=0, microsecond=0)
+    if end_floor != end_utc:
+        end_floor += timedelta(hours=1)
+    return start_utc.isoformat(), end_floor.isoformat()
+
+
+def get_latency_percentiles(
+    start: datetime,
+    end: datetime | None = None,
+    *,
+    provider: str | None = None,
+    endpoint: str | None = None,
+    status: str | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Return p50/p90/p95/p99 latency per provider/endpoint/status class for ``[start, end)``.
+
+    Percentiles come from the hourly histogram table, so the range is rounded to
+    whole hours and raw events are never re-read.
+    """
+    end = end or datetime.now(timezone.utc)
+    filters = ["hour >= ?", "hour < ?"]
+    params: list[Any] = list(_hour_bounds(start, end))
+    for column, value in (("provider", provider), ("endpoint", endpoint), ("status_class", status)):
+        if value is not None:
+            filters.append(f"{column} = ?")
+            params.append(value)
+
+    sink = _get_sink()
+    sink.flush()
+    bucket_sums = ", ".join(f"SUM({column})" for column in _LATENCY_BUCKET_COLUMNS)
+    with _DB_LOCK:
+        rows = sink.connection.execute(
+            f"""
+            SELECT provider, endpoint, status_class, SUM(duration_ms_sum), {bucket_sums}
+            FROM api_usage_latency
+            WHERE {" AND ".join(filters)}
+            GROUP BY provider, endpoint, status_class
+            ORDER BY provider, endpoint, status_class
+            """,
+            params,
+        ).fetchall()
+
+    result: dict[str, dict[str, Any]] = {}
+    for row_provider, row_endpoint, row_status, duration_sum, *buckets in rows:
+        result[f"{row_provider} {row_endpoint} {row_status}"] = {
+            "provider": row_provider,
+            "endpoint": row_endpoint,
+            "status_class": row_status,
+            **summarize_buckets([int(count or 0) for count in buckets], _as_float(duration_sum, 0.0)),
+        }
+    return result
 
 
 def log_monthly_usage_summary() -> None:
     try:
         summary = get_monthly_usage_summary()
         logger.info(f"API monthly usage summary: {summary}")
+        circuits = {name: state for name, state in breaker_states().items() if state["state"] != "closed"}
+        if circuits:
+            logger.warning(f"Circuit breakers not closed: {circuits}")
+        x_budget = _as_float(_load_usage_config()["x"].get("monthly_budget_usd"), 10.0)
+        _publish_x_budget(get_monthly_cost("x"), x_budget)
     except Exception as exc:  # pragma: no cover - logging fallback
         logger.warning(f"Unable to compute API usage summary: {exc}")
@@ -0,0 +1,208 @@
+"""Per-upstream circuit breakers shared by every module that talks to that upstream.
+
+A breaker is closed until the failure rate over the last ``window_seconds``
+reaches ``failure_rate_threshold`` (with at least ``min_calls`` outcomes in the
+window). It then opens: callers are refused without doing I/O for
+``open_seconds``. After that it is half-open and lets ``half_open_probes``
+requests through; a successful probe closes it, a failed one re-opens it.
+
+Only outcomes that say the upstream is unhealthy count as failures (timeouts,
+connection errors, 5xx, failed sends); a 4xx means it answered.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+from loguru import logger
+
+import config.config as cfg
+from monitoring.metrics import METRICS
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0.0, HALF_OPEN: 1.0, OPEN: 2.0}
+
+_LOCK = threading.Lock()
+_BREAKERS: dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitOpenError(RuntimeError):
+    """The upstream's breaker is open; the request was not sent."""
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_circuit_breaker_config(name: str) -> dict[str, Any]:
+    raw = cfg.get_config("circuit_breakers") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+    providers = raw.get("providers") if isinstance(raw.get("providers"), dict) else {}
+    overrides = providers.get(name) if isinstance(providers.get(name), dict) else {}
+    merged = {**raw, **overrides}
+
+    return {
+        "enabled": bool(merged.get("enabled", True)),
+        "window_seconds": max(1.0, _as_float(merged.get("window_seconds"), 120.0)),
+        "min_calls": max(1, int(_as_float(merged.get("min_calls"), 5))),
+        "failure_rate_threshold": min(1.0, max(0.01, _as_float(merged.get("failure_rate_threshold"), 0.5))),
+        "open_seconds": max(0.0, _as_float(merged.get("open_seconds"), 60.0)),
+        "half_open_probes": max(1, int(_as_float(merged.get("half_open_probes"), 1))),
+    }
+
+
+class CircuitBreaker:
+    """Breaker for one upstream.
+
+    Without an explicit ``config`` the ``circuit_breakers`` settings are read
+    on every call, so edits to config.yaml apply without a restart.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: dict[str, Any] | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._config = config
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes: deque[tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_started_at = 0.0
+        self.rejected = 0
+        self._publish()
+
+    @property
+    def config(self) -> dict[str, Any]:
+        return self._config if self._config is not None else load_circuit_breaker_config(self.name)
+
+    @property
+    def state(self) -> str:
+        config = self.config
+        with self._lock:
+            self._advance(self._clock(), config)
+            return self._state
+
+    def _publish(self) -> None:
+        METRICS.set("plane_spotter_circuit_state", _STATE_VALUES[self._state], upstream=self.name)
+
+    def _transition(self, state: str, now: float) -> None:
+        if state == self._state:
+            return
+        logger.warning(f"Circuit breaker for {self.name}: {self._state} -> {state}")
+        self._state = state
+        if state == OPEN:
+            self._opened_at = now
+        if state != HALF_OPEN:
+            self._probes_in_flight = 0
+        if state == CLOSED:
+            self._outcomes.clear()
+        self._publish()
+
+    def _advance(self, now: float, config: dict[str, Any]) -> None:
+        if self._state == OPEN and now - self._opened_at >= config["open_seconds"]:
+            self._transition(HALF_OPEN, now)
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; a half-open breaker hands out a limited number of probes."""
+        config = self.config
+        if not config["enabled"]:
+            return True
+        now = self._clock()
+        with self._lock:
+            self._advance(now, config)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN:
+                # A probe whose outcome never came back (cancelled caller) expires after open_seconds.
+                if self._probes_in_flight and now - self._probe_started_at >= config["open_seconds"]:
+                    self._probes_in_flight = 0
+                if self._probes_in_flight < config["half_open_probes"]:
+                    self._probes_in_flight += 1
+                    self._probe_started_at = now
+                    return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        self._record(failed=False)
+
+    def record_failure(self) -> None:
+        self._record(failed=True)
+
+    def _record(self, *, failed: bool) -> None:
+        config = self.config
+        if not config["enabled"]:
+            return
+        now = self._clock()
+        with self._lock:
+            self._advance(now, config)
+            if self._state == HALF_OPEN:
+                self._transition(OPEN if failed else CLOSED, now)
+                return
+            if self._state == OPEN:
+                return
+
+            self._outcomes.append((now, failed))
+            horizon = now - config["window_seconds"]
+            while self._outcomes and self._outcomes[0][0] < horizon:
+                self._outcomes.popleft()
+            failures = sum(1 for _at, outcome in self._outcomes if outcome)
+            if (
+                failed
+                and len(self._outcomes) >= config["min_calls"]
+                and failures / len(self._outcomes) >= config["failure_rate_threshold"]
+            ):
+                self._transition(OPEN, now)
+
+    def snapshot(self) -> dict[str, Any]:
+        config = self.config
+        now = self._clock()
+        with self._lock:
+            self._advance(now, config)
+            failures = sum(1 for _at, outcome in self._outcomes if outcome)
+            return {
+                "state": self._state,
+                "window_calls": len(self._outcomes),
+                "window_failures": failures,
+                "rejected": self.rejected,
+                "retry_in_seconds": (
+                    round(max(0.0, config["open_seconds"] - (now - self._opened_at)), 1)
+                    if self._state == OPEN
+                    else 0.0
+                ),
+            }
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _LOCK:
+        breaker = _BREAKERS.get(name)
+        if breaker is None:
+            breaker = _BREAKERS[name] = CircuitBreaker(name)
+        return breaker
+
+
+def breaker_states() -> dict[str, dict[str, Any]]:
+    with _LOCK:
+        breakers = list(_BREAKERS.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def reset_breakers() -> None:
+    with _LOCK:
+        _BREAKERS.clear()
@@ -0,0 +1,287 @@
+"""One summary row per processing cycle, plus a regression report over them.
+
+Rows live in the ``cycle_ledger`` table of usage_metrics.db. Compare the most
+recent cycles with the rolling baseline that precedes them with::
+
+    python -m monitoring.cycle_ledger --recent 5 --baseline 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import mean, median
+from typing import Any, Iterator
+
+from loguru import logger
+
+import config.config as cfg
+from monitoring.api_usage import _DB_LOCK, _get_sink, _resolve_db_path
+
+
+LEDGER_PHASES: tuple[str, ...] = ("fetch", "normalize", "merge", "index_load", "enrichment", "socials")
+LEDGER_SOURCES: tuple[str, ...] = ("aeroapi", "aerodatabox")
+
+_DEFAULT_RECENT_CYCLES = 5
+_DEFAULT_BASELINE_CYCLES = 20
+_DEFAULT_THRESHOLD_PCT = 25.0
+_DEFAULT_MIN_PHASE_SECONDS = 0.05
+
+
+class CycleStats:
+    """Counters collected while one ``main()`` run is in progress."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc)
+        self.total_seconds = 0.0
+        self.status = "ok"
+        self.airport_icao: str | None = None
+        self.phase_seconds: dict[str, float] = dict.fromkeys(LEDGER_PHASES, 0.0)
+        self.flights_by_source: dict[str, int] = dict.fromkeys(LEDGER_SOURCES, 0)
+        self.flights_merged = 0
+        self.interesting_count = 0
+        self.posts_by_platform: dict[str, int] = {}
+        self.retries_by_provider: dict[str, int] = {}
+        self.merge_stats: dict[str, Any] = {}
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+
+    def add_flights(self, source: str, count: int) -> None:
+        with self._lock:
+            self.flights_by_source[source] = self.flights_by_source.get(source, 0) + int(count)
+
+    def add_post(self, platform: str) -> None:
+        with self._lock:
+            self.posts_by_platform[platform] = self.posts_by_platform.get(platform, 0) + 1
+
+    def add_retry(self, provider: str) -> None:
+        with self._lock:
+            self.retries_by_provider[provider] = self.retries_by_provider.get(provider, 0) + 1
+
+
+_CURRENT_CYCLE: ContextVar[CycleStats | None] = ContextVar("plane_spotter_current_cycle", default=None)
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_cycle_ledger_config() -> dict[str, Any]:
+    raw = cfg.get_config("cycle_ledger") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    return {
+        "enabled": bool(raw.get("enabled", True)),
+        "recent_cycles": max(1, int(_as_float(raw.get("recent_cycles"), _DEFAULT_RECENT_CYCLES))),
+        "baseline_cycles": max(1, int(_as_float(raw.get("baseline_cycles"), _DEFAULT_BASELINE_CYCLES))),
+        "regression_threshold_pct": max(0.0, _as_float(raw.get("regression_threshold_pct"), _DEFAULT_THRESHOLD_PCT)),
+        "min_phase_seconds": max(0.0, _as_float(raw.get("min_phase_seconds"), _DEFAULT_MIN_PHASE_SECONDS)),
+    }
+
+
+def current_cycle() -> CycleStats | None:
+    return _CURRENT_CYCLE.get()
+
+
+@contextmanager
+def start_cycle(*, persist: bool = True) -> Iterator[CycleStats]:
+    """Collect stats for one cycle and append them to the ledger when the block exits.
+
+    Replays pass ``persist=False`` so simulated cycles stay out of the production baseline.
+    """
+    stats = CycleStats()
+    token = _CURRENT_CYCLE.set(stats)
+    started = time.perf_counter()
+    try:
+        yield stats
+    except BaseException:
+        stats.status = "error"
+        raise
+    finally:
+        _CURRENT_CYCLE.reset(token)
+        stats.total_seconds = time.perf_counter() - started
+        if persist and load_cycle_ledger_config()["enabled"]:
+            try:
+                sink = _get_sink()
+                with _DB_LOCK:
+                    write_cycle_row(sink.connection, stats)
+            except Exception as exc:
+                logger.warning(f"Unable to write cycle ledger row: {exc}")
+
+
+@contextmanager
+def cycle_phase(phase: str) -> Iterator[None]:
+    """Add the wall time of the block to ``phase`` of the running cycle, if any."""
+    stats = _CURRENT_CYCLE.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.add_phase(phase, time.perf_counter() - started)
+
+
+def note_retry(provider: str) -> None:
+    stats = _CURRENT_CYCLE.get()
+    if stats is not None:
+        stats.add_retry(provider)
+
+
+def note_post(platform: str) -> None:
+    stats = _CURRENT_CYCLE.get()
+    if stats is not None:
+        stats.add_post(platform)
+
+
+def _ensure_ledger_schema(conn: sqlite3.Connection) -> None:
+    phase_columns = ",\n".join(f"{phase}_seconds REAL NOT NULL DEFAULT 0" for phase in LEDGER_PHASES)
+    source_columns = ",\n".join(f"flights_{source} INTEGER NOT NULL DEFAULT 0" for source in LEDGER_SOURCES)
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS cycle_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT NOT NULL,
+            airport_icao TEXT,
+            status TEXT NOT NULL,
+            total_seconds REAL NOT NULL,
+            {phase_columns},
+            {source_columns},
+            flights_merged INTEGER NOT NULL DEFAULT 0,
+            interesting_count INTEGER NOT NULL DEFAULT 0,
+            posts_json TEXT,
+            retries INTEGER NOT NULL DEFAULT 0,
+            retries_json TEXT,
+            merge_json TEXT
+        )
+        """
+    )
+
+
+def write_cycle_row(conn: sqlite3.Connection, stats: CycleStats) -> None:
+    _ensure_ledger_schema(conn)
+    columns = (
+        ["started_at", "airport_icao", "status", "total_seconds"]
+        + [f"{phase}_seconds" for phase in LEDGER_PHASES]
+        + [f"flights_{source}" for source in LEDGER_SOURCES]
+        + ["flights_merged", "interesting_count", "posts_json", "retries", "retries_json", "merge_json"]
+    )
+    values = (
+        [stats.started_at.isoformat(), stats.airport_icao, stats.status, stats.total_seconds]
+        + [stats.phase_seconds.get(phase, 0.0) for phase in LEDGER_PHASES]
+        + [stats.flights_by_source.get(source, 0) for source in LEDGER_SOURCES]
+        + [
+            stats.flights_merged,
+            stats.interesting_count,
+            json.dumps(stats.posts_by_platform, sort_keys=True),
+            sum(stats.retries_by_provider.values()),
+            json.dumps(stats.retries_by_provider, sort_keys=True),
+            json.dumps(stats.merge_stats, sort_keys=True),
+        ]
+    )
+    placeholders = ", ".join("?" for _ in columns)
+    with conn:
+        conn.execute(f"INSERT INTO cycle_ledger ({', '.join(columns)}) VALUES ({placeholders})", values)
+
+
+def cycle_regression_report(
+    conn: sqlite3.Connection,
+    *,
+    recent_cycles: int,
+    baseline_cycles: int,
+    threshold_pct: float,
+    min_phase_seconds: float = 0.0,
+) -> dict[str, Any]:
+    """Compare the mean of the last ``recent_cycles`` rows with the median of the rows before them.
+
+    A phase is flagged when the recent mean exceeds the baseline by more than
+    ``threshold_pct`` percent and the baseline is above ``min_phase_seconds``.
+    """
+    _ensure_ledger_schema(conn)
+    metrics = ["total"] + list(LEDGER_PHASES)
+    selected = ", ".join(f"{metric}_seconds" for metric in metrics)
+    rows = conn.execute(
+        f"SELECT {selected} FROM cycle_ledger WHERE status = 'ok' ORDER BY id DESC LIMIT ?",
+        (recent_cycles + baseline_cycles,),
+    ).fetchall()
+
+    recent_rows = rows[:recent_cycles]
+    baseline_rows = rows[recent_cycles:]
+    report: dict[str, Any] = {
+        "recent_cycles": len(recent_rows),
+        "baseline_cycles": len(baseline_rows),
+        "threshold_pct": threshold_pct,
+        "phases": {},
+        "regressions": [],
+    }
+    if not recent_rows or not baseline_rows:
+        return report
+
+    for index, metric in enumerate(metrics):
+        recent_value = mean(row[index] for row in recent_rows)
+        baseline_value = median(row[index] for row in baseline_rows)
+        change_pct = ((recent_value - baseline_value) / baseline_value * 100.0) if baseline_value > 0 else None
+        regressed = (
+            change_pct is not None
+            and baseline_value >= min_phase_seconds
+            and change_pct > threshold_pct
+        )
+        report["phases"][metric] = {
+            "recent_mean_seconds": round(recent_value, 4),
+            "baseline_median_seconds": round(baseline_value, 4),
+            "change_pct": round(change_pct, 1) if change_pct is not None else None,
+            "regressed": regressed,
+        }
+        if regressed:
+            report["regressions"].append(metric)
+    return report
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare recent cycles against the rolling baseline")
+    parser.add_argument("--db", default="", help="Path to usage_metrics.db (default: usage_monitoring.db_path)")
+    parser.add_argument("--recent", type=int, default=None, help="Override cycle_ledger.recent_cycles")
+    parser.add_argument("--baseline", type=int, default=None, help="Override cycle_ledger.baseline_cycles")
+    parser.add_argument("--threshold", type=float, default=None, help="Override cycle_ledger.regression_threshold_pct")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    ledger_cfg = load_cycle_ledger_config()
+    db_path = Path(args.db) if args.db else _resolve_db_path()
+    if not db_path.exists():
+        print(json.dumps({"ok": False, "error": f"database not found: {db_path}"}, ensure_ascii=True, indent=2))
+        return 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        report = cycle_regression_report(
+            conn,
+            recent_cycles=args.recent or ledger_cfg["recent_cycles"],
+            baseline_cycles=args.baseline or ledger_cfg["baseline_cycles"],
+            threshold_pct=args.threshold if args.threshold is not None else ledger_cfg["regression_threshold_pct"],
+            min_phase_seconds=ledger_cfg["min_phase_seconds"],
+        )
+    finally:
+        conn.close()
+
+    print(json.dumps({"ok": True, "report": report}, ensure_ascii=True, indent=2))
+    return 2 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+
+
+# Log-scaled upper bounds (ms): every bucket is sqrt(2) wider than the previous
+# one, from 1 ms up to ~92 s. A final overflow bucket catches anything slower.
+LATENCY_BUCKET_BOUNDS_MS: tuple[float, ...] = tuple(round(2 ** (step / 2), 3) for step in range(34))
+LATENCY_BUCKET_COUNT = len(LATENCY_BUCKET_BOUNDS_MS) + 1
+
+
+def latency_bucket_index(duration_ms: float) -> int:
+    return bisect_left(LATENCY_BUCKET_BOUNDS_MS, max(0.0, float(duration_ms)))
+
+
+def empty_latency_buckets() -> list[int]:
+    return [0] * LATENCY_BUCKET_COUNT
+
+
+PERCENTILES: tuple[float, ...] = (0.5, 0.9, 0.95, 0.99)
+
+
+def status_class(status_code: int | None) -> str:
+    if status_code is None:
+        return "error"
+    return f"{int(status_code) // 100}xx"
+
+
+def percentile_from_buckets(buckets: list[int], quantile: float) -> float | None:
+    """Estimate a quantile by interpolating linearly inside the matching bucket."""
+    total = sum(buckets)
+    if total <= 0:
+        return None
+
+    rank = quantile * total
+    seen = 0
+    for index, count in enumerate(buckets):
+        if count <= 0:
+            continue
+        if seen + count >= rank:
+            lower = LATENCY_BUCKET_BOUNDS_MS[index - 1] if index > 0 else 0.0
+            if index >= len(LATENCY_BUCKET_BOUNDS_MS):
+                return LATENCY_BUCKET_BOUNDS_MS[-1]
+            upper = LATENCY_BUCKET_BOUNDS_MS[index]
+            fraction = (rank - seen) / count
+            return round(lower + (upper - lower) * fraction, 3)
+        seen += count
+    return LATENCY_BUCKET_BOUNDS_MS[-1]
+
+
+def summarize_buckets(buckets: list[int], duration_sum_ms: float = 0.0) -> dict[str, float | int | None]:
+    count = sum(buckets)
+    summary: dict[str, float | int | None] = {
+        "count": count,
+        "mean_ms": round(duration_sum_ms / count, 3) if count else None,
+    }
+    for quantile in PERCENTILES:
+        summary[f"p{int(quantile * 100)}_ms"] = percentile_from_buckets(buckets, quantile)
+    return summary
+
+
+class LatencyHistogramRegistry:
+    """In-memory cumulative histograms keyed by (provider, endpoint, status class)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str, str], tuple[list[int], list[float]]] = {}
+
+    def observe(self, provider: str, endpoint: str, status: str, duration_ms: float) -> None:
+        key = (provider, endpoint, status)
+        index = latency_bucket_index(duration_ms)
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = (empty_latency_buckets(), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += float(duration_ms)
+
+    def snapshot(self) -> dict[tuple[str, str, str], tuple[list[int], float]]:
+        with self._lock:
+            return {key: (list(buckets), total[0]) for key, (buckets, total) in self._histograms.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+LATENCY_HISTOGRAMS = LatencyHistogramRegistry()
@@ -0,0 +1,216 @@
+"""In-memory counters and an optional Prometheus ``/metrics`` endpoint.
+
+Everything rendered here comes from process memory; a scrape never touches
+usage_metrics.db.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any
+
+from aiohttp import web
+from loguru import logger
+
+import config.config as cfg
+from monitoring.latency import LATENCY_BUCKET_BOUNDS_MS, LATENCY_HISTOGRAMS
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# name -> (type, help)
+METRIC_DEFINITIONS: dict[str, tuple[str, str]] = {
+    "plane_spotter_api_calls_total": ("counter", "Outbound API calls by provider and status class."),
+    "plane_spotter_api_errors_total": ("counter", "Outbound API calls that failed (not counting budget blocks)."),
+    "plane_spotter_api_blocked_total": ("counter", "Outbound API calls blocked by a budget guard or policy."),
+    "plane_spotter_api_cost_usd_total": ("counter", "Estimated cost of outbound API calls in USD."),
+    "plane_spotter_x_month_cost_usd": ("gauge", "X spend recorded for the current month in USD."),
+    "plane_spotter_x_budget_headroom_usd": ("gauge", "Remaining X monthly budget in USD."),
+    "plane_spotter_aeroapi_key_cost_usd": ("gauge", "AeroAPI month-to-date cost per key in USD."),
+    "plane_spotter_aeroapi_cost_drift_usd": ("gauge", "Remote minus locally estimated AeroAPI cost at the last reconciliation."),
+    "plane_spotter_circuit_state": ("gauge", "Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)."),
+    "plane_spotter_cycles_total": ("counter", "Completed processing cycles."),
+    "plane_spotter_cycle_duration_seconds": ("gauge", "Wall time of the last processing cycle."),
+    "plane_spotter_cycle_duration_seconds_total": ("counter", "Accumulated wall time of all processing cycles."),
+    "plane_spotter_cycle_flights": ("gauge", "Flights handled in the last cycle by stage."),
+    "plane_spotter_flights_total": ("counter", "Flights handled across all cycles by stage."),
+    "plane_spotter_cache_requests_total": ("counter", "Cache lookups by cache name and result."),
+    "plane_spotter_http_connections_total": ("counter", "New outbound TCP connections opened per HTTP client."),
+}
+
+
+def _label_key(labels: dict[str, Any]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: dict[str, dict[tuple[tuple[str, str], ...], float]] = {}
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + float(value)
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values.setdefault(name, {})[key] = float(value)
+
+    def get(self, name: str, **labels: Any) -> float | None:
+        with self._lock:
+            return self._values.get(name, {}).get(_label_key(labels))
+
+    def snapshot(self) -> dict[str, dict[tuple[tuple[str, str], ...], float]]:
+        with self._lock:
+            return {name: dict(series) for name, series in self._values.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+METRICS = MetricsRegistry()
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...] | list[tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    rendered = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels)
+    return "{" + rendered + "}"
+
+
+def _format_value(value: float) -> str:
+    if not math.isfinite(value):
+        # int() raises on these; the text format spells them +Inf, -Inf and NaN.
+        return "NaN" if math.isnan(value) else ("+Inf" if value > 0 else "-Inf")
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _render_cache_hit_ratio(values: dict[str, dict[tuple[tuple[str, str], ...], float]]) -> list[str]:
+    per_cache: dict[str, dict[str, float]] = {}
+    for labels, value in values.get("plane_spotter_cache_requests_total", {}).items():
+        label_map = dict(labels)
+        results = per_cache.setdefault(label_map.get("cache", ""), {})
+        result = label_map.get("result", "")
+        results[result] = results.get(result, 0.0) + value
+
+    if not per_cache:
+        return []
+
+    lines = [
+        "# HELP plane_spotter_cache_hit_ratio Share of cache lookups that were hits since start.",
+        "# TYPE plane_spotter_cache_hit_ratio gauge",
+    ]
+    for cache_name, results in sorted(per_cache.items()):
+        total = sum(results.values())
+        ratio = results.get("hit", 0.0) / total if total else 0.0
+        lines.append(f"plane_spotter_cache_hit_ratio{_format_labels([('cache', cache_name)])} {ratio:.6f}")
+    return lines
+
+
+def _render_latency_histograms() -> list[str]:
+    histograms = LATENCY_HISTOGRAMS.snapshot()
+    if not histograms:
+        return []
+
+    name = "plane_spotter_api_request_duration_seconds"
+    lines = [
+        f"# HELP {name} Outbound API latency by provider, endpoint and status class.",
+        f"# TYPE {name} histogram",
+    ]
+    for (provider, endpoint, status), (buckets, duration_sum_ms) in sorted(histograms.items()):
+        base_labels = [("endpoint", endpoint), ("provider", provider), ("status_class", status)]
+        cumulative = 0
+        for bound_ms, count in zip(LATENCY_BUCKET_BOUNDS_MS, buckets):
+            cumulative += count
+            labels = base_labels + [("le", f"{bound_ms / 1000.0:g}")]
+            lines.append(f"{name}_bucket{_format_labels(labels)} {cumulative}")
+        total = sum(buckets)
+        lines.append(f"{name}_bucket{_format_labels(base_labels + [('le', '+Inf')])} {total}")
+        lines.append(f"{name}_sum{_format_labels(base_labels)} {duration_sum_ms / 1000.0:.6f}")
+        lines.append(f"{name}_count{_format_labels(base_labels)} {total}")
+    return lines
+
+
+def render_prometheus() -> str:
+    values = METRICS.snapshot()
+    lines: list[str] = []
+    for name, (metric_type, help_text) in METRIC_DEFINITIONS.items():
+        series = values.get(name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in sorted(series.items()):
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    lines.extend(_render_cache_hit_ratio(values))
+    lines.extend(_render_latency_histograms())
+    return "\n".join(lines) + "\n"
+
+
+def load_metrics_config() -> dict[str, Any]:
+    raw = cfg.get_config("metrics") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    try:
+        port = int(raw.get("port", 9108))
+    except (TypeError, ValueError):
+        port = 9108
+
+    return {
+        "enabled": bool(raw.get("enabled", False)),
+        "host": str(raw.get("host") or "127.0.0.1"),
+        "port": port,
+    }
+
+
+async def _metrics_handler(_request: web.Request) -> web.Response:
+    return web.Response(body=render_prometheus().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def start_metrics_server() -> web.AppRunner | None:
+    """Start the /metrics endpoint when ``metrics.enabled`` is set. Returns the runner to stop later."""
+    metrics_cfg = load_metrics_config()
+    if not metrics_cfg["enabled"]:
+        return None
+
+    app = web.Application()
+    app.router.add_get("/metrics", _metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, metrics_cfg["host"], metrics_cfg["port"])
+        await site.start()
+    except OSError as exc:
+        logger.warning(f"Unable to start metrics endpoint on {metrics_cfg['host']}:{metrics_cfg['port']}: {exc}")
+        await runner.cleanup()
+        return None
+
+    logger.info(f"Serving Prometheus metrics on http://{metrics_cfg['host']}:{metrics_cfg['port']}/metrics")
+    return runner
+
+
+async def stop_metrics_server(runner: web.AppRunner | None) -> None:
+    if runner is not None:
+        await runner.cleanup()
+
+
+def record_cycle_metrics(duration_seconds: float, flights_by_stage: dict[str, int]) -> None:
+    METRICS.inc("plane_spotter_cycles_total")
+    METRICS.set("plane_spotter_cycle_duration_seconds", duration_seconds)
+    METRICS.inc("plane_spotter_cycle_duration_seconds_total", duration_seconds)
+    for stage, count in flights_by_stage.items():
+        METRICS.set("plane_spotter_cycle_flights", count, stage=stage)
+        METRICS.inc("plane_spotter_flights_total", count, stage=stage)
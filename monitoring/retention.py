@@ -0,0 +1,284 @@
+"""Retention, hourly downsampling and compaction for usage_metrics.db.
+
+Run offline against a copy of the database with::
+
+    python -m monitoring.retention --db database/usage_metrics.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+import config.config as cfg
+from monitoring.api_usage import _DB_LOCK, _ensure_schema, _get_sink
+
+
+_DEFAULT_RAW_EVENT_DAYS = 30
+_DEFAULT_COMPACTION_INTERVAL_HOURS = 24.0
+_LAST_COMPACTION_KEY = "last_compaction_at"
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_retention_config() -> dict[str, Any]:
+    raw = cfg.get_config("usage_monitoring.retention") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    return {
+        "enabled": bool(raw.get("enabled", True)),
+        "raw_event_days": max(1, int(_as_float(raw.get("raw_event_days"), _DEFAULT_RAW_EVENT_DAYS))),
+        "compaction_interval_hours": max(
+            0.0,
+            _as_float(raw.get("compaction_interval_hours"), _DEFAULT_COMPACTION_INTERVAL_HOURS),
+        ),
+        "incremental_vacuum_pages": max(0, int(_as_float(raw.get("incremental_vacuum_pages"), 0))),
+    }
+
+
+def _hour_start(created_at: str) -> str:
+    return f"{created_at[:13]}:00:00+00:00"
+
+
+_UPSERT_HOURLY_SQL = """
+    INSERT INTO api_usage_hourly (
+        provider,
+        endpoint,
+        hour,
+        total_calls,
+        successful_calls,
+        blocked_calls,
+        total_cost_usd
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (provider, endpoint, hour) DO UPDATE SET
+        total_calls = total_calls + excluded.total_calls,
+        successful_calls = successful_calls + excluded.successful_calls,
+        blocked_calls = blocked_calls + excluded.blocked_calls,
+        total_cost_usd = total_cost_usd + excluded.total_cost_usd
+"""
+
+
+def _collect_hourly_rows(conn: sqlite3.Connection, cutoff: str) -> tuple[list[tuple[Any, ...]], int]:
+    totals: dict[tuple[str, str, str], list[float]] = {}
+    event_count = 0
+    cursor = conn.execute(
+        """
+        SELECT provider, endpoint, success, blocked, estimated_cost_usd, created_at
+        FROM api_usage_events
+        WHERE created_at < ?
+        """,
+        (cutoff,),
+    )
+    while True:
+        rows = cursor.fetchmany(5000)
+        if not rows:
+            break
+        for provider, endpoint, success, blocked, cost, created_at in rows:
+            event_count += 1
+            key = (provider, endpoint, _hour_start(created_at))
+            bucket = totals.get(key)
+            if bucket is None:
+                bucket = totals[key] = [0, 0, 0, 0.0]
+            bucket[0] += 1
+            bucket[1] += int(success or 0)
+            bucket[2] += int(blocked or 0)
+            bucket[3] += _as_float(cost, 0.0)
+    return [
+        (provider, endpoint, hour, int(calls), int(ok), int(blocked), cost)
+        for (provider, endpoint, hour), (calls, ok, blocked, cost) in totals.items()
+    ], event_count
+
+
+def _vacuum(conn: sqlite3.Connection, pages: int, convert_auto_vacuum: bool) -> dict[str, int]:
+    freelist_before = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+    auto_vacuum_mode = int(conn.execute("PRAGMA auto_vacuum").fetchone()[0])
+    if auto_vacuum_mode != 2:
+        if convert_auto_vacuum:
+            # Switching an existing file to incremental mode needs one full VACUUM.
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            # A full VACUUM rewrites the file while event writes wait; leave it to the offline copy.
+            logger.info(
+                "usage_metrics.db predates incremental auto-vacuum; freed pages are reused but not returned. "
+                "Run `python -m monitoring.retention` and swap in the compacted copy to convert it."
+            )
+    elif pages > 0:
+        conn.execute(f"PRAGMA incremental_vacuum({pages})")
+    else:
+        conn.execute("PRAGMA incremental_vacuum")
+    freelist_after = int(conn.execute("PRAGMA freelist_count").fetchone()[0])
+    return {
+        "freelist_pages_before": freelist_before,
+        "freelist_pages_after": freelist_after,
+        "page_count": int(conn.execute("PRAGMA page_count").fetchone()[0]),
+    }
+
+
+def compact_usage_events(
+    conn: sqlite3.Connection,
+    *,
+    raw_event_days: int,
+    incremental_vacuum_pages: int = 0,
+    convert_auto_vacuum: bool = False,
+    now: datetime | None = None,
+) -> dict[str, Any]:
+    """Fold raw events older than ``raw_event_days`` into api_usage_hourly, delete them and vacuum.
+
+    api_usage_monthly and api_usage_latency already hold these events (the
+    sink writes both with them) and are left untouched, so budget checks and
+    per-status latency history keep their totals.
+    A file without incremental auto-vacuum is only converted (one full
+    ``VACUUM``) when ``convert_auto_vacuum`` is set, as the offline copy does.
+    """
+    current = now or datetime.now(timezone.utc)
+    cutoff = (current - timedelta(days=raw_event_days)).isoformat()
+
+    with conn:
+        hourly_rows, event_count = _collect_hourly_rows(conn, cutoff)
+        conn.executemany(_UPSERT_HOURLY_SQL, hourly_rows)
+        conn.execute("DELETE FROM api_usage_events WHERE created_at < ?", (cutoff,))
+        conn.execute(
+            "INSERT OR REPLACE INTO api_usage_meta (key, value) VALUES (?, ?)",
+            (_LAST_COMPACTION_KEY, current.isoformat()),
+        )
+
+    vacuum_report = _vacuum(conn, incremental_vacuum_pages, convert_auto_vacuum)
+    return {
+        "cutoff": cutoff,
+        "events_compacted": event_count,
+        "hourly_rows_touched": len(hourly_rows),
+        **vacuum_report,
+    }
+
+
+def _compaction_due(conn: sqlite3.Connection, interval_hours: float, now: datetime) -> bool:
+    row = conn.execute(
+        "SELECT value FROM api_usage_meta WHERE key = ?",
+        (_LAST_COMPACTION_KEY,),
+    ).fetchone()
+    if row is None:
+        return True
+    try:
+        last_run = datetime.fromisoformat(row[0])
+    except ValueError:
+        return True
+    return now - last_run >= timedelta(hours=interval_hours)
+
+
+def run_usage_retention(*, force: bool = False) -> dict[str, Any] | None:
+    """Compact the live database if retention is enabled and the interval elapsed."""
+    retention_cfg = load_retention_config()
+    if not retention_cfg["enabled"] and not force:
+        return None
+
+    try:
+        sink = _get_sink()
+        sink.flush()
+        now = datetime.now(timezone.utc)
+        with _DB_LOCK:
+            if not force and not _compaction_due(sink.connection, retention_cfg["compaction_interval_hours"], now):
+                return None
+            report = compact_usage_events(
+                sink.connection,
+                raw_event_days=retention_cfg["raw_event_days"],
+                incremental_vacuum_pages=retention_cfg["incremental_vacuum_pages"],
+                now=now,
+            )
+        logger.info(f"Usage metrics compaction finished: {report}")
+        return report
+    except Exception as exc:
+        logger.warning(f"Usage metrics compaction failed: {exc}")
+        return None
+
+
+def compact_database_copy(
+    source_path: Path,
+    output_path: Path,
+    *,
+    raw_event_days: int,
+    incremental_vacuum_pages: int = 0,
+) -> dict[str, Any]:
+    """Copy ``source_path`` with the sqlite backup API and compact the copy."""
+    if output_path.resolve() == source_path.resolve():
+        raise ValueError("Output path must differ from the source database")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.unlink(missing_ok=True)
+
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    target = sqlite3.connect(output_path)
+    try:
+        source.backup(target)
+        _ensure_schema(target)
+        size_before = output_path.stat().st_size
+        report = compact_usage_events(
+            target,
+            raw_event_days=raw_event_days,
+            incremental_vacuum_pages=incremental_vacuum_pages,
+            convert_auto_vacuum=True,
+        )
+    finally:
+        source.close()
+        target.close()
+
+    return {
+        "source": str(source_path),
+        "output": str(output_path),
+        "size_bytes_before": size_before,
+        "size_bytes_after": output_path.stat().st_size,
+        **report,
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compact a copy of usage_metrics.db")
+    parser.add_argument("--db", required=True, help="Path to the source usage_metrics.db")
+    parser.add_argument(
+        "--output",
+        default="",
+        help="Where to write the compacted copy (default: <db>.compacted.db)",
+    )
+    parser.add_argument(
+        "--raw-event-days",
+        type=int,
+        default=None,
+        help="Override usage_monitoring.retention.raw_event_days",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    retention_cfg = load_retention_config()
+    source_path = Path(args.db)
+    output_path = Path(args.output) if args.output else source_path.with_suffix(".compacted.db")
+    try:
+        report = compact_database_copy(
+            source_path,
+            output_path,
+            raw_event_days=args.raw_event_days or retention_cfg["raw_event_days"],
+            incremental_vacuum_pages=retention_cfg["incremental_vacuum_pages"],
+        )
+        print(json.dumps({"ok": True, "report": report}, ensure_ascii=True, indent=2))
+        return 0
+    except Exception as exc:
+        print(json.dumps({"ok": False, "error": str(exc)}, ensure_ascii=True, indent=2))
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
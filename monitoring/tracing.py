@@ -0,0 +1,398 @@
+"""Lightweight per-cycle tracing exported as OTLP-shaped JSON lines.
+
+Each ``start_trace`` block becomes one line in the trace file, shaped like an
+OTLP/JSON ``ExportTraceServiceRequest`` so it can be replayed into an
+OpenTelemetry collector. Finished traces are serialized and written on a
+single writer thread, so a cycle never waits on the trace file. Print the critical path of a cycle with::
+
+    python -m monitoring.tracing --file logs/traces.jsonl --last
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+import config.config as cfg
+
+
+SERVICE_NAME = "plane-spotter"
+SCOPE_NAME = "plane_spotter"
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_DEFAULT_TRACE_FILE = "logs/traces.jsonl"
+_DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+_DEFAULT_BACKUP_COUNT = 5
+
+_WRITE_LOCK = threading.Lock()
+_QUEUE: queue.Queue[tuple[_Trace, dict[str, Any]]] = queue.Queue()
+_THREAD: threading.Thread | None = None
+_THREAD_LOCK = threading.Lock()
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self) -> None:
+        self.trace_id = os.urandom(16).hex()
+        self.spans: list[Span] = []
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_span_id", "name", "start_ns", "end_ns", "attributes", "status", "message")
+
+    def __init__(
+        self,
+        trace: _Trace,
+        name: str,
+        parent_span_id: str | None,
+        attributes: dict[str, Any],
+        start_ns: int | None = None,
+    ) -> None:
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes
+        self.status = STATUS_UNSET
+        self.message: str | None = None
+        trace.spans.append(self)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.message = message
+
+    def finish(self, end_ns: int | None = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = end_ns if end_ns is not None else time.time_ns()
+
+
+_CURRENT_SPAN: ContextVar[Span | None] = ContextVar("plane_spotter_current_span", default=None)
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_tracing_config() -> dict[str, Any]:
+    raw = cfg.get_config("tracing") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    return {
+        "enabled": bool(raw.get("enabled", True)),
+        "sample_rate": min(1.0, max(0.0, _as_float(raw.get("sample_rate"), 1.0))),
+        "file": str(raw.get("file") or _DEFAULT_TRACE_FILE),
+        "max_bytes": max(1024, int(_as_float(raw.get("max_bytes"), _DEFAULT_MAX_BYTES))),
+        "backup_count": max(0, int(_as_float(raw.get("backup_count"), _DEFAULT_BACKUP_COUNT))),
+    }
+
+
+def _resolve_trace_path(raw_path: str) -> Path:
+    path = Path(raw_path)
+    if path.is_absolute():
+        return path
+    return Path(__file__).resolve().parent.parent / path
+
+
+def current_span() -> Span | None:
+    return _CURRENT_SPAN.get()
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Open a root span; the finished tree is exported when the block exits.
+
+    Yields ``None`` when tracing is disabled or the trace was not sampled, in
+    which case nested ``span`` blocks are no-ops.
+    """
+    tracing_cfg = load_tracing_config()
+    if not tracing_cfg["enabled"] or random.random() >= tracing_cfg["sample_rate"]:
+        token = _CURRENT_SPAN.set(None)
+        try:
+            yield None
+        finally:
+            _CURRENT_SPAN.reset(token)
+        return
+
+    trace = _Trace()
+    root = Span(trace, name, None, dict(attributes))
+    token = _CURRENT_SPAN.set(root)
+    try:
+        yield root
+    except BaseException as exc:
+        root.set_error(str(exc) or type(exc).__name__)
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        root.finish()
+        _submit(trace, tracing_cfg)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    parent = _CURRENT_SPAN.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent.span_id, dict(attributes))
+    token = _CURRENT_SPAN.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.set_error(str(exc) or type(exc).__name__)
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        child.finish()
+
+
+def record_completed_span(name: str, duration_ms: float | None, *, error: str | None = None, **attributes: Any) -> None:
+    """Attach an already-finished operation (e.g. an HTTP call) under the current span."""
+    parent = _CURRENT_SPAN.get()
+    if parent is None:
+        return
+
+    end_ns = time.time_ns()
+    start_ns = end_ns - int(max(0.0, duration_ms or 0.0) * 1_000_000)
+    child = Span(parent.trace, name, parent.span_id, dict(attributes), start_ns=start_ns)
+    if error:
+        child.set_error(error)
+    child.finish(end_ns)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def _otlp_span(item: Span) -> dict[str, Any]:
+    status: dict[str, Any] = {"code": item.status}
+    if item.message:
+        status["message"] = item.message
+    payload: dict[str, Any] = {
+        "traceId": item.trace.trace_id,
+        "spanId": item.span_id,
+        "name": item.name,
+        "kind": 1,
+        "startTimeUnixNano": str(item.start_ns),
+        "endTimeUnixNano": str(item.end_ns if item.end_ns is not None else time.time_ns()),
+        "attributes": _otlp_attributes(item.attributes),
+        "status": status,
+    }
+    if item.parent_span_id:
+        payload["parentSpanId"] = item.parent_span_id
+    return payload
+
+
+def trace_to_otlp(trace: _Trace) -> dict[str, Any]:
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": SCOPE_NAME},
+                        "spans": [_otlp_span(item) for item in trace.spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def _rotate(path: Path, backup_count: int) -> None:
+    if backup_count <= 0:
+        path.unlink(missing_ok=True)
+        return
+    for index in range(backup_count - 1, 0, -1):
+        source = path.with_name(f"{path.name}.{index}")
+        if source.exists():
+            source.replace(path.with_name(f"{path.name}.{index + 1}"))
+    path.replace(path.with_name(f"{path.name}.1"))
+
+
+def export_trace(trace: _Trace, tracing_cfg: dict[str, Any] | None = None) -> Path:
+    tracing_cfg = tracing_cfg or load_tracing_config()
+    path = _resolve_trace_path(tracing_cfg["file"])
+    line = json.dumps(trace_to_otlp(trace), separators=(",", ":")) + "\n"
+
+    with _WRITE_LOCK:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists() and path.stat().st_size + len(line) > tracing_cfg["max_bytes"]:
+            _rotate(path, tracing_cfg["backup_count"])
+        with open(path, "a", encoding="utf-8") as file_handle:
+            file_handle.write(line)
+    return path
+
+
+def _run_writer() -> None:
+    while True:
+        trace, tracing_cfg = _QUEUE.get()
+        try:
+            export_trace(trace, tracing_cfg)
+        except Exception as exc:  # pragma: no cover - tracing must never break a cycle
+            logger.warning(f"Unable to export trace {trace.trace_id}: {exc}")
+        finally:
+            _QUEUE.task_done()
+
+
+def _submit(trace: _Trace, tracing_cfg: dict[str, Any]) -> None:
+    global _THREAD
+    if _THREAD is None:
+        with _THREAD_LOCK:
+            if _THREAD is None:
+                _THREAD = threading.Thread(target=_run_writer, name="trace-writer", daemon=True)
+                _THREAD.start()
+    _QUEUE.put((trace, tracing_cfg))
+
+
+def flush_traces() -> None:
+    """Block until every finished trace has been written."""
+    if _THREAD is not None:
+        _QUEUE.join()
+
+
+atexit.register(flush_traces)
+
+
+def _load_spans(line: str) -> list[dict[str, Any]]:
+    payload = json.loads(line)
+    spans: list[dict[str, Any]] = []
+    for resource_spans in payload.get("resourceSpans", []):
+        for scope_spans in resource_spans.get("scopeSpans", []):
+            spans.extend(scope_spans.get("spans", []))
+    return spans
+
+
+def critical_path(spans: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Return the chain of spans that bounds the root span's end time.
+
+    Walks backwards from each span's end: the child that finished last is on the
+    path, then the child that finished last before that one started, and so on.
+    """
+    by_parent: dict[str | None, list[dict[str, Any]]] = {}
+    for item in spans:
+        by_parent.setdefault(item.get("parentSpanId"), []).append(item)
+
+    roots = by_parent.get(None, [])
+    if not roots:
+        return []
+
+    def walk(node: dict[str, Any], depth: int) -> list[dict[str, Any]]:
+        start = int(node["startTimeUnixNano"])
+        end = int(node["endTimeUnixNano"])
+        children = sorted(
+            by_parent.get(node["spanId"], []),
+            key=lambda child: int(child["endTimeUnixNano"]),
+            reverse=True,
+        )
+        chain: list[list[dict[str, Any]]] = []
+        cursor = end
+        for child in children:
+            child_end = int(child["endTimeUnixNano"])
+            if child_end > cursor or child_end < start:
+                continue
+            chain.append(walk(child, depth + 1))
+            cursor = int(child["startTimeUnixNano"])
+
+        covered = sum(
+            int(child["endTimeUnixNano"]) - int(child["startTimeUnixNano"])
+            for child in (segment[0]["span"] for segment in chain)
+        )
+        entry = {
+            "span": node,
+            "depth": depth,
+            "duration_ms": (end - start) / 1_000_000,
+            "self_ms": max(0, (end - start) - covered) / 1_000_000,
+        }
+        path = [entry]
+        for segment in reversed(chain):
+            path.extend(segment)
+        return path
+
+    return walk(roots[0], 0)
+
+
+def _format_critical_path(path: list[dict[str, Any]]) -> str:
+    lines = []
+    for entry in path:
+        item = entry["span"]
+        indent = "  " * entry["depth"]
+        lines.append(
+            f"{indent}{item['name']}  total={entry['duration_ms']:.1f}ms  self={entry['self_ms']:.1f}ms"
+        )
+    return "\n".join(lines)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Print the critical path of a recorded cycle trace")
+    parser.add_argument("--file", default="", help="Trace JSONL file (default: tracing.file from config)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--trace-id", default="", help="Trace id to inspect")
+    group.add_argument("--last", action="store_true", help="Inspect the most recent trace (default)")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    flush_traces()
+    path = _resolve_trace_path(args.file or load_tracing_config()["file"])
+    if not path.exists():
+        print(f"Trace file not found: {path}")
+        return 1
+
+    selected: list[dict[str, Any]] | None = None
+    with open(path, "r", encoding="utf-8") as file_handle:
+        for line in file_handle:
+            if not line.strip():
+                continue
+            spans = _load_spans(line)
+            if not args.trace_id or (spans and spans[0].get("traceId") == args.trace_id):
+                selected = spans
+                if args.trace_id:
+                    break
+
+    if not selected:
+        print("No matching trace found")
+        return 1
+
+    print(f"Trace {selected[0].get('traceId')}")
+    print(_format_critical_path(critical_path(selected)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -19,7 +19,10 @@ import socials.instagram as ig
 import socials.telegram as tg
 import socials.threads as th
 import socials.twitter as tw
-from monitoring.api_usage import record_api_event
+from monitoring.api_usage import enforce_circuit_or_raise, record_api_event
+from monitoring.circuit_breaker import CircuitOpenError, get_breaker
+from monitoring.cycle_ledger import note_post
+from monitoring.tracing import span
 from socials.message_builder import MessageContext, build_message_context, build_platform_context
 from socials.message_policy import resolve_message_for_platform
 from utils.image_finder import get_first_image_url_jp, get_first_image_url_pp
@@ -273,7 +276,8 @@ async def call_socials(flight_data, interesting):
                     logger.warning(f"Unsupported image provider '{provider}' in config, skipping")
                     continue
 
-                image_url = await asyncio.to_thread(resolver, registration)
+                with span("image.lookup", provider=provider):
+                    image_url = await asyncio.to_thread(resolver, registration)
                 if image_url:
                     image_provider = provider
                     break
@@ -286,7 +290,8 @@ async def call_socials(flight_data, interesting):
             logger.debug(
                 f"Found image at {image_url} from {image_provider or 'unknown-provider'}, downloading..."
             )
-            temp_image_path = await asyncio.to_thread(_download_image, image_url, "socials")
+            with span("image.download"):
+                temp_image_path = await asyncio.to_thread(_download_image, image_url, "socials")
             if temp_image_path:
                 logger.debug(f"Image saved to {temp_image_path}")
 
@@ -351,9 +356,22 @@ async def call_socials(flight_data, interesting):
             )
 
             try:
-                await sender(platform_context, image_path=temp_image_path)
-            except Exception as exc:
-                logger.error(f"Failed while sending message to {platform_name}: {exc}")
+                enforce_circuit_or_raise(platform_name, f"SEND /{platform_name}", method="POST")
+            except CircuitOpenError as exc:
+                logger.warning(f"Skipping {platform_name}: {exc}")
+                continue
+
+            breaker = get_breaker(platform_name)
+            with span("send", platform=platform_name) as send_span:
+                try:
+                    await sender(platform_context, image_path=temp_image_path)
+                    breaker.record_success()
+                    note_post(platform_name)
+                except Exception as exc:
+                    breaker.record_failure()
+                    if send_span:
+                        send_span.set_error(str(exc))
+                    logger.error(f"Failed while sending message to {platform_name}: {exc}")
 
     finally:
         # Clean up temporary image
@@ -17,6 +17,7 @@ import config.config as cfg
 from monitoring.api_usage import record_api_event
 from socials import message_policy as mp
 from socials.message_builder import MessageContext, build_message_context, render_flight_message
+from utils.timestamps import parse_timestamp
 
 
 def is_admin(user_id: int) -> bool:
@@ -625,7 +626,9 @@ async def schedule_telegram(
 
     async def send_message_task() -> None:
         try:
-            scheduled_time = datetime.strptime(str(flight_data["scheduled_time"]), "%Y-%m-%d %H:%M")
+            scheduled_time = parse_timestamp(flight_data["scheduled_time"])
+            if scheduled_time is None:
+                raise ValueError(f"unparseable scheduled_time {flight_data['scheduled_time']!r}")
             send_time = scheduled_time - timedelta(hours=2)
             delay_seconds = (send_time - datetime.now()).total_seconds()
 
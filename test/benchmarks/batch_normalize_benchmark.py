@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from loguru import logger  # noqa: E402
+
+import utils.data_processing as dp  # noqa: E402
+from utils import clock  # noqa: E402
+from utils.flight import Flight  # noqa: E402
+from utils.flight_batch import normalize_page  # noqa: E402
+
+
+DATA_DIR = PROJECT_ROOT / "api" / "data"
+FIXTURES = (
+    ("adb", "arrivals", "adb_data_arrivals.json", "arrivals"),
+    ("adb", "departures", "adb_data_departures.json", "departures"),
+    ("aeroapi", "arrivals", "aeroapi_data_scheduled_arrivals.json", "scheduled_arrivals"),
+    ("aeroapi", "departures", "aeroapi_data_scheduled_departures.json", "scheduled_departures"),
+)
+_IDENT_FIELDS = ("number", "callSign", "ident", "ident_iata", "ident_icao", "atc_ident", "fa_flight_id")
+
+Page = tuple[str, str, list[dict[str, Any]]]
+
+
+def _build_pages(target_flights: int) -> list[Page]:
+    """Repeat the fixtures with distinct flight identifiers until at least ``target_flights`` flights."""
+    fixtures = [
+        (provider, movement, json.loads((DATA_DIR / name).read_text(encoding="utf-8"))[root])
+        for provider, movement, name, root in FIXTURES
+    ]
+    per_copy = sum(len(flights) for _provider, _movement, flights in fixtures)
+    pages: list[Page] = []
+    for copy in range(max(1, -(-target_flights // per_copy))):
+        for provider, movement, flights in fixtures:
+            page = []
+            for flight in flights:
+                clone = dict(flight)
+                for field in _IDENT_FIELDS:
+                    if isinstance(clone.get(field), str):
+                        clone[field] = f"{clone[field]}{copy}"
+                page.append(clone)
+            pages.append((provider, movement, page))
+    return pages
+
+
+def _per_flight(pages: list[Page], start: datetime, end: datetime) -> list[Flight]:
+    """The previous path: one normalizer call per flight, then check_existing and a time filter per record."""
+    merged: dict[str, Flight] = {}
+    for provider, movement, flights in pages:
+        for flight in flights:
+            try:
+                if provider == "aeroapi":
+                    record = dp.process_flight_data_aeroapi(flight)
+                    if not record:
+                        continue
+                else:
+                    record = dp.process_flight_data_adb(flight, movement)
+            except Exception:
+                continue
+            if start <= record.scheduled_time < end:
+                dp.check_existing(merged, record)
+    return list(merged.values())
+
+
+def _batched(pages: list[Page], start: datetime, end: datetime) -> list[Flight]:
+    merged: dict[str, Flight] = {}
+    for provider, movement, flights in pages:
+        for record in normalize_page(provider, movement, flights).within(start, end).dedupe().records():
+            dp.check_existing(merged, record)
+    return list(merged.values())
+
+
+def _measure(path: Callable[[list[Page], datetime, datetime], list[Flight]], pages: list[Page], repeats: int) -> dict[str, Any]:
+    flights = sum(len(page) for _provider, _movement, page in pages)
+    start, end = datetime(2000, 1, 1), datetime(2100, 1, 1)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        path(pages, start, end)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "best_seconds": round(best, 4),
+        "flights_per_second": round(flights / best, 1),
+    }
+
+
+def run(target_flights: int, repeats: int) -> dict[str, Any]:
+    pages = _build_pages(target_flights)
+    window = (datetime(2000, 1, 1), datetime(2100, 1, 1))
+    fixed_now = datetime.now().replace(microsecond=0)
+    with clock.use_clock(lambda: fixed_now):
+        identical = _per_flight(pages, *window) == _batched(pages, *window)
+        before = _measure(_per_flight, pages, repeats)
+        after = _measure(_batched, pages, repeats)
+    return {
+        "flights": sum(len(page) for _provider, _movement, page in pages),
+        "pages": len(pages),
+        "identical_records": identical,
+        "before_per_flight": before,
+        "after_batched": after,
+        "speedup": round(after["flights_per_second"] / max(before["flights_per_second"], 1e-9), 2),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare per-flight and batched normalization on repeated api/data fixtures")
+    parser.add_argument("--flights", type=int, default=12000, help="Minimum number of flights to normalize")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per path; the best is reported")
+    parser.add_argument(
+        "--debug-sink",
+        action="store_true",
+        help="Keep a DEBUG-level sink attached, as main.py does with its debug log file",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logger.remove()
+    if args.debug_sink:
+        logger.add(lambda _message: None, level="DEBUG")
+    print(json.dumps(run(max(1, args.flights), max(1, args.repeats)), ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import config.config as cfg  # noqa: E402
+
+
+HOT_KEYS = (
+    "usage_monitoring",
+    "message_policy",
+    "image_finder",
+    "api.airport_icao",
+)
+
+
+def _uncached_get_config(key: str) -> Any:
+    """Reproduce the previous get_config behaviour: parse and merge on every call."""
+    current: Any = cfg._build_config()
+    for segment in key.split("."):
+        if not isinstance(current, dict) or segment not in current:
+            return None
+        current = current[segment]
+    return current
+
+
+def _measure(getter: Callable[[str], Any], duration_seconds: float) -> dict[str, float]:
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + duration_seconds
+    while True:
+        for key in HOT_KEYS:
+            getter(key)
+        calls += len(HOT_KEYS)
+        if time.perf_counter() >= deadline:
+            break
+    elapsed = time.perf_counter() - started
+    return {
+        "calls": calls,
+        "elapsed_seconds": round(elapsed, 4),
+        "calls_per_second": round(calls / elapsed, 1),
+    }
+
+
+def run(duration_seconds: float) -> dict[str, Any]:
+    cfg.invalidate_config_cache()
+    before = _measure(_uncached_get_config, duration_seconds)
+    after = _measure(cfg.get_config, duration_seconds)
+    return {
+        "config_path": str(cfg.CONFIG_PATH),
+        "keys": list(HOT_KEYS),
+        "before_uncached": before,
+        "after_snapshot": after,
+        "speedup": round(after["calls_per_second"] / max(before["calls_per_second"], 1e-9), 1),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure get_config throughput with and without the snapshot")
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=2.0,
+        help="Seconds to spend on each variant",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    print(json.dumps(run(args.duration), ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from loguru import logger  # noqa: E402
+
+import utils.data_processing as dp  # noqa: E402
+
+
+DATA_DIR = PROJECT_ROOT / "api" / "data"
+FIXTURES = (
+    ("adb", "arrivals", "adb_data_arrivals.json", "arrivals"),
+    ("adb", "departures", "adb_data_departures.json", "departures"),
+    ("aeroapi", "arrivals", "aeroapi_data_scheduled_arrivals.json", "scheduled_arrivals"),
+    ("aeroapi", "departures", "aeroapi_data_scheduled_departures.json", "scheduled_departures"),
+)
+
+
+def _legacy_adb(flight: dict[str, Any], movement: str) -> dict[str, Any]:
+    """Reproduce the previous ADB normalizer: a 15-key dict with "null" placeholders."""
+    try:
+        registration = flight["aircraft"]["reg"]
+    except Exception:
+        registration = "null"
+    side = movement.removesuffix("s")
+    if movement == "departures":
+        origin_icao, origin_name = "LEMD", "Madrid"
+        destination_icao = flight["arrival"]["airport"]["icao"]
+        destination_name = flight["arrival"]["airport"]["name"]
+    else:
+        origin_icao = flight["departure"]["airport"]["icao"]
+        origin_name = flight["departure"]["airport"]["name"]
+        destination_icao, destination_name = "LEMD", "Madrid"
+    try:
+        scheduled_time = datetime.strptime(flight[side]["revisedTime"]["local"][:-6], "%Y-%m-%d %H:%M")
+    except Exception:
+        scheduled_time = datetime.now()
+    single_flight_data = {
+        "flight_name": "".join(flight.get("callSign", "null").split()),
+        "flight_name_iata": flight.get("number", "null"),
+        "registration": registration,
+        "aircraft_name": flight["aircraft"].get("model", "null").strip(),
+        "aircraft_icao": None,
+        "airline": flight["airline"].get("icao", "null"),
+        "airline_name": flight["airline"].get("name", "null"),
+        "origin_icao": origin_icao,
+        "origin_name": origin_name,
+        "destination_icao": destination_icao,
+        "destination_name": destination_name,
+        "terminal": flight[side].get("terminal", "null"),
+        "scheduled_time": scheduled_time,
+        "last_update": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "diverted": "null",
+    }
+    logger.debug(f"Processed ADB flight data: {single_flight_data}")
+    return single_flight_data
+
+
+def _legacy_aeroapi(flight: dict[str, Any]) -> dict[str, Any] | None:
+    """Reproduce the previous AeroAPI normalizer."""
+    if "registration" not in flight:
+        return None
+
+    def first(keys: list[str]) -> Any:
+        return next((flight.get(k) for k in keys if flight.get(k) not in [None, "null"]), "null")
+
+    departure = flight.get("origin", {}).get("code_icao") == "LEMD"
+    if departure:
+        scheduled = first(["actual_out", "estimated_out", "scheduled_out", "actual_off", "estimated_off", "scheduled_off"])
+        terminal = flight.get("terminal_origin", "null")
+        origin_icao, origin_name = "LEMD", "Madrid"
+        destination_icao = flight.get("destination", {}).get("code_icao", "null")
+        destination_name = flight.get("destination", {}).get("name", "null")
+    else:
+        scheduled = first(["actual_in", "estimated_in", "scheduled_in", "actual_on", "estimated_on", "scheduled_on"])
+        terminal = flight.get("terminal_destination", "null")
+        origin_icao = flight.get("origin", {}).get("code_icao", "null")
+        origin_name = flight.get("origin", {}).get("name", "null")
+        destination_icao, destination_name = "LEMD", "Madrid"
+    single_flight_data = {
+        "flight_name": "".join(first(["atc_ident", "ident_icao"]).split()),
+        "flight_name_iata": first(["ident_iata", "null"]),
+        "registration": flight["registration"],
+        "aircraft_name": None,
+        "aircraft_icao": (flight.get("aircraft_type", "null") or "null").strip(),
+        "airline": flight.get("operator_icao", "null"),
+        "airline_name": flight.get("operator", "null"),
+        "origin_icao": origin_icao,
+        "origin_name": origin_name,
+        "destination_icao": destination_icao,
+        "destination_name": destination_name,
+        "terminal": terminal,
+        "scheduled_time": dp._parse_datetime(scheduled),
+        "last_update": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "diverted": flight.get("diverted", "null"),
+    }
+    logger.debug(f"Processed AeroAPI flight data: {single_flight_data}")
+    return single_flight_data
+
+
+Normalizer = Callable[[str, str, dict[str, Any]], Any]
+
+
+def _current(provider: str, movement: str, flight: dict[str, Any]) -> Any:
+    if provider == "aeroapi":
+        return dp.process_flight_data_aeroapi(flight)
+    return dp.process_flight_data_adb(flight, movement)
+
+
+def _previous(provider: str, movement: str, flight: dict[str, Any]) -> Any:
+    if provider == "aeroapi":
+        return _legacy_aeroapi(flight)
+    return _legacy_adb(flight, movement)
+
+
+def _load_payloads() -> list[tuple[str, str, str, str]]:
+    return [
+        (provider, movement, (DATA_DIR / name).read_text(encoding="utf-8"), root)
+        for provider, movement, name, root in FIXTURES
+    ]
+
+
+def _normalize_all(normalize: Normalizer, payloads: list[tuple[str, str, str, str]], copies: int) -> list[Any]:
+    records = []
+    for _ in range(copies):
+        for provider, movement, text, root in payloads:
+            # Parse per copy so each copy owns its strings, as successive cycles do.
+            for flight in json.loads(text)[root]:
+                try:
+                    record = normalize(provider, movement, flight)
+                except Exception:
+                    continue
+                if record is not None:
+                    records.append(record)
+    return records
+
+
+def _retained_bytes_per_flight(normalize: Normalizer, payloads: list[tuple[str, str, str, str]], copies: int) -> dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    records = _normalize_all(normalize, payloads, copies)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return {"flights": len(records), "bytes_per_flight": round(retained / max(len(records), 1), 1)}
+
+
+def _throughput(normalize: Normalizer, payloads: list[tuple[str, str, str, str]], duration_seconds: float) -> dict[str, Any]:
+    flights = [
+        (provider, movement, flight)
+        for provider, movement, text, root in payloads
+        for flight in json.loads(text)[root]
+    ]
+    normalized = 0
+    started = time.perf_counter()
+    deadline = started + duration_seconds
+    while time.perf_counter() < deadline:
+        for provider, movement, flight in flights:
+            try:
+                normalize(provider, movement, flight)
+            except Exception:
+                continue
+            normalized += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "flights": normalized,
+        "elapsed_seconds": round(elapsed, 4),
+        "flights_per_second": round(normalized / elapsed, 1),
+    }
+
+
+def run(duration_seconds: float, copies: int) -> dict[str, Any]:
+    payloads = _load_payloads()
+    report: dict[str, Any] = {"fixtures": [name for _p, _m, name, _r in FIXTURES], "copies": copies}
+    for label, normalize in (("before_dicts", _previous), ("after_records", _current)):
+        report[label] = {
+            "memory": _retained_bytes_per_flight(normalize, payloads, copies),
+            "throughput": _throughput(normalize, payloads, duration_seconds),
+        }
+    before = report["before_dicts"]
+    after = report["after_records"]
+    report["memory_ratio"] = round(
+        after["memory"]["bytes_per_flight"] / max(before["memory"]["bytes_per_flight"], 1e-9), 3
+    )
+    report["throughput_ratio"] = round(
+        after["throughput"]["flights_per_second"] / max(before["throughput"]["flights_per_second"], 1e-9), 3
+    )
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare Flight records with the previous flight dicts on the api/data fixtures")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds to spend normalizing with each variant")
+    parser.add_argument("--copies", type=int, default=20, help="Times the fixtures are normalized for the memory figure")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logger.remove()
+    print(json.dumps(run(args.duration, max(1, args.copies)), ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
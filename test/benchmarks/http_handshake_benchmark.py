@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils import http_client  # noqa: E402
+
+
+async def _ok(_request: web.Request) -> web.Response:
+    return web.json_response([{"id": 1}])
+
+
+def _cycle_requests(flights: int) -> list[tuple[str, str]]:
+    """(client, path) pairs shaped like one main() cycle."""
+    requests: list[tuple[str, str]] = []
+    for movement in ("arrivals", "departures"):
+        requests.extend(("aeroapi", f"/aeroapi/{movement}?page={page}") for page in range(3))
+        requests.append(("aerodatabox", f"/adb/{movement}"))
+    requests.append(("aeroapi", "/aeroapi/account/usage"))
+    requests.extend(("supabase", f"/rest/v1/index_{index}") for index in range(3))
+    for flight in range(flights):
+        requests.append(("supabase", f"/rest/v1/registrations?flight={flight}"))
+        requests.append(("supabase", f"/rest/v1/flight_history?flight={flight}"))
+    return requests
+
+
+async def _run_cycle(base_url: str, requests: list[tuple[str, str]], *, shared: bool) -> dict[str, Any]:
+    http_client.reset_connection_counts()
+    if shared:
+        await http_client.open_http_clients()
+
+    started = time.perf_counter()
+    try:
+        for client, path in requests:
+            if shared:
+                async with http_client.http_session(client) as session:
+                    async with session.get(f"{base_url}{path}") as response:
+                        await response.read()
+            else:
+                # Previous behaviour: a fresh ClientSession (and connection) per request.
+                session = http_client.build_session(client)
+                try:
+                    async with session.get(f"{base_url}{path}") as response:
+                        await response.read()
+                finally:
+                    await session.close()
+    finally:
+        if shared:
+            await http_client.close_http_clients()
+
+    counts = http_client.connection_counts()
+    return {
+        "requests": len(requests),
+        "handshakes": sum(counts.values()),
+        "handshakes_by_client": counts,
+        "elapsed_seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+async def run(flights: int) -> dict[str, Any]:
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", _ok)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        requests = _cycle_requests(flights)
+        before = await _run_cycle(base_url, requests, shared=False)
+        after = await _run_cycle(base_url, requests, shared=True)
+    finally:
+        await runner.cleanup()
+
+    return {
+        "flights": flights,
+        "before_session_per_request": before,
+        "after_shared_pool": after,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Count TCP/TLS handshakes for one simulated cycle")
+    parser.add_argument("--flights", type=int, default=150, help="Flights processed in the simulated cycle")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    print(json.dumps(asyncio.run(run(args.flights)), ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
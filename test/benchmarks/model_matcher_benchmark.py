@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.model_matcher import MODEL_ALIASES, ModelMatcher  # noqa: E402
+
+
+_MAKERS = ("Airbus", "Boeing", "Embraer", "Bombardier", "ATR", "Antonov", "Ilyushin", "Tupolev", "Sukhoi", "Comac")
+
+
+def _build_models(count: int) -> dict[str, dict[str, Any]]:
+    """The real alias designators plus synthetic ``Z####`` types named ``<maker> Z<n>``."""
+    models: dict[str, dict[str, Any]] = {code: {"name": None} for code in set(MODEL_ALIASES.values())}
+    for index in range(max(0, count - len(models))):
+        models[f"Z{index:04d}"] = {"name": f"{_MAKERS[index % len(_MAKERS)]} Z{index}"}
+    return models
+
+
+def _build_flights(count: int, models: dict[str, dict[str, Any]], distinct_names: int, seed: int) -> list[dict[str, Any]]:
+    """ADB-style flights: a name-only model, mostly not interesting, drawn from ``distinct_names`` names."""
+    rng = random.Random(seed)
+    named = [entry["name"] for entry in models.values() if entry["name"]]
+    names = []
+    for index in range(distinct_names):
+        roll = rng.random()
+        if roll < 0.05:
+            names.append(f"{rng.choice(named)} (winglets)")
+        elif roll < 0.15:
+            names.append(f"Airbus {rng.choice(list(MODEL_ALIASES))}")
+        else:
+            names.append(f"{rng.choice(_MAKERS)} Q{index} Freighter")
+    return [{"aircraft_icao": None, "aircraft_name": rng.choice(names)} for _ in range(count)]
+
+
+def _linear_scan(flight: dict[str, Any], model_db: dict[str, dict[str, Any]]) -> bool:
+    """The previous ``_is_interesting_model``: a substring test against every indexed name."""
+    aircraft_icao = str(flight.get("aircraft_icao") or "").strip().upper()
+    if aircraft_icao and aircraft_icao in model_db:
+        return True
+
+    aircraft_name = str(flight.get("aircraft_name") or "").lower()
+    if not aircraft_name:
+        return False
+
+    for model_entry in model_db.values():
+        model_name = str(model_entry.get("name") or "").strip().lower()
+        if model_name and model_name in aircraft_name:
+            return True
+
+    return False
+
+
+def _rate(flights: int, seconds: float) -> float:
+    return round(flights / max(seconds, 1e-9), 1)
+
+
+def run(model_count: int, flight_count: int, baseline_flights: int, distinct_names: int, seed: int) -> dict[str, Any]:
+    models = _build_models(model_count)
+    flights = _build_flights(flight_count, models, distinct_names, seed)
+    sample = flights[:baseline_flights]
+
+    started = time.perf_counter()
+    before = [_linear_scan(flight, models) for flight in sample]
+    linear_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matcher = ModelMatcher(models)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    uncached = [matcher._match_name(flight["aircraft_name"]) is not None for flight in flights]
+    uncached_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    cached = [matcher.match(flight["aircraft_icao"], flight["aircraft_name"]) is not None for flight in flights]
+    cached_seconds = time.perf_counter() - started
+
+    # Aliases only add matches; every flight the linear scan found must still be found.
+    missed = sum(1 for old, new in zip(before, cached) if old and not new)
+    return {
+        "models": len(models),
+        "flights": len(flights),
+        "distinct_aircraft_names": distinct_names,
+        "interesting_flights": sum(cached),
+        "linear_scan_matches_missed": missed,
+        "before_linear_scan": {
+            "flights_measured": len(sample),
+            "seconds": round(linear_seconds, 4),
+            "flights_per_second": _rate(len(sample), linear_seconds),
+        },
+        "after_matcher": {
+            "build_seconds": round(build_seconds, 4),
+            "uncached_seconds": round(uncached_seconds, 4),
+            "uncached_flights_per_second": _rate(len(flights), uncached_seconds),
+            "cached_seconds": round(cached_seconds, 4),
+            "cached_flights_per_second": _rate(len(flights), cached_seconds),
+        },
+        "speedup_uncached": round(_rate(len(flights), uncached_seconds) / max(_rate(len(sample), linear_seconds), 1e-9), 1),
+        "speedup_cached": round(_rate(len(flights), cached_seconds) / max(_rate(len(sample), linear_seconds), 1e-9), 1),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare the linear model-name scan with the compiled ModelMatcher")
+    parser.add_argument("--models", type=int, default=5000, help="Entries in the interesting-models index")
+    parser.add_argument("--flights", type=int, default=50000, help="Flights matched by the compiled matcher")
+    parser.add_argument(
+        "--baseline-flights",
+        type=int,
+        default=2000,
+        help="Flights matched by the linear scan (it is too slow for the full set); rates are compared",
+    )
+    parser.add_argument("--distinct-names", type=int, default=600, help="Distinct aircraft names among the flights")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    flights = max(1, args.flights)
+    result = run(
+        max(1, args.models),
+        flights,
+        min(flights, max(1, args.baseline_flights)),
+        max(1, args.distinct_names),
+        args.seed,
+    )
+    print(json.dumps(result, ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
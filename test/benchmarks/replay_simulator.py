@@ -0,0 +1,286 @@
+"""Replay recorded or synthetic cycles through ``main.main()`` and report pipeline performance.
+
+Each cycle runs under a simulated clock (``utils.clock``) and is fed from
+``ingestion.use_stream`` instead of the providers. The database is an
+``InMemoryProvider``, image lookups return nothing and every social sender is
+replaced by a recorder, so a replay never leaves the machine. Usage events,
+the monthly summary and retention go to a throwaway usage database, and cycle
+stats are captured with ``start_cycle(persist=False)`` and never reach the
+ledger, so nothing under ``database/`` is touched.
+
+    python3 test/benchmarks/replay_simulator.py --synthetic 12
+    python3 test/benchmarks/replay_simulator.py --archive --speed 600
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import config.config as cfg  # noqa: E402
+import main as app_main  # noqa: E402
+import monitoring.api_usage as api_usage  # noqa: E402
+import socials.socials_processing as sp  # noqa: E402
+from api import ingestion, raw_archive  # noqa: E402
+from monitoring.cycle_ledger import LEDGER_PHASES, CycleStats, start_cycle  # noqa: E402
+from test.memory_provider import InMemoryProvider  # noqa: E402
+from utils import clock  # noqa: E402
+
+
+_TIMESTAMP = re.compile(r"(\d{4}-\d{2}-\d{2})([ T])(\d{2}:\d{2})")
+_DEFAULT_INTERESTING_MODELS = {"A388": "A380", "B748": "747-8", "A359": "A350", "B77W": "777-300ER"}
+
+Cycle = tuple[datetime, dict[tuple[str, str], list[dict[str, Any]]]]
+
+
+def _shift_timestamps(value: Any, delta: timedelta) -> Any:
+    """Move every ``YYYY-MM-DD HH:MM`` / ``YYYY-MM-DDTHH:MM`` prefix in ``value`` by ``delta``."""
+    if isinstance(value, dict):
+        return {key: _shift_timestamps(item, delta) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_shift_timestamps(item, delta) for item in value]
+    if not isinstance(value, str):
+        return value
+
+    def shift(match: re.Match[str]) -> str:
+        moved = datetime.strptime(f"{match.group(1)} {match.group(3)}", "%Y-%m-%d %H:%M") + delta
+        return moved.strftime(f"%Y-%m-%d{match.group(2)}%H:%M")
+
+    return _TIMESTAMP.sub(shift, value)
+
+
+def _load_fixture(movement: str, provider: str) -> list[dict[str, Any]]:
+    for candidate in ingestion._preloaded_candidates(provider, movement, "LEMD"):
+        if candidate.exists():
+            with open(candidate, "r", encoding="utf-8") as file_handle:
+                payload = json.load(file_handle)
+            return payload.get(ingestion._payload_key(provider, movement)) or []
+    return []
+
+
+def _first_timestamp(flights: list[dict[str, Any]]) -> datetime | None:
+    match = _TIMESTAMP.search(json.dumps(flights[:1]))
+    if not match:
+        return None
+    return datetime.strptime(f"{match.group(1)} {match.group(3)}", "%Y-%m-%d %H:%M")
+
+
+def synthetic_cycles(count: int, interval: timedelta, start: datetime | None = None) -> list[Cycle]:
+    """``count`` cycles built from the ``api/data`` fixtures, re-timed so cycle ``k`` starts at ``start + k * interval``."""
+    fixtures = {source: _load_fixture(*source) for source in ingestion.source_order()}
+    anchors = [stamp for stamp in map(_first_timestamp, fixtures.values()) if stamp is not None]
+    if not anchors:
+        return []
+    base = min(anchors)
+    first = start or base
+    cycles: list[Cycle] = []
+    for index in range(count):
+        cycle_at = first + interval * index
+        delta = cycle_at - base
+        cycles.append((cycle_at, {source: _shift_timestamps(flights, delta) for source, flights in fixtures.items()}))
+    return cycles
+
+
+def archived_cycles(airport_icao: str, limit: int) -> list[Cycle]:
+    """The last ``limit`` complete cycles in the raw archive, oldest first."""
+    archive = raw_archive.get_raw_archive()
+    cycles: list[Cycle] = []
+    for cycle_started_at in archive.list_cycles(airport_icao=airport_icao, limit=limit):
+        sources = {}
+        for movement, provider in ingestion.source_order():
+            payload = archive.read_payload(
+                airport_icao=airport_icao,
+                provider=provider,
+                movement=movement,
+                cycle_started_at=cycle_started_at,
+            )
+            sources[(movement, provider)] = (payload or {}).get(raw_archive.payload_key(provider, movement)) or []
+        started = datetime.fromisoformat(cycle_started_at)
+        if started.tzinfo is not None:
+            started = started.astimezone().replace(tzinfo=None)
+        cycles.append((started, sources))
+    return cycles
+
+
+class _SimulatedClock:
+    def __init__(self, start: datetime) -> None:
+        self.current = start
+
+    def __call__(self) -> datetime:
+        return self.current
+
+
+@contextmanager
+def _stand_ins(provider: InMemoryProvider, posts: dict[str, int], stats: list[CycleStats]) -> Iterator[None]:
+    """Swap every outbound dependency of ``main`` for a local stand-in; restores the originals on exit."""
+    platforms = list(sp._build_sender_registry())
+
+    def recorder(platform: str):
+        async def send(_context, image_path=None) -> None:
+            posts[platform] = posts.get(platform, 0) + 1
+
+        return send
+
+    @contextmanager
+    def captured_cycle() -> Iterator[CycleStats]:
+        with start_cycle(persist=False) as cycle_stats:
+            yield cycle_stats
+        stats.append(cycle_stats)
+
+    async def no_usage_snapshot(**_kwargs) -> dict[str, Any]:
+        return {}
+
+    usage_dir = tempfile.TemporaryDirectory(prefix="replay_usage_")
+    load_usage_config = api_usage._load_usage_config
+
+    def replay_usage_config() -> dict[str, Any]:
+        return {**load_usage_config(), "db_path": str(Path(usage_dir.name) / "usage_metrics.db")}
+
+    replacements = [
+        (api_usage, "_load_usage_config", replay_usage_config),
+        (app_main, "get_database_provider", lambda: provider),
+        (app_main, "get_aeroapi_usage_snapshot", no_usage_snapshot),
+        (app_main, "start_cycle", captured_cycle),
+        (app_main, "start_trace", lambda _name, **_attrs: nullcontext()),
+        (sp, "get_first_image_url_jp", lambda _registration: None),
+        (sp, "get_first_image_url_pp", lambda _registration: None),
+        (sp, "_build_sender_registry", lambda: {platform: recorder(platform) for platform in platforms}),
+    ]
+    originals = [(module, name, getattr(module, name)) for module, name, _value in replacements]
+    try:
+        for module, name, value in replacements:
+            setattr(module, name, value)
+        yield
+    finally:
+        for module, name, value in originals:
+            setattr(module, name, value)
+        api_usage.shutdown_usage_sink()
+        usage_dir.cleanup()
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+async def replay(cycles: list[Cycle], *, speed: float, interval: timedelta, provider: InMemoryProvider) -> dict[str, Any]:
+    """Run ``cycles`` through ``main.main``; ``speed`` > 0 paces them at ``interval / speed`` of real time."""
+    posts: dict[str, int] = {}
+    stats: list[CycleStats] = []
+    simulated = _SimulatedClock(cycles[0][0] if cycles else datetime.now())
+    all_flights: dict[str, Any] = {}
+    busy_seconds = 0.0
+    started = time.perf_counter()
+
+    with ExitStack() as stack:
+        stack.enter_context(_stand_ins(provider, posts, stats))
+        stack.enter_context(clock.use_clock(simulated))
+        for index, (cycle_at, sources) in enumerate(cycles):
+            simulated.current = cycle_at
+
+            async def stream(provider_name: str, movement: str, **_kwargs):
+                yield sources.get((movement, provider_name)) or []
+
+            cycle_started = time.perf_counter()
+            with ingestion.use_stream(stream):
+                await app_main.main(all_flights)
+            busy_seconds += time.perf_counter() - cycle_started
+
+            if speed > 0 and index + 1 < len(cycles):
+                await asyncio.sleep(max(0.0, interval.total_seconds() / speed - (time.perf_counter() - cycle_started)))
+
+    wall_seconds = time.perf_counter() - started
+    flights = sum(item.flights_merged for item in stats)
+    phases = {
+        phase: [item.phase_seconds.get(phase, 0.0) * 1000.0 for item in stats]
+        for phase in LEDGER_PHASES
+    }
+    return {
+        "cycles": len(stats),
+        "simulated_span": {
+            "start": cycles[0][0].isoformat() if cycles else None,
+            "end": simulated.current.isoformat() if cycles else None,
+        },
+        "flights_merged": flights,
+        "wall_seconds": round(wall_seconds, 3),
+        "busy_seconds": round(busy_seconds, 3),
+        "flights_per_second": round(flights / busy_seconds, 1) if busy_seconds else 0.0,
+        "cycle_ms": {
+            "p50": round(_percentile([item.total_seconds * 1000.0 for item in stats], 50), 2),
+            "p95": round(_percentile([item.total_seconds * 1000.0 for item in stats], 95), 2),
+        },
+        "phase_ms": {
+            phase: {
+                "p50": round(_percentile(values, 50), 2),
+                "p95": round(_percentile(values, 95), 2),
+                "max": round(max(values, default=0.0), 2),
+                "total": round(sum(values), 2),
+            }
+            for phase, values in phases.items()
+        },
+        "final_state": {
+            "registrations": len(provider.registrations),
+            "flight_history_rows": len(provider.flight_history),
+            "interesting_flights": sum(item.interesting_count for item in stats),
+            "posts_by_platform": posts,
+            "cycles_ok": sum(1 for item in stats if item.status == "ok"),
+        },
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay cycles through main.main() against local stand-ins")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--synthetic", type=int, default=12, help="Number of synthetic cycles from api/data fixtures")
+    source.add_argument("--archive", action="store_true", help="Replay cycles recorded in the raw archive")
+    parser.add_argument("--limit", type=int, default=24, help="Archived cycles to replay (newest N)")
+    parser.add_argument("--speed", type=float, default=0.0, help="N x real time; 0 runs as fast as possible")
+    parser.add_argument("--interval-minutes", type=float, default=0.0, help="Cycle interval (default: execution.interval)")
+    parser.add_argument(
+        "--interesting-model",
+        action="append",
+        default=[],
+        help="ICAO type code treated as interesting (repeatable)",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    interval_seconds = args.interval_minutes * 60 or int(cfg.get_config("execution.interval") or 6600)
+    interval = timedelta(seconds=interval_seconds)
+    airport_icao = str(cfg.get_config("api.airport_icao") or cfg.get_config("database.airport_icao") or "LEMD").upper()
+
+    if args.archive:
+        cycles = archived_cycles(airport_icao, args.limit)
+    else:
+        cycles = synthetic_cycles(args.synthetic, interval)
+    if not cycles:
+        print(json.dumps({"ok": False, "error": "no cycles to replay"}, ensure_ascii=True, indent=2))
+        return 1
+
+    models = {code: code for code in args.interesting_model} or _DEFAULT_INTERESTING_MODELS
+    provider = InMemoryProvider(interesting_models=models)
+    report = asyncio.run(replay(cycles, speed=args.speed, interval=interval, provider=provider))
+    report["generated_at"] = datetime.now(timezone.utc).isoformat()
+    print(json.dumps({"ok": True, "report": report}, ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
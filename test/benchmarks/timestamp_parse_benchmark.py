@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+from zoneinfo import ZoneInfo
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import utils.data_processing as dp  # noqa: E402
+import utils.timestamps as timestamps  # noqa: E402
+from database.providers.supabase import _to_iso_datetime  # noqa: E402
+from utils.timestamps import airport_timezone, parse_timestamp  # noqa: E402
+
+
+DATA_DIR = PROJECT_ROOT / "api" / "data"
+FIXTURES = (
+    ("aeroapi_data_scheduled_arrivals.json", "scheduled_arrivals"),
+    ("aeroapi_data_scheduled_departures.json", "scheduled_departures"),
+)
+DEPARTURE_TIMES = ("actual_out", "estimated_out", "scheduled_out", "actual_off", "estimated_off", "scheduled_off")
+ARRIVAL_TIMES = ("actual_in", "estimated_in", "scheduled_in", "actual_on", "estimated_on", "scheduled_on")
+TIME_FIELDS = DEPARTURE_TIMES + ARRIVAL_TIMES
+
+
+def _build_flights(copies: int) -> list[dict[str, Any]]:
+    """The AeroAPI fixtures repeated, each copy shifted by a day so every copy has its own strings."""
+    fixtures = [
+        flight
+        for name, root in FIXTURES
+        for flight in json.loads((DATA_DIR / name).read_text(encoding="utf-8"))[root]
+    ]
+    flights = []
+    for copy in range(copies):
+        for flight in fixtures:
+            clone = dict(flight)
+            for field in TIME_FIELDS:
+                if isinstance(clone.get(field), str):
+                    shifted = datetime.fromisoformat(clone[field]) + timedelta(days=copy)
+                    clone[field] = shifted.strftime("%Y-%m-%dT%H:%M:%SZ")
+            flights.append(clone)
+    return flights
+
+
+def _legacy_parse_datetime(value: Any) -> datetime:
+    """The previous ``data_processing._parse_datetime``."""
+    if isinstance(value, datetime):
+        return value
+
+    if isinstance(value, str) and value.strip():
+        normalized = value.strip().replace("Z", "+00:00")
+        try:
+            parsed = datetime.fromisoformat(normalized)
+            if parsed.tzinfo is None:
+                return parsed
+            return parsed.astimezone(ZoneInfo("Europe/Madrid")).replace(tzinfo=None)
+        except ValueError:
+            pass
+
+        for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+            try:
+                return datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+
+    return datetime.now()
+
+
+def _legacy_to_iso_datetime(value: Any) -> str:
+    """The previous ``SupabaseProvider`` helper, which re-parsed the string ``check_flight`` produced."""
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, str):
+        for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S"):
+            try:
+                dt = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                dt = datetime.now(timezone.utc)
+        else:
+            dt = datetime.now(timezone.utc)
+    else:
+        dt = datetime.now(timezone.utc)
+
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat()
+
+
+def _event_time(flight: dict[str, Any]) -> Any:
+    fields = DEPARTURE_TIMES if (flight.get("origin") or {}).get("code_icao") == "LEMD" else ARRIVAL_TIMES
+    return next((flight[field] for field in fields if flight.get(field) not in (None, "", "null", "None")), None)
+
+
+def _parse_before(flights: list[dict[str, Any]]) -> list[datetime]:
+    return [_legacy_parse_datetime(flight[field]) for flight in flights for field in TIME_FIELDS if flight.get(field)]
+
+
+def _parse_after(flights: list[dict[str, Any]]) -> list[datetime]:
+    local = airport_timezone("LEMD")
+    return [parse_timestamp(flight[field], local) for flight in flights for field in TIME_FIELDS if flight.get(field)]
+
+
+def _pipeline_before(flights: list[dict[str, Any]]) -> list[str]:
+    """Normalize, format in check_flight, re-parse for the database, re-parse for the Telegram schedule."""
+    rows = []
+    for flight in flights:
+        text = _legacy_parse_datetime(_event_time(flight)).strftime("%Y-%m-%d %H:%M")
+        rows.append(_legacy_to_iso_datetime(text))
+        datetime.strptime(text, "%Y-%m-%d %H:%M")
+    return rows
+
+
+def _pipeline_after(flights: list[dict[str, Any]]) -> list[str]:
+    rows = []
+    for flight in flights:
+        scheduled = dp._parse_datetime(_event_time(flight))
+        rows.append(_to_iso_datetime(scheduled))
+        parse_timestamp(scheduled)
+    return rows
+
+
+def _measure(path: Callable[[list[dict[str, Any]]], list[Any]], flights: list[dict[str, Any]], repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        # Every run starts without parsed values; zones and detected shapes stay, as they do in the service.
+        timestamps._parsed.clear()
+        started = time.perf_counter()
+        path(flights)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _compare(
+    before: Callable,
+    after: Callable,
+    flights: list[dict[str, Any]],
+    repeats: int,
+    unit: int,
+    key: Callable[[Any], Any] = lambda value: value,
+) -> dict[str, Any]:
+    before_seconds = _measure(before, flights, repeats)
+    after_seconds = _measure(after, flights, repeats)
+    return {
+        "identical": [key(value) for value in before(flights)] == [key(value) for value in after(flights)],
+        "items": unit,
+        "before_seconds": round(before_seconds, 4),
+        "after_seconds": round(after_seconds, 4),
+        "speedup": round(before_seconds / max(after_seconds, 1e-9), 2),
+    }
+
+
+def run(copies: int, repeats: int) -> dict[str, Any]:
+    flights = _build_flights(copies)
+    values = [flight[field] for flight in flights for field in TIME_FIELDS if flight.get(field)]
+    # Flights without any event time fall back to "now" on both paths, which cannot be compared.
+    timed = [flight for flight in flights if _event_time(flight) is not None]
+    return {
+        "flights": len(flights),
+        "flights_with_event_time": len(timed),
+        "time_values": len(values),
+        "distinct_time_values": len(set(values)),
+        "parse_every_time_field": _compare(_parse_before, _parse_after, flights, repeats, len(values)),
+        # The old string round trip dropped the seconds the database now receives, so compare to the minute.
+        "normalize_to_database_and_telegram": _compare(
+            _pipeline_before, _pipeline_after, timed, repeats, len(timed), key=lambda row: row[:16]
+        ),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare the previous and the cached timestamp parsing on the AeroAPI fixtures")
+    parser.add_argument("--copies", type=int, default=50, help="Day-shifted copies of the AeroAPI fixtures")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per path; the best is reported")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    print(json.dumps(run(max(1, args.copies), max(1, args.repeats)), ensure_ascii=True, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
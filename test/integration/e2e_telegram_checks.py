@@ -77,10 +77,9 @@ class FakeProvider:
 
 async def pipeline_e2e_mock_test() -> dict[str, Any]:
     import main as app_main
+    from api import ingestion
 
     orig_get_config = app_main.cfg.get_config
-    orig_aero = app_main.api_handler_aeroapi.fetch_aeroapi_scheduled
-    orig_adb = app_main.api_handler_aerodatabox.fetch_adb_data
     orig_provider = app_main.get_database_provider
     orig_jp = app_main.sp.get_first_image_url_jp
     orig_pp = app_main.sp.get_first_image_url_pp
@@ -104,48 +103,40 @@ async def pipeline_e2e_mock_test() -> dict[str, Any]:
             return key == "social_networks.telegram"
         return orig_get_config(key)
 
-    async def mock_fetch_aero(move, start_time, end_time, airport_icao="LEMD"):
-        return {f"scheduled_{move}": []}
-
-    async def mock_fetch_adb(move, start_time, end_time, airport_icao="LEMD"):
-        if move == "arrivals":
-            return {
-                "arrivals": [
-                    {
-                        "aircraft": {"reg": "EC-E2E", "model": "Airbus A320-232"},
-                        "callSign": "E2E9001",
-                        "number": "E29001",
-                        "airline": {"icao": "IBE", "name": "Iberia"},
-                        "departure": {"airport": {"icao": "LEBL", "name": "Barcelona"}},
-                        "arrival": {
-                            "airport": {"icao": "LEMD", "name": "Madrid"},
-                            "terminal": "T4",
-                            "revisedTime": {"local": _now_local_with_tz()},
-                        },
-                    }
-                ],
-                "departures": [],
+    async def mock_stream(provider: str, movement: str, **_kwargs):
+        # One AeroDataBox arrival; every other source answers with an empty page.
+        if (provider, movement) != ("aerodatabox", "arrivals"):
+            yield []
+            return
+        yield [
+            {
+                "aircraft": {"reg": "EC-E2E", "model": "Airbus A320-232"},
+                "callSign": "E2E9001",
+                "number": "E29001",
+                "airline": {"icao": "IBE", "name": "Iberia"},
+                "departure": {"airport": {"icao": "LEBL", "name": "Barcelona"}},
+                "arrival": {
+                    "airport": {"icao": "LEMD", "name": "Madrid"},
+                    "terminal": "T4",
+                    "revisedTime": {"local": _now_local_with_tz()},
+                },
             }
-
-        return {"arrivals": [], "departures": []}
+        ]
 
     async def mock_usage_snapshot(force_refresh=False):
         return [{"alias": "mock-key", "key_mask": "mock...key", "total_cost_usd": 0.0, "total_calls": 0}]
 
     try:
         app_main.cfg.get_config = patched_get_config
-        app_main.api_handler_aeroapi.fetch_aeroapi_scheduled = mock_fetch_aero
-        app_main.api_handler_aerodatabox.fetch_adb_data = mock_fetch_adb
         app_main.get_database_provider = lambda: FakeProvider()
         app_main.sp.get_first_image_url_jp = lambda reg: None
         app_main.sp.get_first_image_url_pp = lambda reg: None
         app_main.get_aeroapi_usage_snapshot = mock_usage_snapshot
 
-        await app_main.main({})
+        with ingestion.use_stream(mock_stream):
+            await app_main.main({})
     finally:
         app_main.cfg.get_config = orig_get_config
-        app_main.api_handler_aeroapi.fetch_aeroapi_scheduled = orig_aero
-        app_main.api_handler_aerodatabox.fetch_adb_data = orig_adb
         app_main.get_database_provider = orig_provider
         app_main.sp.get_first_image_url_jp = orig_jp
         app_main.sp.get_first_image_url_pp = orig_pp
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping
+
+from utils.flight import SCHEDULED_TIME_FORMAT
+
+from database.providers.base import DatabaseProvider
+from database.providers.supabase import _normalize_code, _normalize_registration
+
+
+class InMemoryProvider(DatabaseProvider):
+    """Process-local provider for replays and tests; mirrors the Supabase provider's row shapes.
+
+    Not a ``database.provider`` choice: it forgets every sighting on exit, so
+    the replay and the tests hand it to ``main`` directly.
+    """
+
+    def __init__(
+        self,
+        *,
+        interesting_registrations: Iterable[str] = (),
+        interesting_models: Mapping[str, str] | None = None,
+    ) -> None:
+        self.registrations: dict[tuple[str, str], dict[str, Any]] = {}
+        self.flight_history: list[dict[str, Any]] = []
+        self.interesting_registrations = {
+            registration for registration in map(_normalize_registration, interesting_registrations) if registration
+        }
+        self.interesting_models = {
+            code: name for code, name in ((_normalize_code(k), v) for k, v in (interesting_models or {}).items()) if code
+        }
+        self._next_id = 1
+
+    async def get_registrations_index(self, airport_icao: str) -> dict[str, dict[str, Any]]:
+        return {
+            registration: dict(row)
+            for (airport, registration), row in self.registrations.items()
+            if airport == airport_icao
+        }
+
+    async def get_interesting_registrations_index(self, airport_icao: str) -> dict[str, dict[str, Any]]:
+        return {
+            registration: {"registration": registration, "airport_icao": airport_icao, "is_active": True}
+            for registration in self.interesting_registrations
+        }
+
+    async def get_interesting_models_index(self, airport_icao: str) -> dict[str, dict[str, Any]]:
+        return {
+            code: {"icao_code": code, "name": name, "airport_icao": airport_icao, "is_active": True}
+            for code, name in self.interesting_models.items()
+        }
+
+    async def upsert_registration_sighting(
+        self,
+        flight_data: Mapping[str, Any],
+        airport_icao: str,
+    ) -> tuple[dict[str, Any] | None, bool]:
+        registration = _normalize_registration(flight_data.get("registration"))
+        if not registration:
+            return None, False
+
+        scheduled_time = flight_data.get("scheduled_time")
+        if isinstance(scheduled_time, datetime):
+            timestamp = scheduled_time.strftime(SCHEDULED_TIME_FORMAT)
+        else:
+            timestamp = str(scheduled_time or datetime.now(timezone.utc).isoformat())
+        existing = self.registrations.get((airport_icao, registration))
+        if existing is not None:
+            existing["last_seen_at"] = timestamp
+            for column, field in (("aircraft_type_icao", "aircraft_icao"), ("airline_icao", "airline")):
+                value = _normalize_code(flight_data.get(field))
+                if value:
+                    existing[column] = value
+            return dict(existing), False
+
+        row = {
+            "id": self._next_id,
+            "registration": registration,
+            "aircraft_type_icao": _normalize_code(flight_data.get("aircraft_icao")),
+            "airline_icao": _normalize_code(flight_data.get("airline")),
+            "first_seen_at": timestamp,
+            "last_seen_at": timestamp,
+            "airport_icao": airport_icao,
+        }
+        self._next_id += 1
+        self.registrations[(airport_icao, registration)] = row
+        return dict(row), True
+
+    async def record_flight_history(
+        self,
+        flight_data: Mapping[str, Any],
+        airport_icao: str,
+    ) -> dict[str, Any] | None:
+        row = {
+            "flight_id_external": str(
+                flight_data.get("flight_name_iata")
+                or flight_data.get("flight_name")
+                or flight_data.get("registration")
+                or "unknown-flight"
+            ),
+            "registration": _normalize_registration(flight_data.get("registration")),
+            "flight_number": flight_data.get("flight_name_iata") or flight_data.get("flight_name"),
+            "processed_at": datetime.now(timezone.utc).isoformat(),
+            "airport_icao": airport_icao,
+        }
+        self.flight_history.append(row)
+        return row
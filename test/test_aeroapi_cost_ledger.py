@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+import api.aeroapi_key_manager as key_manager
+from api import aeroapi_cost_ledger
+
+
+ENDPOINT = "GET /aeroapi/airports/{id}/flights/scheduled_arrivals"
+
+
+@pytest.fixture()
+def ledger_config(monkeypatch, tmp_path):
+    config = {
+        "enabled": True,
+        "db_path": str(tmp_path / "costs.db"),
+        "default_page_cost_usd": 0.005,
+        "endpoint_costs_usd": {ENDPOINT: 0.02},
+        "reconcile_interval_minutes": 60.0,
+        "drift_warning_pct": 10.0,
+    }
+    monkeypatch.setattr(aeroapi_cost_ledger, "load_aeroapi_cost_config", lambda: dict(config))
+    monkeypatch.setenv("AEROAPI_KEYS", "first:key-aaaa-1111,second:key-bbbb-2222")
+    monkeypatch.delenv("AEROAPI_KEY", raising=False)
+    monkeypatch.setattr(key_manager, "_monthly_budget_usd", lambda: 0.05)
+    yield config
+    aeroapi_cost_ledger.close_cost_ledger()
+
+
+def test_selection_uses_the_persisted_local_ledger(ledger_config, monkeypatch) -> None:
+    async def no_remote(*_args, **_kwargs):
+        raise AssertionError("selection must not call /account/usage")
+
+    monkeypatch.setattr(key_manager, "_fetch_usage_for_key", no_remote)
+    first = key_manager.AeroApiCredential(alias="first", key="key-aaaa-1111")
+    for _ in range(3):
+        key_manager.record_aeroapi_page(first, ENDPOINT)
+    aeroapi_cost_ledger.close_cost_ledger()  # a restart keeps the month-to-date cost
+
+    async def pick_twice() -> list[str]:
+        return [(await key_manager.select_aeroapi_credential()).alias for _ in range(2)]
+
+    state = aeroapi_cost_ledger.key_cost_state("key-aaaa-1111")
+    assert (state["local_calls"], state["estimated_cost_usd"]) == (3, pytest.approx(0.06))
+    assert asyncio.run(pick_twice()) == ["second", "second"]
+
+
+def test_reconciliation_runs_keys_concurrently_and_reports_drift(ledger_config, monkeypatch) -> None:
+    remote = {"key-aaaa-1111": 0.10, "key-bbbb-2222": 0.0}
+    calls: list[str] = []
+
+    async def fake_usage(credential, *, force_refresh=False):
+        calls.append(credential.alias)
+        await asyncio.sleep(0.1)
+        return {"total_cost_usd": remote[credential.key], "total_calls": 5}
+
+    monkeypatch.setattr(key_manager, "_fetch_usage_for_key", fake_usage)
+    first = key_manager.AeroApiCredential(alias="first", key="key-aaaa-1111")
+    for _ in range(4):
+        key_manager.record_aeroapi_page(first, ENDPOINT)
+
+    started = time.perf_counter()
+    reports = asyncio.run(key_manager.reconcile_aeroapi_usage())
+    elapsed = time.perf_counter() - started
+    again = asyncio.run(key_manager.reconcile_aeroapi_usage())
+    key_manager.record_aeroapi_page(first, ENDPOINT)
+    snapshot = asyncio.run(key_manager.get_aeroapi_usage_snapshot())
+
+    assert elapsed < 0.18 and sorted(calls) == ["first", "second"]
+    by_alias = {report["alias"]: report for report in reports}
+    assert by_alias["first"]["drift_usd"] == pytest.approx(0.02)
+    assert by_alias["first"]["drift_pct"] == pytest.approx(20.0)
+    assert again == []
+    assert snapshot[0]["total_cost_usd"] == pytest.approx(0.12)
+    assert snapshot[0]["remote_cost_usd"] == pytest.approx(0.10)
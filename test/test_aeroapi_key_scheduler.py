@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+import api.aeroapi_key_manager as key_manager
+from api.aeroapi_key_scheduler import KeyScheduler
+
+
+CONFIG = {"rate_limit_window_minutes": 15.0, "rate_limit_penalty": 0.25, "min_burn_days": 1.0}
+MID_MONTH = datetime(2025, 4, 16, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _scheduler(clock: FakeClock, budget_usd: float = 5.0) -> KeyScheduler:
+    return KeyScheduler([("a", "key-a"), ("b", "key-b"), ("c", "key-c")], budget_usd=budget_usd, config=CONFIG, clock=clock)
+
+
+def test_pages_go_to_the_key_with_most_projected_headroom() -> None:
+    scheduler = _scheduler(FakeClock(MID_MONTH))
+    costs = {"key-a": 1.0, "key-b": 0.2, "key-c": 0.6}
+    for key, cost in costs.items():
+        scheduler.set_cost(key, cost)
+
+    picks = []
+    for _ in range(60):
+        selected, _exhausted = scheduler.select()
+        picks.append(selected.alias)
+        costs[selected.key] += 0.02
+        scheduler.set_cost(selected.key, costs[selected.key])
+
+    assert picks[0] == "b"
+    assert max(costs.values()) - min(costs.values()) <= 0.02 + 1e-9
+
+
+def test_recent_rate_limits_push_a_key_down_until_they_expire() -> None:
+    clock = FakeClock(MID_MONTH)
+    scheduler = _scheduler(clock)
+    scheduler.set_cost("key-a", 0.1)
+    scheduler.set_cost("key-b", 0.5)
+    scheduler.set_cost("key-c", 0.5)
+    scheduler.note_rate_limited("key-a")
+
+    assert scheduler.select()[0].alias != "a"
+
+    clock.now += 16 * 60
+    assert scheduler.select()[0].alias == "a"
+
+
+def test_over_budget_keys_are_skipped_and_exhaustion_is_forecast() -> None:
+    scheduler = _scheduler(FakeClock(MID_MONTH), budget_usd=1.0)
+    scheduler.set_cost("key-a", 1.0)
+    scheduler.set_cost("key-b", 0.9)
+    scheduler.set_cost("key-c", 0.1)
+
+    selected, _exhausted = scheduler.select(excluded={"key-c"})
+    none_left, exhausted = scheduler.select(excluded={"key-b", "key-c"})
+    forecast = {item["alias"]: item for item in scheduler.forecast()}
+
+    assert selected.alias == "b"
+    assert none_left is None and [state.alias for state in exhausted] == ["a"]
+    assert forecast["b"]["exhausts_at"] is not None and forecast["c"]["exhausts_at"] is None
+    assert scheduler.pool_exhausts_at() is not None
+
+
+def test_credentials_are_parsed_once_per_env_value(monkeypatch) -> None:
+    parsed = []
+    original = key_manager._parse_credentials
+
+    def counting(*args):
+        parsed.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(key_manager, "_parse_credentials", counting)
+    monkeypatch.setattr(key_manager, "_CREDENTIALS_CACHE", {})
+    monkeypatch.setenv("AEROAPI_KEYS", "one:key-1111-aaaa,two:key-2222-bbbb")
+    monkeypatch.delenv("AEROAPI_KEY", raising=False)
+
+    for _ in range(5):
+        credentials = key_manager._load_credentials()
+
+    assert [credential.alias for credential in credentials] == ["one", "two"]
+    assert len(parsed) == 1
+
+
+def test_a_reserved_pick_is_rescored_instead_of_rotated() -> None:
+    scheduler = _scheduler(FakeClock(MID_MONTH))
+    scheduler.set_cost("key-a", 4.5)
+    scheduler.set_cost("key-b", 0.1)
+    scheduler.set_cost("key-c", 0.1)
+
+    picks = [scheduler.select(reserve_usd=0.05)[0].alias for _ in range(6)]
+
+    # Reservations alternate the two fresh keys; the nearly spent one is never picked.
+    assert sorted(picks) == ["b", "b", "b", "c", "c", "c"]
+    assert scheduler._states["key-b"].reserved_usd == pytest.approx(0.15)
+
+    scheduler.set_cost("key-b", 0.2)
+    assert scheduler._states["key-b"].reserved_usd == pytest.approx(0.05)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+import api.api_handler_aeroapi as aeroapi
+from api import rate_limiter, raw_sink
+from api.aeroapi_key_manager import AeroApiCredential
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _bucket(clock: _Clock, **overrides) -> rate_limiter.AsyncTokenBucket:
+    settings = {
+        "requests_per_minute": 60.0,
+        "burst": 2.0,
+        "min_requests_per_minute": 6.0,
+        "backoff_factor": 0.5,
+        "recovery_per_success": 30.0,
+    }
+    settings.update(overrides)
+    return rate_limiter.AsyncTokenBucket(clock=clock, **settings)
+
+
+def test_bucket_allows_burst_then_spaces_requests() -> None:
+    clock = _Clock()
+    bucket = _bucket(clock)
+
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, pytest.approx(1.0), pytest.approx(2.0)]
+
+    clock.now += 10.0
+    assert bucket.reserve() == 0.0
+
+
+def test_rate_limit_blocks_for_retry_after_and_recovers() -> None:
+    clock = _Clock()
+    bucket = _bucket(clock)
+
+    bucket.record_rate_limited(5.0)
+
+    assert bucket.rpm == 30.0
+    assert bucket.reserve() == pytest.approx(5.0 + 2.0)
+
+    bucket.record_success()
+    bucket.record_success()
+    assert bucket.rpm == 60.0
+
+
+def test_retry_after_accepts_seconds_and_missing_values() -> None:
+    assert rate_limiter.parse_retry_after("12", 20.0) == 12.0
+    assert rate_limiter.parse_retry_after(None, 20.0) == 20.0
+    assert rate_limiter.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", 20.0) == 0.0
+
+
+def test_buckets_are_shared_per_key() -> None:
+    rate_limiter.clear_credential_buckets()
+    try:
+        assert rate_limiter.get_credential_bucket("k1") is rate_limiter.get_credential_bucket("k1")
+        assert rate_limiter.get_credential_bucket("k1") is not rate_limiter.get_credential_bucket("k2")
+    finally:
+        rate_limiter.clear_credential_buckets()
+
+
+class _FakeResponse:
+    def __init__(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        self.status = status
+        self._payload = payload
+        self.headers = headers or {}
+
+    async def json(self) -> dict:
+        return self._payload
+
+    async def text(self) -> str:
+        return str(self._payload)
+
+    async def __aenter__(self) -> "_FakeResponse":
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        return None
+
+
+class _FakeSession:
+    def __init__(self, pages: int) -> None:
+        self.pages = pages
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None):
+        self.calls += 1
+        if self.calls == 2:
+            return _FakeResponse(429, {}, {"Retry-After": "0"})
+        page = self.calls - 1 if self.calls > 2 else self.calls
+        links = {"next": f"/airports/lemd/flights/scheduled_arrivals?cursor={page}"} if page < self.pages else None
+        return _FakeResponse(200, {"scheduled_arrivals": [{"ident": f"F{page}"}], "links": links})
+
+
+def test_ten_pages_are_fetched_without_fixed_sleeps(monkeypatch, tmp_path) -> None:
+    session = _FakeSession(pages=10)
+    credential = AeroApiCredential(alias="key1", key="test-key-1")
+
+    @asynccontextmanager
+    async def fake_http_session(_name):
+        yield session
+
+    async def fake_select(**_kwargs):
+        return credential
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(raw_sink, "load_raw_archive_config", lambda: {"enabled": False})
+    (tmp_path / "api" / "data").mkdir(parents=True)
+    monkeypatch.setattr(aeroapi, "http_session", fake_http_session)
+    monkeypatch.setattr(aeroapi, "select_aeroapi_credential", fake_select)
+    monkeypatch.setattr(aeroapi, "record_api_event", lambda **_kwargs: None)
+    monkeypatch.setattr(aeroapi, "record_aeroapi_page", lambda *_args: 0.0)
+    monkeypatch.setattr(aeroapi, "note_aeroapi_rate_limited", lambda _credential: None)
+    monkeypatch.setattr(
+        rate_limiter,
+        "load_aeroapi_rate_limit_config",
+        lambda: {
+            "requests_per_minute": 600.0,
+            "burst": 10.0,
+            "min_requests_per_minute": 1.0,
+            "backoff_factor": 0.5,
+            "recovery_per_success": 60.0,
+            "default_retry_after_seconds": 0.0,
+        },
+    )
+    rate_limiter.clear_credential_buckets()
+
+    started = time.perf_counter()
+    try:
+        data = asyncio.run(aeroapi.fetch_aeroapi_scheduled("arrivals", "2025-01-01T10:00", "2025-01-01T12:00"))
+    finally:
+        rate_limiter.clear_credential_buckets()
+
+    assert len(data["scheduled_arrivals"]) == 10
+    assert session.calls == 11
+    assert time.perf_counter() - started < 5.0
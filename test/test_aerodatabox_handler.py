@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+import api.api_handler_aerodatabox as aerodatabox
+from api import raw_sink
+from monitoring.circuit_breaker import get_breaker, reset_breakers
+
+
+CONFIG = {
+    "request_timeout_seconds": 0.3,
+    "connect_timeout_seconds": 0.3,
+    "max_attempts": 3,
+    "backoff_base_seconds": 0.05,
+    "max_backoff_seconds": 0.1,
+    "default_retry_after_seconds": 0.05,
+    "window_deadline_seconds": 2.0,
+}
+
+
+@pytest.fixture()
+def adb_env(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "api" / "data").mkdir(parents=True)
+    monkeypatch.setenv("AERODATABOX_KEY", "test-key")
+    monkeypatch.setattr(raw_sink, "load_raw_archive_config", lambda: {"enabled": False})
+    monkeypatch.setattr(aerodatabox, "record_api_event", lambda **_kwargs: None)
+    monkeypatch.setattr(aerodatabox, "load_adb_request_config", lambda: dict(CONFIG))
+    monkeypatch.setattr(
+        aerodatabox,
+        "load_sharding_config",
+        lambda _provider: {"shard_minutes": 60, "max_parallel_shards": 4},
+    )
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
+async def _serve(monkeypatch, behaviours: dict[str, list]) -> tuple[web.AppRunner, dict[str, int]]:
+    """``behaviours[start]`` lists the reply to each successive request for that sub-window."""
+    hits: dict[str, int] = {}
+
+    async def window(request: web.Request) -> web.Response:
+        start = request.match_info["start"]
+        hits[start] = hits.get(start, 0) + 1
+        replies = behaviours[start]
+        reply = replies[min(hits[start], len(replies)) - 1]
+        if reply == "hang":
+            await asyncio.sleep(1.5)
+        if isinstance(reply, tuple):
+            status, headers = reply
+            return web.Response(status=status, headers=headers)
+        if reply == 204:
+            return web.Response(status=204)
+        if reply == "not_json":
+            return web.Response(status=200, text="<html>maintenance</html>")
+        return web.json_response({"arrivals": [{"number": f"IB {start[-5:]}"}]})
+
+    app = web.Application()
+    app.router.add_get("/flights/airports/Icao/LEMD/{start}/{end}", window)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    monkeypatch.setattr(aerodatabox, "ADB_BASE_URL", f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}")
+    return runner, hits
+
+
+def test_rate_limits_are_retried_and_no_content_is_an_empty_window(adb_env, monkeypatch) -> None:
+    async def run():
+        runner, hits = await _serve(
+            monkeypatch,
+            {
+                "2025-01-01T06:00": [(429, {"Retry-After": "0"}), "ok"],
+                "2025-01-01T07:00": [(503, {}), (502, {}), "ok"],
+                "2025-01-01T08:00": [204],
+            },
+        )
+        try:
+            data = await aerodatabox.fetch_adb_data("arrivals", "2025-01-01T06:00", "2025-01-01T09:00")
+        finally:
+            await runner.cleanup()
+        return data, hits
+
+    data, hits = asyncio.run(run())
+
+    assert [flight["number"] for flight in data["arrivals"]] == ["IB 06:00", "IB 07:00"]
+    assert hits == {"2025-01-01T06:00": 2, "2025-01-01T07:00": 3, "2025-01-01T08:00": 1}
+
+
+def test_failed_window_keeps_the_other_flights_and_is_bounded(adb_env, monkeypatch) -> None:
+    async def run():
+        runner, _hits = await _serve(
+            monkeypatch,
+            {
+                "2025-01-01T06:00": ["ok"],
+                "2025-01-01T07:00": ["hang"],
+                "2025-01-01T08:00": [(400, {})],
+            },
+        )
+        received = []
+        started = time.perf_counter()
+        try:
+            with pytest.raises(aerodatabox.AeroDataBoxWindowError) as failure:
+                async for batch in aerodatabox.iter_adb_batches("arrivals", "2025-01-01T06:00", "2025-01-01T09:00"):
+                    received.extend(batch)
+        finally:
+            elapsed = time.perf_counter() - started
+            await runner.cleanup()
+        return received, failure.value, elapsed
+
+    received, error, elapsed = asyncio.run(run())
+
+    assert [flight["number"] for flight in received] == ["IB 06:00"]
+    assert "2/3 window(s) failed" in str(error)
+    assert error.result is not None and not error.result.ok
+    # Three timed-out attempts plus backoff, well short of the hanging server.
+    assert elapsed < 2.0
+
+
+def test_undecodable_body_is_one_breaker_outcome(adb_env, monkeypatch) -> None:
+    async def run():
+        runner, _hits = await _serve(monkeypatch, {"2025-01-01T06:00": ["not_json"]})
+        try:
+            return await aerodatabox.fetch_adb_data("arrivals", "2025-01-01T06:00", "2025-01-01T07:00")
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()) is None
+    assert get_breaker("aerodatabox").snapshot()["window_calls"] == 1
+
+
+def test_window_result_tells_empty_from_failed() -> None:
+    empty = aerodatabox.AdbWindowResult(flights=[], status_code=204, attempts=1)
+    failed = aerodatabox.AdbWindowResult(flights=[], status_code=503, attempts=3, error="status 503")
+
+    assert empty.ok and empty.empty
+    assert not failed.ok and not failed.empty
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+import monitoring.api_usage as api_usage
+
+
+@pytest.fixture
+def usage_db(monkeypatch, tmp_path):
+    db_path = tmp_path / "usage_metrics.db"
+    config = {
+        "enabled": True,
+        "db_path": str(db_path),
+        "writer": {"batch_size": 1000, "flush_interval_seconds": 60.0},
+        "x": {
+            "enforce_budget": True,
+            "monthly_budget_usd": 0.05,
+            "default_cost_per_call_usd": 0.01,
+            "endpoint_costs_usd": {"POST /2/tweets": 0.02},
+        },
+    }
+    api_usage.shutdown_usage_sink()
+    monkeypatch.setattr(api_usage, "_load_usage_config", lambda: config)
+    yield db_path
+    api_usage.shutdown_usage_sink()
+
+
+def _count_rows(db_path) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM api_usage_events").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _record(provider: str = "supabase", cost: float = 0.0, **overrides) -> None:
+    payload = {
+        "provider": provider,
+        "endpoint": "GET /rest/v1/registrations",
+        "method": "GET",
+        "status_code": 200,
+        "success": True,
+        "duration_ms": 12.5,
+        "estimated_cost_usd": cost,
+    }
+    payload.update(overrides)
+    api_usage.record_api_event(**payload)
+
+
+def test_events_are_buffered_until_flush(usage_db) -> None:
+    for _ in range(3):
+        _record()
+
+    assert _count_rows(usage_db) == 0
+    assert api_usage.flush_usage_events() == 3
+    assert _count_rows(usage_db) == 3
+
+
+def test_reads_see_queued_events(usage_db) -> None:
+    _record(provider="x", cost=0.02)
+    _record(provider="x", cost=0.01)
+    _record(provider="x", cost=5.0, blocked=True, success=False)
+
+    assert api_usage.get_monthly_cost("x") == pytest.approx(0.03)
+    summary = api_usage.get_monthly_usage_summary()
+    assert summary["x"]["total_calls"] == 3
+    assert summary["x"]["blocked_calls"] == 1
+
+
+def test_shutdown_flushes_pending_events(usage_db) -> None:
+    _record()
+    _record()
+
+    api_usage.shutdown_usage_sink()
+
+    assert _count_rows(usage_db) == 2
+
+
+def test_connection_uses_wal(usage_db) -> None:
+    _record()
+    api_usage.flush_usage_events()
+
+    conn = sqlite3.connect(usage_db)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        conn.close()
+
+
+def test_budget_guard_blocks_and_records(usage_db) -> None:
+    _record(provider="x", cost=0.04)
+
+    with pytest.raises(api_usage.XBudgetExceededError):
+        api_usage.enforce_budget_or_raise("x", "POST /2/tweets")
+
+    summary = api_usage.get_monthly_usage_summary()
+    assert summary["x"]["blocked_calls"] == 1
+
+
+def test_monthly_rollup_tracks_inserted_events(usage_db) -> None:
+    _record(provider="x", cost=0.02, endpoint="POST /2/tweets")
+    _record(provider="x", cost=0.01, endpoint="POST /1.1/media/upload.json")
+    _record(provider="x", cost=0.02, endpoint="POST /2/tweets", blocked=True, success=False)
+    api_usage.flush_usage_events()
+
+    conn = sqlite3.connect(usage_db)
+    try:
+        rows = conn.execute(
+            "SELECT endpoint, total_calls, blocked_calls, total_cost_usd, billable_cost_usd "
+            "FROM api_usage_monthly WHERE provider = 'x' ORDER BY endpoint"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    assert rows[0][:3] == ("POST /1.1/media/upload.json", 1, 0)
+    assert rows[1][:3] == ("POST /2/tweets", 2, 1)
+    assert rows[1][3] == pytest.approx(0.04)
+    assert rows[1][4] == pytest.approx(0.02)
+
+
+def test_existing_events_are_backfilled_into_rollup(usage_db) -> None:
+    conn = sqlite3.connect(usage_db)
+    try:
+        conn.execute(
+            """
+            CREATE TABLE api_usage_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                provider TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                method TEXT NOT NULL,
+                status_code INTEGER,
+                success INTEGER NOT NULL,
+                blocked INTEGER NOT NULL DEFAULT 0,
+                duration_ms REAL,
+                estimated_cost_usd REAL NOT NULL DEFAULT 0,
+                error TEXT,
+                metadata_json TEXT,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.executemany(
+            "INSERT INTO api_usage_events (provider, endpoint, method, success, blocked, estimated_cost_usd, created_at) "
+            "VALUES (?, ?, 'POST', 1, 0, ?, ?)",
+            [
+                ("x", "POST /2/tweets", 0.01, "2025-01-03T10:00:00+00:00"),
+                ("x", "POST /2/tweets", 0.01, "2025-01-20T10:00:00+00:00"),
+                ("x", "POST /2/tweets", 0.01, "2025-02-01T10:00:00+00:00"),
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert api_usage.get_monthly_cost("x", "2025-01") == pytest.approx(0.02)
+    assert api_usage.get_monthly_usage_summary("2025-02")["x"]["total_calls"] == 1
+
+
+def test_latency_percentiles_come_from_hourly_histograms(usage_db) -> None:
+    from datetime import datetime, timedelta, timezone
+
+    for duration in range(1, 101):
+        _record(provider="supabase", duration_ms=float(duration))
+    _record(provider="supabase", duration_ms=5000.0, status_code=503, success=False)
+    _record(provider="x", duration_ms=0.0, blocked=True, success=False, status_code=None)
+
+    now = datetime.now(timezone.utc)
+    result = api_usage.get_latency_percentiles(now - timedelta(hours=1), now, provider="supabase")
+
+    ok = result["supabase GET /rest/v1/registrations 2xx"]
+    assert ok["count"] == 100
+    assert ok["mean_ms"] == pytest.approx(50.5)
+    assert 40 <= ok["p50_ms"] <= 65
+    assert 80 <= ok["p90_ms"] <= 128
+    assert ok["p50_ms"] <= ok["p95_ms"] <= ok["p99_ms"]
+    assert result["supabase GET /rest/v1/registrations 5xx"]["count"] == 1
+    assert all(entry["provider"] == "supabase" for entry in result.values())
+
+    earlier = api_usage.get_latency_percentiles(now - timedelta(days=3), now - timedelta(days=2))
+    assert earlier == {}
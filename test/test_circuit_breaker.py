@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import pytest
+
+import monitoring.api_usage as api_usage
+import monitoring.circuit_breaker as circuit_breaker
+from monitoring.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+CONFIG = {
+    "enabled": True,
+    "window_seconds": 60.0,
+    "min_calls": 4,
+    "failure_rate_threshold": 0.5,
+    "open_seconds": 30.0,
+    "half_open_probes": 1,
+}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers():
+    circuit_breaker.reset_breakers()
+    yield
+    circuit_breaker.reset_breakers()
+
+
+def test_breaker_opens_on_failure_rate_and_recovers_through_a_probe() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker("aeroapi", dict(CONFIG), clock=clock)
+
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED  # below min_calls
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow() and breaker.snapshot()["rejected"] == 1
+
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_old_failures_fall_out_of_the_window() -> None:
+    clock = FakeClock()
+    breaker = CircuitBreaker("supabase", dict(CONFIG), clock=clock)
+
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 61
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["window_calls"] == 1
+
+
+def test_open_circuit_is_refused_and_recorded_as_blocked(monkeypatch) -> None:
+    events = []
+    monkeypatch.setattr(api_usage, "record_api_event", lambda **kwargs: events.append(kwargs))
+    monkeypatch.setattr(circuit_breaker, "load_circuit_breaker_config", lambda _name: dict(CONFIG))
+
+    breaker = circuit_breaker.get_breaker("telegram")
+    for _ in range(4):
+        breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        api_usage.enforce_circuit_or_raise("telegram", "SEND /telegram", method="POST")
+
+    assert events[0]["blocked"] and events[0]["error"] == "circuit_open"
+    assert circuit_breaker.breaker_states()["telegram"]["state"] == OPEN
+
+
+def test_provider_overrides_apply_on_top_of_the_defaults(monkeypatch) -> None:
+    monkeypatch.setattr(
+        circuit_breaker.cfg,
+        "get_config",
+        lambda _key: {"open_seconds": 45, "providers": {"telegram": {"open_seconds": 300, "min_calls": 2}}},
+    )
+
+    telegram = circuit_breaker.load_circuit_breaker_config("telegram")
+    supabase = circuit_breaker.load_circuit_breaker_config("supabase")
+
+    assert (telegram["open_seconds"], telegram["min_calls"]) == (300.0, 2)
+    assert (supabase["open_seconds"], supabase["min_calls"]) == (45.0, 5)
+
+
+def test_shared_breakers_follow_config_edits(monkeypatch) -> None:
+    settings = {"min_calls": 10, "failure_rate_threshold": 0.5}
+    monkeypatch.setattr(circuit_breaker.cfg, "get_config", lambda _key: dict(settings))
+
+    breaker = circuit_breaker.get_breaker("aeroapi")
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    settings["min_calls"] = 3
+    breaker.record_failure()
+
+    assert circuit_breaker.get_breaker("aeroapi") is breaker and breaker.state == OPEN
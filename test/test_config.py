@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+
+import config.config as cfg
+
+
+def _use_config_file(monkeypatch, tmp_path, content: str):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(content, encoding="utf-8")
+    monkeypatch.setattr(cfg, "CONFIG_PATH", config_path)
+    cfg.invalidate_config_cache()
+    return config_path
+
+
+def test_get_config_parses_file_once_until_it_changes(monkeypatch, tmp_path) -> None:
+    _use_config_file(monkeypatch, tmp_path, "api:\n  airport_icao: LEBL\n")
+
+    parse_calls = []
+    real_safe_load = cfg.yaml.safe_load
+
+    def counting_safe_load(stream):
+        parse_calls.append(1)
+        return real_safe_load(stream)
+
+    monkeypatch.setattr(cfg.yaml, "safe_load", counting_safe_load)
+
+    for _ in range(5):
+        assert cfg.get_config("api.airport_icao") == "LEBL"
+    assert cfg.get_config("api.time_range_hours") == 2
+
+    assert len(parse_calls) == 1
+
+
+def test_get_config_picks_up_file_edits(monkeypatch, tmp_path) -> None:
+    config_path = _use_config_file(monkeypatch, tmp_path, "api:\n  airport_icao: LEBL\n")
+    assert cfg.get_config("api.airport_icao") == "LEBL"
+
+    config_path.write_text("api:\n  airport_icao: EGLL\n", encoding="utf-8")
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cfg.get_config("api.airport_icao") == "EGLL"
+
+
+def test_update_config_refreshes_snapshot(monkeypatch, tmp_path) -> None:
+    _use_config_file(monkeypatch, tmp_path, "api:\n  airport_icao: LEBL\n")
+    assert cfg.get_config("social_networks.telegram") is True
+
+    cfg.update_config("social_networks.telegram", "false")
+
+    assert cfg.get_config("social_networks.telegram") is False
+    assert cfg.get_config("api.airport_icao") == "LEBL"
+
+
+def test_returned_sections_do_not_leak_into_snapshot(monkeypatch, tmp_path) -> None:
+    _use_config_file(monkeypatch, tmp_path, "image_finder:\n  enabled: true\n")
+
+    section = cfg.get_config("image_finder")
+    section["enabled"] = False
+    loaded = cfg.load_config()
+    loaded["image_finder"]["enabled"] = False
+
+    assert cfg.get_config("image_finder.enabled") is True
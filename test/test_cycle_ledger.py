@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+
+import pytest
+
+import monitoring.api_usage as api_usage
+import monitoring.cycle_ledger as cycle_ledger
+
+
+@pytest.fixture
+def ledger_db(monkeypatch, tmp_path):
+    db_path = tmp_path / "usage_metrics.db"
+    config = {
+        "enabled": True,
+        "db_path": str(db_path),
+        "writer": {"batch_size": 1000, "flush_interval_seconds": 60.0},
+        "x": {"enforce_budget": True, "monthly_budget_usd": 10.0, "default_cost_per_call_usd": 0.01, "endpoint_costs_usd": {}},
+    }
+    api_usage.shutdown_usage_sink()
+    monkeypatch.setattr(api_usage, "_load_usage_config", lambda: config)
+    yield db_path
+    api_usage.shutdown_usage_sink()
+
+
+def test_cycle_writes_one_summary_row(ledger_db) -> None:
+    async def cycle() -> None:
+        with cycle_ledger.start_cycle() as stats:
+            stats.airport_icao = "LEMD"
+            with cycle_ledger.cycle_phase("fetch"):
+                await asyncio.sleep(0.01)
+            stats.add_flights("aeroapi", 12)
+            stats.add_flights("aerodatabox", 9)
+            await asyncio.to_thread(cycle_ledger.note_retry, "jetphotos")
+            cycle_ledger.note_retry("aeroapi")
+            cycle_ledger.note_post("telegram")
+            cycle_ledger.note_post("telegram")
+            stats.flights_merged = 15
+            stats.interesting_count = 2
+
+    asyncio.run(cycle())
+    cycle_ledger.note_retry("outside-cycle")
+
+    conn = sqlite3.connect(ledger_db)
+    try:
+        row = conn.execute(
+            "SELECT airport_icao, status, fetch_seconds, flights_aeroapi, flights_aerodatabox, "
+            "flights_merged, interesting_count, posts_json, retries FROM cycle_ledger"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    assert len(row) == 1
+    airport, status, fetch_seconds, aeroapi, adb, merged, interesting, posts_json, retries = row[0]
+    assert (airport, status, aeroapi, adb, merged, interesting, retries) == ("LEMD", "ok", 12, 9, 15, 2, 2)
+    assert fetch_seconds >= 0.01
+    assert posts_json == '{"telegram": 2}'
+
+
+def _insert_cycle(conn: sqlite3.Connection, fetch_seconds: float, merge_seconds: float) -> None:
+    stats = cycle_ledger.CycleStats()
+    stats.phase_seconds["fetch"] = fetch_seconds
+    stats.phase_seconds["merge"] = merge_seconds
+    stats.total_seconds = fetch_seconds + merge_seconds
+    cycle_ledger.write_cycle_row(conn, stats)
+
+
+def test_regression_report_flags_slow_phases(tmp_path) -> None:
+    conn = sqlite3.connect(tmp_path / "ledger.db")
+    try:
+        for _ in range(10):
+            _insert_cycle(conn, fetch_seconds=10.0, merge_seconds=0.01)
+        for _ in range(3):
+            _insert_cycle(conn, fetch_seconds=15.0, merge_seconds=0.03)
+
+        report = cycle_ledger.cycle_regression_report(
+            conn,
+            recent_cycles=3,
+            baseline_cycles=10,
+            threshold_pct=25.0,
+            min_phase_seconds=0.05,
+        )
+    finally:
+        conn.close()
+
+    assert report["recent_cycles"] == 3
+    assert report["baseline_cycles"] == 10
+    assert report["phases"]["fetch"]["change_pct"] == pytest.approx(50.0)
+    assert report["regressions"] == ["total", "fetch"]
+    assert report["phases"]["merge"]["regressed"] is False
+
+
+def test_unpersisted_cycle_still_collects_stats(ledger_db) -> None:
+    with cycle_ledger.start_cycle(persist=False) as stats:
+        with cycle_ledger.cycle_phase("merge"):
+            pass
+        cycle_ledger.note_post("telegram")
+
+    assert stats.posts_by_platform == {"telegram": 1}
+    assert stats.total_seconds > 0
+    assert not ledger_db.exists()
@@ -1,4 +1,9 @@
-from utils.data_processing import process_flight_data_aeroapi
+import asyncio
+from datetime import datetime
+
+from utils.data_processing import check_existing, check_flight, process_flight_data_adb, process_flight_data_aeroapi
+from utils.flight import Flight
+from utils.flight_batch import normalize_page
 
 
 def test_aeroapi_arrival_uses_arrival_eta_fields_instead_of_origin_schedule():
@@ -44,3 +49,74 @@ def test_aeroapi_arrival_falls_back_to_scheduled_in_when_no_estimated_or_actual(
 
     assert result is not None
     assert result["scheduled_time"].strftime("%Y-%m-%d %H:%M") == "2025-02-12 22:00"
+
+
+def test_adb_flight_record_uses_none_for_missing_values_and_shares_repeated_strings():
+    def adb_flight(number):
+        return {
+            "number": number,
+            "aircraft": {"model": "Airbus A320 "},
+            "airline": {"name": "Iberia", "icao": "IBE"},
+            "departure": {"airport": {"icao": "LEBL", "name": "Barcelona"}},
+            "arrival": {"revisedTime": {"local": "2025-02-12 13:30+01:00"}},
+        }
+
+    first = process_flight_data_adb(adb_flight("IB 1"), "arrivals")
+    second = process_flight_data_adb(adb_flight("IB 2"), "arrivals")
+
+    assert first.registration is None and first.flight_name is None and first.terminal is None
+    assert first.scheduled_time == datetime(2025, 2, 12, 13, 30)
+    assert first.aircraft_name == "Airbus A320"
+    assert first.airline_name is second.airline_name and first.origin_name is second.origin_name
+    assert first.get("terminal", "n/a") == "n/a" and first["flight_name_iata"] == "IB 1"
+
+
+
+def test_adb_times_go_through_the_shared_parser():
+    flight = {
+        "number": "IB 1",
+        "aircraft": {},
+        "airline": {},
+        "departure": {"airport": {"icao": "LEBL", "name": "Barcelona"}},
+        "arrival": {"revisedTime": {"local": "2025-07-01 13:30:00+02:00"}},
+    }
+
+    assert process_flight_data_adb(flight, "arrivals").scheduled_time == datetime(2025, 7, 1, 13, 30)
+    assert normalize_page("adb", "arrivals", [flight]).records()[0].scheduled_time == datetime(2025, 7, 1, 13, 30)
+
+def test_check_existing_fills_only_missing_fields():
+    all_flights = {}
+    adb = Flight(flight_name_iata="IB3170", registration="EC-MXV", terminal="4S")
+    aeroapi = Flight(flight_name_iata="IB3170", flight_name="IBE3170", registration="EC-XXX", aircraft_icao="A21N")
+
+    check_existing(all_flights, adb)
+    check_existing(all_flights, aeroapi)
+
+    merged = all_flights["IB3170"]
+    assert (merged.registration, merged.aircraft_icao, merged.flight_name) == ("EC-MXV", "A21N", "IBE3170")
+
+
+def test_check_flight_hands_the_provider_a_plain_dict():
+    seen = []
+
+    class Provider:
+        async def upsert_registration_sighting(self, flight, airport_icao):
+            seen.append(flight)
+            return None, False
+
+    record = Flight(flight_name_iata="IB3170", registration="ec-mxv", scheduled_time=datetime(2025, 2, 12, 13, 30))
+    flight_data, *_flags = asyncio.run(check_flight(record, {}, {}, {}, Provider()))
+
+    assert isinstance(flight_data, dict) and seen == [flight_data]
+    assert flight_data["scheduled_time"] == datetime(2025, 2, 12, 13, 30) and flight_data["diverted"] is None
+
+
+def test_check_flight_parses_string_times_on_plain_dicts():
+    class Provider:
+        async def upsert_registration_sighting(self, flight, airport_icao):
+            return None, False
+
+    flight = {"registration": None, "scheduled_time": "2025-07-01T08:00:00Z"}
+    flight_data, *_flags = asyncio.run(check_flight(flight, {}, {}, {}, Provider()))
+
+    assert flight_data["scheduled_time"] == datetime(2025, 7, 1, 10, 0)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import database.db_manager as db_manager
+from test.memory_provider import InMemoryProvider
+
+
+def test_in_memory_provider_tracks_first_sightings_per_airport() -> None:
+    provider = InMemoryProvider(interesting_models={"a388": "A380"}, interesting_registrations=["ec-mlp"])
+
+    async def run() -> tuple:
+        first = await provider.upsert_registration_sighting(
+            {"registration": "ec-mlp", "aircraft_icao": "a359", "scheduled_time": "2025-01-01 10:00"}, "LEMD"
+        )
+        again = await provider.upsert_registration_sighting(
+            {"registration": "EC-MLP", "airline": "ibe", "scheduled_time": "2025-01-01 12:00"}, "LEMD"
+        )
+        elsewhere = await provider.upsert_registration_sighting({"registration": "EC-MLP"}, "LEBL")
+        index = await provider.get_registrations_index("LEMD")
+        models = await provider.get_interesting_models_index("LEMD")
+        registrations = await provider.get_interesting_registrations_index("LEMD")
+        return first, again, elsewhere, index, models, registrations
+
+    first, again, elsewhere, index, models, registrations = asyncio.run(run())
+
+    assert first[1] is True and again[1] is False and elsewhere[1] is True
+    row = index["EC-MLP"]
+    assert (row["aircraft_type_icao"], row["airline_icao"]) == ("A359", "IBE")
+    assert (row["first_seen_at"], row["last_seen_at"]) == ("2025-01-01 10:00", "2025-01-01 12:00")
+    assert list(models) == ["A388"] and list(registrations) == ["EC-MLP"]
+
+
+def test_in_memory_provider_records_history_rows() -> None:
+    provider = InMemoryProvider()
+
+    row = asyncio.run(
+        provider.record_flight_history({"flight_name_iata": "IB3166", "registration": "ec-mlp"}, "LEMD")
+    )
+
+    assert provider.flight_history == [row]
+    assert (row["flight_id_external"], row["registration"]) == ("IB3166", "EC-MLP")
+
+
+def test_the_replay_stand_in_is_not_a_configurable_provider(monkeypatch) -> None:
+    monkeypatch.setattr(db_manager.cfg, "get_config", lambda _key: "memory")
+
+    with pytest.raises(ValueError, match="Unsupported database provider 'memory'"):
+        db_manager.get_database_provider(force_refresh=True)
@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from utils import clock
+from utils import data_processing as dp
+from utils.flight_batch import normalize_page
+
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "api" / "data"
+FIXED_NOW = datetime(2025, 2, 12, 9, 15, 42)
+
+
+@pytest.mark.parametrize(
+    "provider, movement, name, root",
+    [
+        ("adb", "arrivals", "adb_data_arrivals.json", "arrivals"),
+        ("adb", "departures", "adb_data_departures.json", "departures"),
+        ("aeroapi", "arrivals", "aeroapi_data_scheduled_arrivals.json", "scheduled_arrivals"),
+        ("aeroapi", "departures", "aeroapi_data_scheduled_departures.json", "scheduled_departures"),
+    ],
+)
+def test_batch_matches_the_per_flight_normalizers_on_the_fixtures(provider, movement, name, root):
+    flights = json.loads((DATA_DIR / name).read_text(encoding="utf-8"))[root]
+
+    with clock.use_clock(lambda: FIXED_NOW):
+        if provider == "aeroapi":
+            expected = [dp.process_flight_data_aeroapi(flight) for flight in flights]
+        else:
+            expected = [dp.process_flight_data_adb(flight, movement) for flight in flights]
+        batch = normalize_page(provider, movement, flights)
+
+    assert batch.records() == [record for record in expected if record is not None]
+
+
+def test_malformed_flights_are_skipped_without_raising():
+    flights = [
+        {"number": "IB 1", "aircraft": {"reg": "EC-MXV"}, "airline": {"icao": "IBE"}},
+        {"number": "IB 2", "aircraft": {}, "airline": {}, "departure": {"airport": {"icao": "LEBL", "name": "Barcelona"}}, "arrival": {}},
+    ]
+
+    with clock.use_clock(lambda: FIXED_NOW):
+        batch = normalize_page("adb", "arrivals", flights)
+
+    assert batch.skipped == 1 and batch.flight_name_iata == ["IB 2"]
+    assert batch.scheduled_time == [FIXED_NOW]
+
+
+def test_dedupe_and_window_match_check_existing_on_the_rows():
+    flights = [
+        {"registration": None, "ident_iata": None, "atc_ident": "IBE1", "scheduled_in": "2025-02-12T10:00:00Z"},
+        {"registration": "EC-MXV", "ident_iata": "IB1", "atc_ident": "IBE1", "aircraft_type": "A21N"},
+        {"registration": "EC-NEW", "ident_iata": "IB2", "scheduled_in": "2025-02-12T20:00:00Z"},
+        {"registration": "EC-OLD", "ident_iata": "IB2", "terminal_destination": "4"},
+    ]
+    with clock.use_clock(lambda: FIXED_NOW):
+        batch = normalize_page("aeroapi", "arrivals", flights)
+        expected: dict = {}
+        for record in [dp.process_flight_data_aeroapi(flight) for flight in flights]:
+            dp.check_existing(expected, record)
+
+    deduped = batch.dedupe()
+    assert deduped.records() == list(expected.values())
+    assert deduped.registration == ["EC-MXV", "EC-NEW"] and deduped.terminal == [None, "4"]
+
+    morning = deduped.within(datetime(2025, 2, 12, 10), datetime(2025, 2, 12, 12))
+    assert morning.flight_name == ["IBE1"] and list(morning.scheduled_epoch) == [deduped.scheduled_epoch[0]]
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from utils.flight import Flight
+from utils.flight_merge import FlightMergeEngine
+
+
+CONFIG = {
+    "source_precedence": ("aerodatabox", "aeroapi"),
+    "field_precedence": {"scheduled_time": ("aeroapi", "aerodatabox")},
+    "registration_bucket_minutes": 30.0,
+}
+SEEN = datetime(2025, 2, 12, 9, 0)
+
+
+def _arrival(**fields):
+    return Flight(destination_icao="LEMD", last_update=SEEN, **fields)
+
+
+def test_sources_missing_one_identifier_merge_through_the_registration():
+    engine = FlightMergeEngine(CONFIG)
+    engine.add(
+        _arrival(flight_name_iata="IB 3170", registration="EC-MXV", airline_name="Iberia", scheduled_time=datetime(2025, 2, 12, 10, 29)),
+        "aerodatabox",
+    )
+    engine.add(
+        _arrival(flight_name="IBE3170", registration="ec-mxv", airline_name="IBERIA EXPRESS", aircraft_icao="A21N", scheduled_time=datetime(2025, 2, 12, 10, 31)),
+        "aeroapi",
+    )
+
+    flights = engine.flights()
+    stats = engine.stats()
+
+    assert list(flights) == ["IB 3170"]
+    merged = flights["IB 3170"]
+    assert (merged.flight_name, merged.aircraft_icao, merged.airline_name) == ("IBE3170", "A21N", "Iberia")
+    assert merged.scheduled_time == datetime(2025, 2, 12, 10, 31)
+    assert stats["identity_matches"]["registration"] == 1
+    assert stats["conflicts"] == {"airline_name": 1, "scheduled_time": 1}
+
+
+def test_a_later_record_links_two_flights_already_indexed():
+    engine = FlightMergeEngine(CONFIG)
+    engine.add(_arrival(flight_name_iata="UX1040", terminal="2"), "aerodatabox")
+    engine.add(_arrival(flight_name="AEA39VM", aircraft_icao="B738"), "aeroapi")
+    assert len(engine) == 2
+
+    engine.add(_arrival(flight_name_iata="UX 1040", flight_name="AEA39VM"), "aeroapi")
+
+    assert len(engine) == 1
+    merged = engine.flights()["UX1040"]
+    assert (merged.terminal, merged.aircraft_icao, merged.flight_name) == ("2", "B738", "AEA39VM")
+    assert engine.stats()["identity_matches"] == {"iata": 1, "callsign": 1, "registration": 0}
+
+
+def test_fresher_record_wins_within_the_same_source_and_arrivals_stay_apart_from_departures():
+    engine = FlightMergeEngine(CONFIG)
+    engine.add(_arrival(flight_name_iata="FR689", terminal="1"), "aeroapi")
+    engine.add(Flight(flight_name_iata="FR689", terminal="2", last_update=datetime(2025, 2, 12, 9, 30)), "aeroapi")
+    engine.add(
+        Flight(flight_name_iata="FR690", origin_icao="LEMD", registration="EI-EMA", scheduled_time=datetime(2025, 2, 12, 10, 0)),
+        "aeroapi",
+    )
+    engine.add(_arrival(flight_name_iata="FR688", registration="EI-EMA", scheduled_time=datetime(2025, 2, 12, 9, 50)), "aeroapi")
+
+    flights = engine.flights()
+
+    assert flights["FR689"].terminal == "2"
+    assert sorted(flights) == ["FR688", "FR689", "FR690"]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+
+from aiohttp import web
+
+from utils import http_client
+
+
+async def _serve() -> tuple[web.AppRunner, str]:
+    async def handler(_request: web.Request) -> web.Response:
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/"
+
+
+async def _get_many(url: str, count: int) -> None:
+    for _ in range(count):
+        async with http_client.http_session("supabase") as session:
+            async with session.get(url) as response:
+                assert (await response.json()) == {"ok": True}
+
+
+def test_registry_reuses_connections() -> None:
+    async def scenario() -> tuple[int, int, bool]:
+        runner, url = await _serve()
+        try:
+            http_client.reset_connection_counts()
+            await _get_many(url, 5)
+            unpooled = http_client.connection_counts().get("supabase", 0)
+
+            http_client.reset_connection_counts()
+            await http_client.open_http_clients()
+            shared = http_client.get_http_session("supabase")
+            await _get_many(url, 5)
+            pooled = http_client.connection_counts().get("supabase", 0)
+            await http_client.close_http_clients()
+            return unpooled, pooled, shared.closed
+        finally:
+            await runner.cleanup()
+
+    unpooled, pooled, closed = asyncio.run(scenario())
+
+    assert unpooled == 5
+    assert pooled == 1
+    assert closed is True
+
+
+def test_registry_is_ignored_from_another_loop() -> None:
+    async def open_registry() -> None:
+        await http_client.open_http_clients()
+
+    async def lookup() -> object:
+        return http_client.get_http_session("supabase")
+
+    asyncio.run(open_registry())
+    try:
+        assert asyncio.run(lookup()) is None
+    finally:
+        asyncio.run(http_client.close_http_clients())
+
+
+def test_client_overrides_merge_with_shared_settings(monkeypatch) -> None:
+    monkeypatch.setattr(
+        http_client.cfg,
+        "get_config",
+        lambda key: {"limit_per_host": 4, "clients": {"supabase": {"limit_per_host": 16}}} if key == "http_client" else None,
+    )
+
+    assert http_client.load_http_client_config("supabase")["limit_per_host"] == 16
+    assert http_client.load_http_client_config("aeroapi")["limit_per_host"] == 4
+    assert http_client.load_http_client_config("aeroapi")["dns_cache_ttl_seconds"] == 300
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import time
+
+from api import ingestion
+
+
+DELAYS = {
+    ("arrivals", "aerodatabox"): 0.08,
+    ("arrivals", "aeroapi"): 0.02,
+    ("departures", "aerodatabox"): 0.05,
+    ("departures", "aeroapi"): 0.01,
+}
+
+
+async def _fake_stream(provider: str, movement: str, **_kwargs):
+    await asyncio.sleep(DELAYS[(movement, provider)])
+    if (movement, provider) == ("departures", "aerodatabox"):
+        raise RuntimeError("AERODATABOX_KEY is not configured")
+    yield [{"provider": provider, "movement": movement}]
+
+
+async def _collect(**kwargs) -> tuple[list[ingestion.SourceBatch], float]:
+    """The final batch of every source, with the flights of its pages folded in, in completion order."""
+    started = time.perf_counter()
+    flights: dict[tuple[str, str], list[dict]] = {}
+    results = []
+    async for batch in ingestion.iter_source_batches(
+        airport_icao="LEMD",
+        start_time="2025-01-01T10:00",
+        end_time="2025-01-01T12:00",
+        stream=_fake_stream,
+        **kwargs,
+    ):
+        source_flights = flights.setdefault((batch.movement, batch.provider), [])
+        if not batch.final:
+            source_flights.extend(batch.flights)
+            continue
+        results.append(dataclasses.replace(batch, flights=source_flights))
+    return results, time.perf_counter() - started
+
+
+def test_sources_run_concurrently_and_yield_in_completion_order() -> None:
+    results, elapsed = asyncio.run(_collect())
+
+    assert [(item.movement, item.provider) for item in results] == [
+        ("departures", "aeroapi"),
+        ("arrivals", "aeroapi"),
+        ("departures", "aerodatabox"),
+        ("arrivals", "aerodatabox"),
+    ]
+    assert elapsed < sum(DELAYS.values())
+
+
+def test_failed_source_does_not_stop_the_others() -> None:
+    results, _elapsed = asyncio.run(_collect())
+    by_source = {(item.movement, item.provider): item for item in results}
+
+    failed = by_source[("departures", "aerodatabox")]
+    assert not failed.ok and "AERODATABOX_KEY" in failed.error
+    assert failed.flights == []
+    assert by_source[("arrivals", "aerodatabox")].flights == [{"provider": "aerodatabox", "movement": "arrivals"}]
+    assert sum(1 for item in results if item.ok) == 3
+
+
+def test_concurrency_budget_limits_fetches_in_flight(monkeypatch) -> None:
+    monkeypatch.setattr(
+        ingestion,
+        "load_ingestion_config",
+        lambda: {"max_concurrency": 1, "min_start_interval_seconds": 0.0},
+    )
+
+    results, elapsed = asyncio.run(_collect())
+
+    assert len(results) == 4
+    assert elapsed >= sum(DELAYS.values()) * 0.9
+
+
+def test_merge_order_puts_aerodatabox_first_per_movement() -> None:
+    assert ingestion.source_order() == [
+        ("arrivals", "aerodatabox"),
+        ("arrivals", "aeroapi"),
+        ("departures", "aerodatabox"),
+        ("departures", "aeroapi"),
+    ]
+
+
+async def _paged_stream(provider: str, movement: str, **_kwargs):
+    for page in range(3):
+        await asyncio.sleep(0.05)
+        yield [{"provider": provider, "movement": movement, "page": page}]
+
+
+def test_pages_are_yielded_before_their_source_finishes() -> None:
+    async def collect() -> list[tuple[float, ingestion.SourceBatch]]:
+        started = time.perf_counter()
+        return [
+            (time.perf_counter() - started, batch)
+            async for batch in ingestion.iter_source_batches(
+                airport_icao="LEMD",
+                start_time="2025-01-01T10:00",
+                end_time="2025-01-01T12:00",
+                movements=("arrivals",),
+                stream=_paged_stream,
+            )
+        ]
+
+    events = asyncio.run(collect())
+    pages = [batch for _elapsed, batch in events if not batch.final]
+    finals = [(elapsed, batch) for elapsed, batch in events if batch.final]
+
+    assert len(pages) == 6 and len(finals) == 2
+    assert all(batch.ok for _elapsed, batch in finals)
+    first_page_at = next(elapsed for elapsed, batch in events if not batch.final)
+    assert first_page_at < min(elapsed for elapsed, _batch in finals) / 2
+
+
+def test_use_stream_serves_every_source_from_the_override() -> None:
+    async def collect() -> list[ingestion.SourceBatch]:
+        with ingestion.use_stream(_paged_stream):
+            return [
+                batch
+                async for batch in ingestion.iter_source_batches(
+                    airport_icao="LEMD",
+                    start_time="2025-01-01T10:00",
+                    end_time="2025-01-01T12:00",
+                    movements=("departures",),
+                )
+            ]
+
+    batches = asyncio.run(collect())
+
+    assert sorted(batch.provider for batch in batches if batch.final) == ["aeroapi", "aerodatabox"]
+    assert all(batch.flights[0]["movement"] == "departures" for batch in batches if not batch.final)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+
+import monitoring.api_usage as api_usage
+from monitoring.latency import LATENCY_HISTOGRAMS
+from monitoring.metrics import METRICS, _metrics_handler, record_cycle_metrics, render_prometheus
+
+
+def _reset(monkeypatch, tmp_path) -> None:
+    METRICS.clear()
+    LATENCY_HISTOGRAMS.clear()
+    api_usage.shutdown_usage_sink()
+    config = {
+        "enabled": True,
+        "db_path": str(tmp_path / "usage.db"),
+        "writer": {"batch_size": 1000, "flush_interval_seconds": 60.0},
+        "x": {"enforce_budget": True, "monthly_budget_usd": 10.0, "default_cost_per_call_usd": 0.01, "endpoint_costs_usd": {}},
+    }
+    monkeypatch.setattr(api_usage, "_load_usage_config", lambda: config)
+
+
+def test_render_exposes_counters_and_histograms(monkeypatch, tmp_path) -> None:
+    _reset(monkeypatch, tmp_path)
+    api_usage.record_api_event(
+        provider="supabase",
+        endpoint="GET /rest/v1/registrations",
+        method="GET",
+        status_code=200,
+        success=True,
+        duration_ms=42.0,
+    )
+    api_usage.record_api_event(
+        provider="supabase",
+        endpoint="GET /rest/v1/registrations",
+        method="GET",
+        status_code=503,
+        success=False,
+        duration_ms=30000.0,
+    )
+    api_usage.record_api_event(
+        provider="x",
+        endpoint="POST /2/tweets",
+        method="BUDGET",
+        status_code=None,
+        success=False,
+        blocked=True,
+        duration_ms=0.0,
+    )
+    record_cycle_metrics(12.5, {"processed": 40, "interesting": 2})
+    METRICS.inc("plane_spotter_cache_requests_total", cache="image_finder", result="hit")
+    METRICS.inc("plane_spotter_cache_requests_total", cache="image_finder", result="miss")
+
+    body = render_prometheus()
+    api_usage.shutdown_usage_sink()
+
+    assert 'plane_spotter_api_calls_total{provider="supabase",status_class="2xx"} 1' in body
+    assert 'plane_spotter_api_errors_total{provider="supabase",status_class="5xx"} 1' in body
+    assert 'plane_spotter_api_blocked_total{provider="x"} 1' in body
+    assert "plane_spotter_cycle_duration_seconds 12.5" in body
+    assert 'plane_spotter_cycle_flights{stage="interesting"} 2' in body
+    assert 'plane_spotter_cache_hit_ratio{cache="image_finder"} 0.500000' in body
+    assert "# TYPE plane_spotter_api_request_duration_seconds histogram" in body
+    assert (
+        'plane_spotter_api_request_duration_seconds_count{endpoint="GET /rest/v1/registrations",'
+        'provider="supabase",status_class="2xx"} 1'
+    ) in body
+    assert 'status_class="2xx",le="+Inf"} 1' in body
+
+
+def test_metrics_handler_serves_text_format() -> None:
+    METRICS.clear()
+    METRICS.set("plane_spotter_x_budget_headroom_usd", 7.25)
+
+    response = asyncio.run(_metrics_handler(None))
+
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert b"plane_spotter_x_budget_headroom_usd 7.25" in response.body
+
+
+def test_non_finite_gauges_render_instead_of_failing_the_scrape() -> None:
+    METRICS.clear()
+    METRICS.set("plane_spotter_x_budget_headroom_usd", float("inf"))
+    METRICS.set("plane_spotter_cycle_duration_seconds", float("nan"))
+    METRICS.set("plane_spotter_cycle_flights", float("-inf"), stage="interesting")
+
+    body = render_prometheus()
+
+    assert "plane_spotter_x_budget_headroom_usd +Inf" in body
+    assert "plane_spotter_cycle_duration_seconds NaN" in body
+    assert 'plane_spotter_cycle_flights{stage="interesting"} -Inf' in body
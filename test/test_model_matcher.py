@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from utils.data_processing import _is_interesting_model
+from utils.model_matcher import ModelMatcher, normalize_model_name
+
+
+MODELS = {
+    "B748": {"name": "Boeing 747-8"},
+    "A20N": {"name": None},
+    "A320": {"name": None},
+    "A388": {"name": "A380"},
+    "AT76": {"name": None},
+}
+
+
+def test_names_are_split_into_letter_and_digit_tokens() -> None:
+    assert normalize_model_name("A321neo") == " a 321 neo "
+    assert normalize_model_name("Airbus A321 NEO") == " airbus a 321 neo "
+    assert normalize_model_name(None) == ""
+
+
+def test_icao_codes_and_indexed_names_match() -> None:
+    matcher = ModelMatcher(MODELS)
+
+    assert matcher.match(" a20n ", None) == "A20N"
+    assert matcher.match(None, "Airbus A380-800") == "A388"
+    assert matcher.match(None, "Boeing 747-8 Intercontinental") == "B748"
+    assert matcher.match("B738", "Boeing 737-800") is None
+    assert len(matcher) == 5
+
+
+def test_longest_alias_decides_the_designator() -> None:
+    matcher = ModelMatcher(MODELS)
+
+    assert matcher.match(None, "Airbus A320 NEO") == "A20N"
+    assert matcher.match(None, "Airbus A320") == "A320"
+    assert matcher.match(None, "ATR 72-600") == "AT76"
+    # ATR 72 is not indexed, so the plain ATR 72 must not fall back to the -600.
+    assert matcher.match(None, "ATR 72-500") is None
+
+
+def test_patterns_only_match_whole_tokens() -> None:
+    matcher = ModelMatcher({"A380": {"name": "A380"}, "A318": {"name": None}})
+
+    assert matcher.match(None, "Airbus A3800") is None
+    assert matcher.match(None, "Airbus A318-100") == "A318"
+
+
+def test_is_interesting_model_accepts_the_plain_index_or_the_matcher() -> None:
+    flight = {"aircraft_icao": None, "aircraft_name": "Boeing 747-8F"}
+
+    assert _is_interesting_model(flight, MODELS)
+    assert _is_interesting_model(flight, ModelMatcher(MODELS))
+    assert not _is_interesting_model(flight, {})
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import gzip
+
+import pytest
+
+from api import ingestion, raw_archive, raw_sink
+
+
+@pytest.fixture()
+def archive_config(monkeypatch, tmp_path):
+    config = {"enabled": True, "dir": str(tmp_path / "archive"), "compression_level": 6, "replay_cycle": None}
+    monkeypatch.setattr(raw_archive, "load_raw_archive_config", lambda: dict(config))
+    monkeypatch.setattr(raw_sink, "load_raw_archive_config", lambda: dict(config))
+    yield config
+    raw_archive.close_raw_archives()
+
+
+def _append(archive: raw_archive.RawArchive, fetched_at: str, seq: int, flights: list[dict], cycle: str = "c1") -> None:
+    archive.append(
+        airport_icao="LEMD",
+        provider="aeroapi",
+        movement="arrivals",
+        cycle_started_at=cycle,
+        fetched_at=fetched_at,
+        seq=seq,
+        flights=flights,
+    )
+
+
+def test_fetch_is_read_back_from_its_own_records(archive_config, tmp_path) -> None:
+    archive = raw_archive.get_raw_archive()
+    _append(archive, "t1", 0, [{"ident": "OLD"}], cycle="c0")
+    _append(archive, "t2", 0, [{"ident": "A"}])
+    _append(archive, "t2", 1, [{"ident": "B"}])
+
+    segment = next((tmp_path / "archive").glob("*.seg"))
+    first_length = len(gzip.compress(b'[{"ident":"OLD"}]', compresslevel=6))
+    with open(segment, "r+b") as handle:
+        handle.write(b"\0" * first_length)  # a damaged earlier record must not matter
+
+    payload = archive.read_payload(airport_icao="LEMD", provider="aeroapi", movement="arrivals", fetched_at="t2")
+
+    assert payload == {"scheduled_arrivals": [{"ident": "A"}, {"ident": "B"}]}
+
+
+def test_latest_cycle_skips_incomplete_fetches(archive_config) -> None:
+    archive = raw_archive.get_raw_archive()
+    _append(archive, "t1", 0, [{"ident": "A"}], cycle="c1")
+    archive.mark_complete(airport_icao="LEMD", provider="aeroapi", movement="arrivals", fetched_at="t1")
+    _append(archive, "t2", 0, [{"ident": "PARTIAL"}], cycle="c2")
+
+    payload = archive.read_payload(airport_icao="LEMD", provider="aeroapi", movement="arrivals")
+    fetches = archive.list_fetches(airport_icao="LEMD")
+
+    assert payload == {"scheduled_arrivals": [{"ident": "A"}]}
+    assert [(item["fetched_at"], item["complete"]) for item in fetches] == [("t2", False), ("t1", True)]
+
+
+def test_sink_pages_replay_through_preloaded_mode(archive_config) -> None:
+    sink = raw_sink.open_raw_sink("aerodatabox", "departures", "lemd")
+    sink.append([{"number": "FR 1"}])
+    sink.append([{"number": "FR 2"}])
+    sink.close()
+    raw_sink.flush_raw_sinks()
+
+    payload = ingestion.load_preloaded_payload("aerodatabox", "departures", "LEMD")
+
+    assert payload == {"departures": [{"number": "FR 1"}, {"number": "FR 2"}]}
+
+
+def test_list_cycles_returns_complete_cycles_oldest_first(archive_config) -> None:
+    archive = raw_archive.get_raw_archive()
+    for cycle, fetched_at in (("c2", "t2"), ("c1", "t1"), ("c3", "t3")):
+        _append(archive, fetched_at, 0, [{"ident": cycle}], cycle=cycle)
+    for fetched_at in ("t1", "t2"):
+        archive.mark_complete(airport_icao="LEMD", provider="aeroapi", movement="arrivals", fetched_at=fetched_at)
+
+    assert archive.list_cycles(airport_icao="lemd") == ["c1", "c2"]
+    assert archive.list_cycles(airport_icao="LEMD", limit=1) == ["c2"]
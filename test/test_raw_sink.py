@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+
+from api import raw_sink
+
+
+def test_pages_stream_into_one_payload_file(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(raw_sink, "RAW_DATA_DIR", tmp_path)
+    monkeypatch.setattr(raw_sink, "load_raw_archive_config", lambda: {"enabled": False})
+
+    sink = raw_sink.open_raw_sink("aeroapi", "arrivals", "LEMD")
+    sink.append([{"ident": "A"}, {"ident": "B"}])
+    sink.append([])
+    sink.append([{"ident": "C"}])
+    sink.close()
+    raw_sink.flush_raw_sinks()
+
+    path = tmp_path / "lemd_aeroapi_data_scheduled_arrivals.json"
+    assert json.loads(path.read_text(encoding="utf-8")) == {
+        "scheduled_arrivals": [{"ident": "A"}, {"ident": "B"}, {"ident": "C"}]
+    }
+    assert not path.with_name(f"{path.name}.tmp").exists()
+
+
+def test_aborted_sink_keeps_previous_file(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(raw_sink, "RAW_DATA_DIR", tmp_path)
+    monkeypatch.setattr(raw_sink, "load_raw_archive_config", lambda: {"enabled": False})
+    path = tmp_path / "lemd_adb_data_departures.json"
+    path.write_text('{"departures": [{"number": "FR 1"}]}', encoding="utf-8")
+
+    sink = raw_sink.open_raw_sink("aerodatabox", "departures", "LEMD")
+    sink.append([{"number": "FR 2"}])
+    sink.abort()
+    raw_sink.flush_raw_sinks()
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {"departures": [{"number": "FR 1"}]}
+    assert list(tmp_path.iterdir()) == [path]
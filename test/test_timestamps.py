@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from database.providers.supabase import _to_iso_datetime
+from utils.timestamps import airport_timezone, parse_timestamp
+
+
+def test_airport_timezones_are_resolved_once_per_airport() -> None:
+    madrid = airport_timezone("lemd")
+
+    assert madrid is airport_timezone("LEMD") and str(madrid) == "Europe/Madrid"
+    assert str(airport_timezone("GCLP")) == "Atlantic/Canary"
+    assert str(airport_timezone("ZZZZ")) == "Europe/Madrid"
+
+
+def test_offsets_are_converted_to_the_airport_local_time() -> None:
+    madrid, canary = airport_timezone("LEMD"), airport_timezone("GCLP")
+
+    assert parse_timestamp("2025-02-12T12:30:00Z", madrid) == datetime(2025, 2, 12, 13, 30)
+    assert parse_timestamp("2025-07-12T12:30:00Z", madrid) == datetime(2025, 7, 12, 14, 30)
+    assert parse_timestamp("2025-07-12T12:30:00Z", canary) == datetime(2025, 7, 12, 13, 30)
+    assert parse_timestamp("2025-02-12T12:30:00Z") == datetime(2025, 2, 12, 12, 30, tzinfo=timezone.utc)
+
+
+def test_every_supported_shape_parses_and_garbage_does_not() -> None:
+    expected = datetime(2025, 2, 12, 13, 30)
+
+    for text in ("2025-02-12 13:30", "2025-02-12T13:30", "2025-02-12T13:30:00", " 2025-02-12 13:30:00 "):
+        assert parse_timestamp(text) == expected
+    assert parse_timestamp(expected) is expected
+    # Same shape as a valid time: the memoized parser must not hide the failure or the next valid value.
+    assert parse_timestamp("2025-13-12 13:30") is None
+    assert parse_timestamp("2025-12-12 13:30") == datetime(2025, 12, 12, 13, 30)
+    assert parse_timestamp("soon") is None and parse_timestamp("") is None and parse_timestamp(None) is None
+
+
+def test_database_timestamps_accept_datetimes_and_strings() -> None:
+    assert _to_iso_datetime(datetime(2025, 2, 12, 13, 30)) == "2025-02-12T13:30:00+00:00"
+    assert _to_iso_datetime("2025-02-12 13:30") == "2025-02-12T13:30:00+00:00"
+    assert _to_iso_datetime("2025-02-12T13:30:00+01:00") == "2025-02-12T13:30:00+01:00"
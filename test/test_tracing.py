@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+import monitoring.tracing as tracing
+
+
+def _configure(monkeypatch, tmp_path, **overrides) -> dict:
+    config = {
+        "enabled": True,
+        "sample_rate": 1.0,
+        "file": str(tmp_path / "traces.jsonl"),
+        "max_bytes": 1024 * 1024,
+        "backup_count": 2,
+    }
+    config.update(overrides)
+    monkeypatch.setattr(tracing, "load_tracing_config", lambda: config)
+    return config
+
+
+def _read_traces(path) -> list[list[dict]]:
+    with open(path, "r", encoding="utf-8") as file_handle:
+        return [tracing._load_spans(line) for line in file_handle if line.strip()]
+
+
+def test_cycle_exports_nested_span_tree(monkeypatch, tmp_path) -> None:
+    config = _configure(monkeypatch, tmp_path)
+
+    async def cycle() -> None:
+        with tracing.start_trace("cycle"):
+            with tracing.span("fetch.aeroapi", movement="arrivals"):
+                await asyncio.to_thread(tracing.record_completed_span, "GET /airports", 5.0, **{"http.status_code": 200})
+            with tracing.span("flight"):
+                with tracing.span("check_flight"):
+                    pass
+
+    asyncio.run(cycle())
+    tracing.flush_traces()
+
+    [spans] = _read_traces(config["file"])
+    by_name = {item["name"]: item for item in spans}
+    assert len({item["traceId"] for item in spans}) == 1
+    assert "parentSpanId" not in by_name["cycle"]
+    assert by_name["fetch.aeroapi"]["parentSpanId"] == by_name["cycle"]["spanId"]
+    assert by_name["GET /airports"]["parentSpanId"] == by_name["fetch.aeroapi"]["spanId"]
+    assert by_name["check_flight"]["parentSpanId"] == by_name["flight"]["spanId"]
+    assert {"key": "movement", "value": {"stringValue": "arrivals"}} in by_name["fetch.aeroapi"]["attributes"]
+
+
+def test_unsampled_cycles_are_not_written(monkeypatch, tmp_path) -> None:
+    config = _configure(monkeypatch, tmp_path, sample_rate=0.0)
+
+    with tracing.start_trace("cycle") as root:
+        with tracing.span("phase") as child:
+            tracing.record_completed_span("GET /x", 1.0)
+
+    assert root is None and child is None
+    assert not (tmp_path / "traces.jsonl").exists()
+    assert config["sample_rate"] == 0.0
+
+
+def test_trace_file_rotates(monkeypatch, tmp_path) -> None:
+    _configure(monkeypatch, tmp_path, max_bytes=1024, backup_count=2)
+
+    for _ in range(20):
+        with tracing.start_trace("cycle"):
+            for index in range(3):
+                with tracing.span(f"phase-{index}"):
+                    pass
+    tracing.flush_traces()
+
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert (tmp_path / "traces.jsonl.2").exists()
+    assert not (tmp_path / "traces.jsonl.3").exists()
+
+
+def test_traces_are_written_off_the_calling_thread(monkeypatch, tmp_path) -> None:
+    _configure(monkeypatch, tmp_path)
+    writers: list[str] = []
+    export = tracing.export_trace
+
+    def recording_export(trace, tracing_cfg=None):
+        writers.append(threading.current_thread().name)
+        return export(trace, tracing_cfg)
+
+    monkeypatch.setattr(tracing, "export_trace", recording_export)
+    with tracing.start_trace("cycle"):
+        pass
+    tracing.flush_traces()
+
+    assert writers == ["trace-writer"]
+    assert len(_read_traces(tmp_path / "traces.jsonl")) == 1
+
+
+def _span(span_id: str, parent: str | None, name: str, start_ms: int, end_ms: int) -> dict:
+    payload = {
+        "traceId": "t",
+        "spanId": span_id,
+        "name": name,
+        "startTimeUnixNano": str(start_ms * 1_000_000),
+        "endTimeUnixNano": str(end_ms * 1_000_000),
+    }
+    if parent:
+        payload["parentSpanId"] = parent
+    return payload
+
+
+def test_critical_path_follows_latest_finishing_children() -> None:
+    spans = [
+        _span("root", None, "cycle", 0, 100),
+        _span("a", "root", "fetch", 0, 60),
+        _span("a1", "a", "GET fast", 0, 10),
+        _span("a2", "a", "GET slow", 0, 55),
+        _span("b", "root", "flight", 60, 95),
+        _span("c", "root", "overlapping", 10, 50),
+    ]
+
+    path = tracing.critical_path(spans)
+
+    assert [entry["span"]["name"] for entry in path] == ["cycle", "fetch", "GET slow", "flight"]
+    assert path[0]["self_ms"] == 5.0
+
+
+def test_cli_prints_critical_path(monkeypatch, tmp_path, capsys) -> None:
+    config = _configure(monkeypatch, tmp_path)
+    with tracing.start_trace("cycle"):
+        with tracing.span("index.registrations"):
+            pass
+
+    assert tracing.main(["--file", config["file"]]) == 0
+    output = capsys.readouterr().out
+    assert "cycle" in output and "index.registrations" in output
+    assert json.loads(open(config["file"], encoding="utf-8").readline())["resourceSpans"]
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from monitoring.api_usage import (
+    _ensure_schema,
+    _INSERT_EVENT_SQL,
+    _latency_rollup_rows,
+    _monthly_rollup_rows,
+    _UPSERT_LATENCY_SQL,
+    _UPSERT_MONTHLY_SQL,
+)
+from monitoring.retention import compact_database_copy, compact_usage_events
+
+
+NOW = datetime(2025, 6, 15, 12, 0, tzinfo=timezone.utc)
+
+
+def _event(
+    provider: str,
+    created_at: datetime,
+    *,
+    duration_ms: float | None = 120.0,
+    cost: float = 0.0,
+    blocked: bool = False,
+    status_code: int = 200,
+):
+    return (
+        provider,
+        f"GET /{provider}",
+        "GET",
+        None if blocked else status_code,
+        0 if blocked or status_code >= 400 else 1,
+        1 if blocked else 0,
+        duration_ms,
+        cost,
+        None,
+        json.dumps({"registration": "EC-ABC"}),
+        created_at.isoformat(),
+    )
+
+
+def _seed(conn: sqlite3.Connection, rows) -> None:
+    _ensure_schema(conn)
+    with conn:
+        conn.executemany(_INSERT_EVENT_SQL, rows)
+        conn.executemany(_UPSERT_MONTHLY_SQL, _monthly_rollup_rows(rows))
+        conn.executemany(_UPSERT_LATENCY_SQL, _latency_rollup_rows(rows))
+
+
+def _latency(conn: sqlite3.Connection) -> list[tuple]:
+    return conn.execute(
+        "SELECT status_class, hour, duration_count, duration_ms_sum FROM api_usage_latency ORDER BY status_class, hour"
+    ).fetchall()
+
+
+def test_old_events_fold_into_hourly_counts_and_keep_latency_history(tmp_path) -> None:
+    conn = sqlite3.connect(tmp_path / "usage.db")
+    old_hour = NOW - timedelta(days=40)
+    _seed(
+        conn,
+        [
+            _event("supabase", old_hour.replace(minute=5), duration_ms=10.0),
+            _event("supabase", old_hour.replace(minute=45), duration_ms=1000.0),
+            _event("supabase", old_hour.replace(minute=50), duration_ms=None),
+            _event("supabase", old_hour.replace(minute=52), duration_ms=50.0, status_code=503),
+            _event("supabase", old_hour.replace(minute=55), duration_ms=0.0, blocked=True),
+            _event("supabase", NOW - timedelta(days=1)),
+        ],
+    )
+    latency_before = _latency(conn)
+
+    report = compact_usage_events(conn, raw_event_days=30, convert_auto_vacuum=True, now=NOW)
+
+    assert report["events_compacted"] == 5
+    assert conn.execute("SELECT COUNT(*) FROM api_usage_events").fetchone()[0] == 1
+    row = conn.execute("SELECT hour, total_calls, successful_calls, blocked_calls FROM api_usage_hourly").fetchone()
+    assert row == (old_hour.strftime("%Y-%m-%dT%H:00:00+00:00"), 5, 3, 1)
+    # The per-status histograms written with the events outlive them, unchanged.
+    assert _latency(conn) == latency_before
+    old = [entry for entry in latency_before if entry[1] == row[0]]
+    assert [(status, count) for status, _hour, count, _sum in old] == [("2xx", 2), ("5xx", 1)]
+    assert old[0][3] == pytest.approx(1010.0)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    conn.close()
+
+
+def test_compaction_merges_into_existing_hour_and_keeps_monthly_rollup(tmp_path) -> None:
+    conn = sqlite3.connect(tmp_path / "usage.db")
+    old_hour = NOW - timedelta(days=40)
+    _seed(conn, [_event("x", old_hour, cost=0.01)])
+    compact_usage_events(conn, raw_event_days=30, now=NOW)
+
+    _seed(conn, [_event("x", old_hour.replace(minute=30), cost=0.01)])
+    compact_usage_events(conn, raw_event_days=30, now=NOW)
+
+    assert conn.execute("SELECT total_calls FROM api_usage_hourly").fetchone()[0] == 2
+    month_cost = conn.execute(
+        "SELECT billable_cost_usd FROM api_usage_monthly WHERE provider = 'x'"
+    ).fetchone()[0]
+    assert month_cost == pytest.approx(0.02)
+    # The live path never runs the full VACUUM that converting a legacy file needs.
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    conn.close()
+
+
+def test_latency_table_is_backfilled_once_from_raw_events(tmp_path) -> None:
+    conn = sqlite3.connect(tmp_path / "usage.db")
+    _ensure_schema(conn)
+    with conn:
+        conn.executemany(_INSERT_EVENT_SQL, [_event("x", NOW, duration_ms=20.0), _event("x", NOW, status_code=404)])
+        conn.execute("DELETE FROM api_usage_meta WHERE key = 'latency_rollup_backfilled'")
+
+    _ensure_schema(conn)
+    _ensure_schema(conn)
+
+    hour = NOW.strftime("%Y-%m-%dT%H:00:00+00:00")
+    assert _latency(conn) == [("2xx", hour, 1, 20.0), ("4xx", hour, 1, 120.0)]
+    conn.close()
+
+
+def test_offline_compaction_leaves_source_untouched(tmp_path) -> None:
+    source_path = tmp_path / "usage.db"
+    conn = sqlite3.connect(source_path)
+    _seed(conn, [_event("aeroapi", datetime.now(timezone.utc) - timedelta(days=90))])
+    conn.close()
+
+    report = compact_database_copy(source_path, tmp_path / "usage.compacted.db", raw_event_days=30)
+
+    assert report["events_compacted"] == 1
+    conn = sqlite3.connect(source_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM api_usage_events").fetchone()[0] == 1
+    finally:
+        conn.close()
+    copy = sqlite3.connect(tmp_path / "usage.compacted.db")
+    try:
+        assert copy.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    finally:
+        copy.close()
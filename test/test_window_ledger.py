@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from api import window_ledger
+
+
+def _dt(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M")
+
+
+@pytest.fixture()
+def ledger_config(monkeypatch, tmp_path):
+    config = {
+        "enabled": True,
+        "db_path": str(tmp_path / "cache.db"),
+        "head_refresh_minutes": 30.0,
+        "max_window_age_minutes": 240.0,
+        "cache_retention_hours": 24.0,
+    }
+    monkeypatch.setattr(window_ledger, "load_delta_polling_config", lambda: dict(config))
+    yield config
+    window_ledger.close_window_ledger()
+
+
+def _flight(number: str, local_time: str) -> dict:
+    return {"number": number, "arrival": {"scheduledTime": {"local": local_time}}}
+
+
+def test_plan_covers_tail_and_head_refresh() -> None:
+    slices = window_ledger.plan_fetch_slices(
+        _dt("2025-01-01T10:15"),
+        _dt("2025-01-01T12:15"),
+        [(_dt("2025-01-01T10:00"), _dt("2025-01-01T12:00"))],
+        head_refresh_minutes=30,
+    )
+
+    assert slices == [
+        (_dt("2025-01-01T10:15"), _dt("2025-01-01T10:45")),
+        (_dt("2025-01-01T12:00"), _dt("2025-01-01T12:15")),
+    ]
+
+
+def test_plan_fills_gaps_between_covered_ranges() -> None:
+    slices = window_ledger.plan_fetch_slices(
+        _dt("2025-01-01T10:00"),
+        _dt("2025-01-01T14:00"),
+        [
+            (_dt("2025-01-01T09:00"), _dt("2025-01-01T11:00")),
+            (_dt("2025-01-01T12:00"), _dt("2025-01-01T13:00")),
+        ],
+        head_refresh_minutes=0,
+    )
+
+    assert slices == [
+        (_dt("2025-01-01T11:00"), _dt("2025-01-01T12:00")),
+        (_dt("2025-01-01T13:00"), _dt("2025-01-01T14:00")),
+    ]
+
+
+def _stream(
+    iter_slice,
+    now: str,
+    *,
+    provider: str = "aeroapi",
+    start: str = "2025-01-01T00:00",
+    end: str = "2025-01-01T23:59",
+) -> list[dict]:
+    async def collect() -> list[dict]:
+        flights: list[dict] = []
+        async for batch in window_ledger.stream_window(
+            airport_icao="LEMD",
+            movement="arrivals",
+            provider=provider,
+            start_time=start,
+            end_time=end,
+            iter_slice=iter_slice,
+            now=_dt(now),
+        ):
+            flights.extend(batch)
+        return flights
+
+    return asyncio.run(collect())
+
+
+def test_second_cycle_fetches_only_delta_and_returns_full_window(ledger_config) -> None:
+    requested: list[tuple[str, str]] = []
+    upstream = {
+        "FR 1": _flight("FR 1", "2025-01-01T10:20"),
+        "FR 2": _flight("FR 2", "2025-01-01T11:30"),
+        "FR 3": _flight("FR 3", "2025-01-01T12:10"),
+    }
+
+    async def iter_slice(start: str, end: str, complete):
+        requested.append((start, end))
+        yield [
+            flight
+            for flight in upstream.values()
+            if start <= flight["arrival"]["scheduledTime"]["local"][:16] < end
+        ]
+        complete()
+
+    def run(start: str, end: str, now: str) -> list[str]:
+        flights = _stream(iter_slice, now, provider="aerodatabox", start=start, end=end)
+        return sorted(flight["number"] for flight in flights)
+
+    ledger_config["head_refresh_minutes"] = 0.0
+    first = run("2025-01-01T10:00", "2025-01-01T12:00", "2025-01-01T10:00")
+    ledger_config["head_refresh_minutes"] = 30.0
+    second = run("2025-01-01T10:15", "2025-01-01T12:15", "2025-01-01T10:15")
+
+    assert first == ["FR 1", "FR 2"]
+    assert requested == [
+        ("2025-01-01T10:00", "2025-01-01T12:00"),
+        ("2025-01-01T10:15", "2025-01-01T10:45"),
+        ("2025-01-01T12:00", "2025-01-01T12:15"),
+    ]
+    assert second == ["FR 1", "FR 2", "FR 3"]
+
+
+@pytest.mark.parametrize("ending", ["raises", "ends_without_completing"])
+def test_slice_that_fails_without_yielding_keeps_cache_and_coverage_open(ledger_config, ending) -> None:
+    cached = {"fa_flight_id": "A1", "scheduled_in": "2025-01-01T10:30:00Z"}
+    requested: list[tuple[str, str]] = []
+    # Coverage goes stale within a minute and nothing is head-refreshed, so only a failed slice is re-fetched.
+    ledger_config["head_refresh_minutes"] = 0.0
+    ledger_config["max_window_age_minutes"] = 1.0
+
+    async def succeeding(start, end, complete):
+        yield [cached]
+        complete()
+
+    async def failing(start, end, complete):
+        requested.append((start, end))
+        if ending == "raises":
+            raise RuntimeError("no data fetched")
+        return
+        yield
+
+    assert _stream(succeeding, "2025-01-01T00:00") == [cached]
+    # The failed read must neither prune A1 nor mark the window as covered.
+    assert _stream(failing, "2025-01-01T00:05") == [cached]
+    assert _stream(failing, "2025-01-01T00:05") == [cached]
+    assert requested == [("2025-01-01T00:00", "2025-01-01T23:59")] * 2
+
+
+def test_identity_uses_the_airport_zone_not_the_host_zone() -> None:
+    flight = {"fa_flight_id": "A1", "scheduled_in": "2025-01-01T10:30:00Z"}
+
+    assert window_ledger.flight_identity("aeroapi", "arrivals", flight, "LEMD") == ("A1", _dt("2025-01-01T11:30"))
+    assert window_ledger.flight_identity("aeroapi", "arrivals", flight, "GCLP") == ("A1", _dt("2025-01-01T10:30"))
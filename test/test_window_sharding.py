@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from aiohttp import web
+
+import api.api_handler_aeroapi as aeroapi
+import api.api_handler_aerodatabox as aerodatabox
+from api import rate_limiter, raw_sink, window_sharding
+from api.aeroapi_key_manager import AeroApiCredential
+
+
+PAGE_SIZE = 15
+PAGE_DELAY_SECONDS = 0.05
+WINDOW_START = datetime(2025, 1, 1, 6, 0)
+FLIGHTS = [
+    {
+        "fa_flight_id": f"IBE{index}-1",
+        "scheduled_in": (WINDOW_START + timedelta(minutes=10 * index)).strftime("%Y-%m-%dT%H:%M:00Z"),
+    }
+    for index in range(72)
+]
+
+
+def test_split_window_covers_the_range_in_order() -> None:
+    assert window_sharding.split_window("2025-01-01T06:00", "2025-01-01T11:00", 120) == [
+        ("2025-01-01T06:00", "2025-01-01T08:00"),
+        ("2025-01-01T08:00", "2025-01-01T10:00"),
+        ("2025-01-01T10:00", "2025-01-01T11:00"),
+    ]
+
+
+def test_merge_drops_boundary_duplicates_and_sorts() -> None:
+    late = {"fa_flight_id": "B", "scheduled_in": "2025-01-01T09:00:00Z"}
+    early = {"fa_flight_id": "A", "scheduled_in": "2025-01-01T07:00:00Z"}
+    undated = {"ident": "X"}
+
+    merged = window_sharding.merge_shard_flights("aeroapi", "arrivals", [[late, undated], [early, dict(late)]])
+
+    assert merged == [early, late, undated]
+
+
+async def _scheduled_arrivals(request: web.Request) -> web.Response:
+    await asyncio.sleep(PAGE_DELAY_SECONDS)
+    start, end = request.query["start"], request.query["end"]
+    cursor = int(request.query.get("cursor", "0"))
+    in_window = [flight for flight in FLIGHTS if start <= flight["scheduled_in"][:16] < end]
+    page = in_window[cursor : cursor + PAGE_SIZE]
+    links = None
+    if cursor + PAGE_SIZE < len(in_window):
+        links = {
+            "next": f"/airports/lemd/flights/scheduled_arrivals?start={start}&end={end}&cursor={cursor + PAGE_SIZE}"
+        }
+    return web.json_response({"scheduled_arrivals": page, "links": links})
+
+
+async def _adb_window(request: web.Request) -> web.Response:
+    start = datetime.strptime(request.match_info["start"], "%Y-%m-%dT%H:%M")
+    end = datetime.strptime(request.match_info["end"], "%Y-%m-%dT%H:%M")
+    # Larger windows return larger payloads; model that as latency per hour.
+    await asyncio.sleep(PAGE_DELAY_SECONDS * (end - start).total_seconds() / 3600.0 / 2)
+    arrivals = [
+        {
+            "number": flight["fa_flight_id"],
+            "arrival": {"scheduledTime": {"utc": flight["scheduled_in"].replace("T", " ")[:16] + "Z"}},
+        }
+        for flight in FLIGHTS
+        if start.strftime("%Y-%m-%dT%H:%M") <= flight["scheduled_in"][:16] < end.strftime("%Y-%m-%dT%H:%M")
+    ]
+    return web.json_response({"arrivals": arrivals})
+
+
+def _use_shards(monkeypatch, shard_minutes: float) -> None:
+    settings = {"shard_minutes": shard_minutes, "max_parallel_shards": 6}
+    monkeypatch.setattr(aeroapi, "load_sharding_config", lambda _provider: settings)
+    monkeypatch.setattr(aerodatabox, "load_sharding_config", lambda _provider: settings)
+
+
+async def _timed_fetches(monkeypatch, shard_minutes: float) -> dict[str, tuple[float, list[str]]]:
+    app = web.Application()
+    app.router.add_get("/airports/lemd/flights/scheduled_arrivals", _scheduled_arrivals)
+    app.router.add_get("/flights/airports/Icao/LEMD/{start}/{end}", _adb_window)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    monkeypatch.setattr(aeroapi, "AEROAPI_BASE_URL", base_url)
+    monkeypatch.setattr(aerodatabox, "ADB_BASE_URL", base_url)
+    _use_shards(monkeypatch, shard_minutes)
+
+    timings: dict[str, tuple[float, list[str]]] = {}
+    try:
+        started = time.perf_counter()
+        data = await aeroapi.fetch_aeroapi_scheduled("arrivals", "2025-01-01T06:00", "2025-01-01T18:00")
+        timings["aeroapi"] = (
+            time.perf_counter() - started,
+            [flight["fa_flight_id"] for flight in data["scheduled_arrivals"]],
+        )
+
+        started = time.perf_counter()
+        data = await aerodatabox.fetch_adb_data("arrivals", "2025-01-01T06:00", "2025-01-01T18:00")
+        timings["aerodatabox"] = (time.perf_counter() - started, [flight["number"] for flight in data["arrivals"]])
+    finally:
+        await runner.cleanup()
+    return timings
+
+
+def test_sharded_twelve_hour_window_is_faster_and_identical(monkeypatch, tmp_path) -> None:
+    credential = AeroApiCredential(alias="key1", key="test-key-1")
+
+    async def fake_select(**_kwargs):
+        return credential
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(raw_sink, "load_raw_archive_config", lambda: {"enabled": False})
+    (tmp_path / "api" / "data").mkdir(parents=True)
+    monkeypatch.setenv("AERODATABOX_KEY", "test-key")
+    monkeypatch.setattr(aeroapi, "select_aeroapi_credential", fake_select)
+    monkeypatch.setattr(aeroapi, "record_api_event", lambda **_kwargs: None)
+    monkeypatch.setattr(aeroapi, "record_aeroapi_page", lambda *_args: 0.0)
+    monkeypatch.setattr(aerodatabox, "record_api_event", lambda **_kwargs: None)
+    monkeypatch.setattr(
+        rate_limiter,
+        "load_aeroapi_rate_limit_config",
+        lambda: {
+            "requests_per_minute": 6000.0,
+            "burst": 20.0,
+            "min_requests_per_minute": 1.0,
+            "backoff_factor": 0.5,
+            "recovery_per_success": 60.0,
+            "default_retry_after_seconds": 0.0,
+        },
+    )
+    rate_limiter.clear_credential_buckets()
+    try:
+        serial = asyncio.run(_timed_fetches(monkeypatch, 720))
+        sharded = asyncio.run(_timed_fetches(monkeypatch, 120))
+    finally:
+        rate_limiter.clear_credential_buckets()
+
+    expected = [flight["fa_flight_id"] for flight in FLIGHTS]
+    for provider in ("aeroapi", "aerodatabox"):
+        assert serial[provider][1] == expected
+        assert sharded[provider][1] == expected
+        assert sharded[provider][0] < serial[provider][0] * 0.6
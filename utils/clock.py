@@ -0,0 +1,30 @@
+"""Injectable wall clock for the cycle loop.
+
+Production code calls :func:`now` instead of ``datetime.now()``; replays
+install a simulated clock with :func:`use_clock` for the duration of a run.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Iterator
+
+
+_CLOCK: ContextVar[Callable[[], datetime] | None] = ContextVar("plane_spotter_clock", default=None)
+
+
+def now() -> datetime:
+    """Naive local time, from the installed clock if any."""
+    clock = _CLOCK.get()
+    return clock() if clock is not None else datetime.now()
+
+
+@contextmanager
+def use_clock(clock: Callable[[], datetime]) -> Iterator[None]:
+    token = _CLOCK.set(clock)
+    try:
+        yield
+    finally:
+        _CLOCK.reset(token)
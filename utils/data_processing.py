@@ -3,11 +3,20 @@
 from __future__ import annotations
 
 from datetime import datetime
-from zoneinfo import ZoneInfo
 from typing import Any
 
 from loguru import logger
 
+from utils import clock
+from utils.flight import Flight, clean_text, intern_text
+from utils.model_matcher import ModelMatcher
+from utils.timestamps import airport_timezone, parse_timestamp
+
+
+_HOME_ICAO = "LEMD"
+_HOME_NAME = "Madrid"
+_HOME_TIMEZONE = airport_timezone(_HOME_ICAO)
+
 
 def _is_nullish(value: Any) -> bool:
     return value in (None, "", "null", "None")
@@ -19,105 +28,67 @@ def _normalize_registration(value: Any) -> str | None:
     return str(value).strip().upper()
 
 
-def _normalize_model(value: Any) -> str | None:
-    if _is_nullish(value):
-        return None
-    return str(value).strip().upper()
-
-
 def _parse_datetime(value: Any) -> datetime:
-    if isinstance(value, datetime):
-        return value
+    return parse_timestamp(value, _HOME_TIMEZONE) or clock.now()
 
-    if isinstance(value, str) and value.strip():
-        normalized = value.strip().replace("Z", "+00:00")
-        try:
-            parsed = datetime.fromisoformat(normalized)
-            if parsed.tzinfo is None:
-                return parsed
-            return parsed.astimezone(ZoneInfo("Europe/Madrid")).replace(tzinfo=None)
-        except ValueError:
-            pass
-
-        for fmt in (
-            "%Y-%m-%d %H:%M",
-            "%Y-%m-%dT%H:%M",
-            "%Y-%m-%dT%H:%M:%S",
-            "%Y-%m-%d %H:%M:%S",
-        ):
-            try:
-                return datetime.strptime(value, fmt)
-            except ValueError:
-                continue
-
-    return datetime.now()
-
-def process_flight_data_adb(flight, movement):
+def process_flight_data_adb(flight, movement) -> Flight:
     # Extract flight information
     try:
-        registration = flight['aircraft']['reg']
+        registration = clean_text(flight['aircraft']['reg'])
     except Exception as e:
         logger.debug(f"Failed to get registration: {e}")
-        registration = 'null'
-
+        registration = None
 
-    flight_name = flight.get('callSign', 'null')
-    flight_name_iata = flight.get('number', 'null')
+    flight_name = clean_text(flight.get('callSign'))
+    flight_name_iata = clean_text(flight.get('number'))
 
-
-    aircraft_name = flight['aircraft'].get('model', 'null')
-    airline = flight['airline'].get('icao', 'null')
-    airline_name = flight['airline'].get('name', 'null')
+    aircraft_name = intern_text(flight['aircraft'].get('model'))
+    airline = intern_text(flight['airline'].get('icao'))
+    airline_name = intern_text(flight['airline'].get('name'))
 
     if movement == 'departures':
-        destination_icao = flight['arrival']['airport']['icao']
-        destination_name = flight['arrival']['airport']['name']
-        origin_icao = "LEMD"
-        origin_name = "Madrid"
+        destination_icao = intern_text(flight['arrival']['airport']['icao'])
+        destination_name = intern_text(flight['arrival']['airport']['name'])
+        origin_icao, origin_name = _HOME_ICAO, _HOME_NAME
     else:
-        origin_icao = flight['departure']['airport']['icao']
-        origin_name = flight['departure']['airport']['name']
-        destination_icao = "LEMD"
-        destination_name = "Madrid"
-
-    terminal = flight[movement.removesuffix('s')].get('terminal', 'null')
-    diverted = 'null'
-    
+        origin_icao = intern_text(flight['departure']['airport']['icao'])
+        origin_name = intern_text(flight['departure']['airport']['name'])
+        destination_icao, destination_name = _HOME_ICAO, _HOME_NAME
+
+    terminal = intern_text(flight[movement.removesuffix('s')].get('terminal'))
+
     # Get scheduled time and convert to datetime object
     try:
-        scheduled_time_str = flight[movement.removesuffix("s")]["revisedTime"]["local"][:-6]
-        scheduled_time = datetime.strptime(scheduled_time_str, "%Y-%m-%d %H:%M")
+        scheduled_time_str = flight[movement.removesuffix("s")]["revisedTime"]["local"]
+        scheduled_time = parse_timestamp(scheduled_time_str, _HOME_TIMEZONE)
+        if scheduled_time is None:
+            raise ValueError(f"unparseable time {scheduled_time_str!r}")
     except Exception as e:
         logger.error(f"Failed to parse scheduled time: {e}")
-        scheduled_time = datetime.now()
-    
-    # Get last update time (use revised time if available, otherwise scheduled time)
-    last_update = datetime.now().strftime("%Y-%m-%d %H:%M")
-
-    single_flight_data = {
-        "flight_name": "".join(flight_name.split()),
-        "flight_name_iata": flight_name_iata,
-        "registration": registration,
-        "aircraft_name": aircraft_name.strip(),
-        "aircraft_icao": None,
-        "airline": airline,
-        "airline_name": airline_name,
-        "origin_icao": origin_icao,
-        "origin_name": origin_name,
-        "destination_icao": destination_icao,
-        "destination_name": destination_name,
-        "terminal": terminal,
-        "scheduled_time": scheduled_time,
-        "last_update": last_update,
-        "diverted": diverted,
-    }
-
-    logger.debug(f"Processed ADB flight data: {single_flight_data}")
+        scheduled_time = clock.now()
+
+    single_flight_data = Flight(
+        flight_name=None if flight_name is None else "".join(flight_name.split()),
+        flight_name_iata=flight_name_iata,
+        registration=registration,
+        aircraft_name=aircraft_name,
+        airline=airline,
+        airline_name=airline_name,
+        origin_icao=origin_icao,
+        origin_name=origin_name,
+        destination_icao=destination_icao,
+        destination_name=destination_name,
+        terminal=terminal,
+        scheduled_time=scheduled_time,
+        last_update=clock.now().replace(second=0, microsecond=0),
+    )
+
+    logger.debug("Processed ADB flight data: {}", single_flight_data)
     return single_flight_data
 
-def get_valid_value(flight, keys, default="null"):
-    """Returns the first non-null and non-'null' value from the flight dictionary."""
-    return next((flight.get(k) for k in keys if flight.get(k) not in [None, "null"]), default)
+def get_valid_value(flight, keys, default=None):
+    """Returns the first value from the flight dictionary that is not None or a 'null' placeholder."""
+    return next((flight.get(k) for k in keys if clean_text(flight.get(k)) is not None), default)
 
 
 def _select_best_event_time(flight: dict[str, Any], keys: list[str]) -> Any:
@@ -125,15 +96,17 @@ def _select_best_event_time(flight: dict[str, Any], keys: list[str]) -> Any:
     return get_valid_value(flight, keys)
 
 
-def process_flight_data_aeroapi(flight):
+def process_flight_data_aeroapi(flight) -> Flight | None:
     try:
         registration = flight["registration"]
     except Exception as e:
         logger.warning(f"Failed to get registration: {e}")
         return None
-    
-    is_departure = flight.get("origin", {}).get("code_icao") == "LEMD"
-    
+
+    origin = flight.get("origin") or {}
+    destination = flight.get("destination") or {}
+    is_departure = origin.get("code_icao") == _HOME_ICAO
+
     if is_departure:
         scheduled_time = _select_best_event_time(
             flight,
@@ -146,10 +119,10 @@ def process_flight_data_aeroapi(flight):
                 "scheduled_off",
             ],
         )
-        terminal = flight.get("terminal_origin", "null")
-        origin_icao, origin_name = "LEMD", "Madrid"
-        destination_icao = flight.get("destination", {}).get("code_icao", "null")
-        destination_name = flight.get("destination", {}).get("name", "null")
+        terminal = flight.get("terminal_origin")
+        origin_icao, origin_name = _HOME_ICAO, _HOME_NAME
+        destination_icao = intern_text(destination.get("code_icao"))
+        destination_name = intern_text(destination.get("name"))
     else:
         scheduled_time = _select_best_event_time(
             flight,
@@ -162,60 +135,41 @@ def process_flight_data_aeroapi(flight):
                 "scheduled_on",
             ],
         )
-        terminal = flight.get("terminal_destination", "null")
-        origin_icao = flight.get("origin", {}).get("code_icao", "null")
-        origin_name = flight.get("origin", {}).get("name", "null")
-        destination_icao, destination_name = "LEMD", "Madrid"
-    
-    flight_name = get_valid_value(flight, ["atc_ident", "ident_icao"])
-    flight_name_iata = get_valid_value(flight, ["ident_iata", "null"])
-    aircraft = flight.get("aircraft_type", "null")
-    airline = flight.get("operator_icao", "null")
-    airline_name = flight.get("operator", "null")
-    diverted = flight.get("diverted", "null")
-
-    # Get last update time
-    last_update = datetime.now().strftime("%Y-%m-%d %H:%M")
-
-    single_flight_data = {
-        "flight_name": "".join(flight_name.split()),
-        "flight_name_iata": flight_name_iata,
-        "registration": registration,
-        "aircraft_name": None,
-        "aircraft_icao": (aircraft or "null").strip(),
-        "airline": airline,
-        "airline_name": airline_name,
-        "origin_icao": origin_icao,
-        "origin_name": origin_name,
-        "destination_icao": destination_icao,
-        "destination_name": destination_name,
-        "terminal": terminal,
-        "scheduled_time": _parse_datetime(scheduled_time),
-        "last_update": last_update,
-        "diverted": diverted,
-    }
-
-    logger.debug(f"Processed AeroAPI flight data: {single_flight_data}")
+        terminal = flight.get("terminal_destination")
+        origin_icao = intern_text(origin.get("code_icao"))
+        origin_name = intern_text(origin.get("name"))
+        destination_icao, destination_name = _HOME_ICAO, _HOME_NAME
+
+    flight_name = clean_text(get_valid_value(flight, ["atc_ident", "ident_icao"]))
+    diverted = flight.get("diverted")
+
+    single_flight_data = Flight(
+        flight_name=None if flight_name is None else "".join(flight_name.split()),
+        flight_name_iata=clean_text(get_valid_value(flight, ["ident_iata"])),
+        registration=clean_text(registration),
+        aircraft_icao=intern_text(flight.get("aircraft_type")),
+        airline=intern_text(flight.get("operator_icao")),
+        airline_name=intern_text(flight.get("operator")),
+        origin_icao=origin_icao,
+        origin_name=origin_name,
+        destination_icao=destination_icao,
+        destination_name=destination_name,
+        terminal=intern_text(terminal),
+        scheduled_time=_parse_datetime(scheduled_time),
+        last_update=clock.now().replace(second=0, microsecond=0),
+        diverted=None if clean_text(diverted) is None else bool(diverted),
+    )
+
+    logger.debug("Processed AeroAPI flight data: {}", single_flight_data)
     return single_flight_data
 
 def _is_interesting_model(
     flight: dict[str, Any],
-    model_db: dict[str, dict[str, Any]],
+    model_db: ModelMatcher | dict[str, dict[str, Any]],
 ) -> bool:
-    aircraft_icao = _normalize_model(flight.get("aircraft_icao"))
-    if aircraft_icao and aircraft_icao in model_db:
-        return True
-
-    aircraft_name = str(flight.get("aircraft_name") or "").lower()
-    if not aircraft_name:
-        return False
-
-    for model_entry in model_db.values():
-        model_name = str(model_entry.get("name") or "").strip().lower()
-        if model_name and model_name in aircraft_name:
-            return True
-
-    return False
+    # main passes the matcher compiled at index load; a plain index is compiled here.
+    matcher = model_db if isinstance(model_db, ModelMatcher) else ModelMatcher(model_db)
+    return matcher.match(flight.get("aircraft_icao"), flight.get("aircraft_name")) is not None
 
 
 async def check_flight(
@@ -230,10 +184,11 @@ async def check_flight(
     interesting_model = False
     first_seen = False
 
-    # Convert scheduled_time to string if needed
-    if not isinstance(flight["scheduled_time"], str):
-        flight["scheduled_time"] = _parse_datetime(flight["scheduled_time"]).strftime("%Y-%m-%d %H:%M")
-        logger.debug(f"Converted scheduled_time to string format")
+    # Database providers and senders take a plain dict; times stay datetimes.
+    if isinstance(flight, Flight):
+        flight = flight.as_dict()
+    elif not isinstance(flight["scheduled_time"], datetime):
+        flight["scheduled_time"] = _parse_datetime(flight["scheduled_time"])
 
     registration = _normalize_registration(flight.get("registration"))
     if registration:
@@ -268,27 +223,21 @@ async def check_flight(
     return flight, interesting_registration, interesting_model, first_seen
 
 # If flight already exists, merge data
-def check_existing(all_flights, processed_data):
+def check_existing(all_flights: dict[str, Flight], processed_data: Flight | None) -> None:
     if not processed_data:
         return
 
-    iata_key = processed_data.get("flight_name_iata")
-    fallback_key = processed_data.get("flight_name")
-
     existing_key = None
-    if iata_key not in [None, "null"] and iata_key in all_flights:
-        existing_key = iata_key
-    elif fallback_key not in [None, "null"] and fallback_key in all_flights:
-        existing_key = fallback_key
+    for candidate in (processed_data.flight_name_iata, processed_data.flight_name):
+        if candidate is not None and candidate in all_flights:
+            existing_key = candidate
+            break
 
     if existing_key is None:
-        new_key = iata_key if iata_key not in [None, "null"] else fallback_key
-        if new_key in [None, "null"]:
-            return
-        all_flights[new_key] = processed_data
+        new_key = processed_data.key
+        if new_key is not None:
+            all_flights[new_key] = processed_data
         return
 
-    for key, value in processed_data.items():
-        if all_flights[existing_key].get(key) in [None, "null"] and value not in [None, "null"]:
-            all_flights[existing_key][key] = value
-            logger.debug(f"Updated {key} for {existing_key}")
+    for key in all_flights[existing_key].merge_missing(processed_data):
+        logger.debug(f"Updated {key} for {existing_key}")
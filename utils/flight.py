@@ -0,0 +1,111 @@
+"""Typed flight record produced by the provider normalizers.
+
+Missing values are ``None`` (never the ``"null"`` string), ``scheduled_time``
+is a naive local ``datetime`` and the strings that repeat across a cycle
+(airline, airport, aircraft type and terminal codes and names) are interned,
+so thousands of records share one copy of each.
+
+``Flight`` also answers ``flight["field"]`` and ``flight.get("field")`` for
+code written against the old dicts; ``as_dict()`` gives the shape the
+database providers and social senders consume.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Iterator
+
+
+SCHEDULED_TIME_FORMAT = "%Y-%m-%d %H:%M"
+_NULLISH_TEXT = frozenset({"", "null", "None"})
+_INTERN_CACHE_SIZE = 4096
+_INTERNED: dict[Any, str | None] = {}
+
+
+def clean_text(value: Any) -> str | None:
+    """Stripped string, or ``None`` for the nullish placeholders providers send."""
+    if value is None:
+        return None
+    text = (value if isinstance(value, str) else str(value)).strip()
+    if text in _NULLISH_TEXT:
+        return None
+    return text
+
+
+def intern_text(value: Any) -> str | None:
+    """``clean_text`` for values that repeat across flights, returning one shared copy per value."""
+    try:
+        return _INTERNED[value]
+    except KeyError:
+        pass
+    except TypeError:
+        return clean_text(value)
+
+    text = clean_text(value)
+    if text is not None:
+        text = sys.intern(text)
+    if len(_INTERNED) >= _INTERN_CACHE_SIZE:
+        _INTERNED.clear()
+    _INTERNED[value] = text
+    return text
+
+
+@dataclass(slots=True)
+class Flight:
+    flight_name: str | None = None
+    flight_name_iata: str | None = None
+    registration: str | None = None
+    aircraft_name: str | None = None
+    aircraft_icao: str | None = None
+    airline: str | None = None
+    airline_name: str | None = None
+    origin_icao: str | None = None
+    origin_name: str | None = None
+    destination_icao: str | None = None
+    destination_name: str | None = None
+    terminal: str | None = None
+    scheduled_time: datetime | None = None
+    last_update: datetime | None = None
+    diverted: bool | None = None
+
+    @property
+    def key(self) -> str | None:
+        """Identity used to merge providers: the IATA flight number, else the ATC callsign."""
+        return self.flight_name_iata or self.flight_name
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in FLIGHT_FIELDS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        if name not in FLIGHT_FIELDS:
+            return default
+        value = getattr(self, name)
+        return default if value is None else value
+
+    def keys(self) -> tuple[str, ...]:
+        return FLIGHT_FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FLIGHT_FIELDS)
+
+    def merge_missing(self, other: Flight) -> list[str]:
+        """Fill this record's empty fields from ``other``; returns the fields that changed."""
+        updated = []
+        for name in FLIGHT_FIELDS:
+            if getattr(self, name) is None:
+                value = getattr(other, name)
+                if value is not None:
+                    setattr(self, name, value)
+                    updated.append(name)
+        return updated
+
+    def as_dict(self) -> dict[str, Any]:
+        """The dict handed to database providers and social senders (times stay ``datetime``)."""
+        return {name: getattr(self, name) for name in FLIGHT_FIELDS}
+
+
+FLIGHT_FIELDS = tuple(field.name for field in fields(Flight))
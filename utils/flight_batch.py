@@ -0,0 +1,284 @@
+"""Page-at-a-time normalization of provider flights into columns.
+
+``normalize_page`` turns a whole AeroAPI or AeroDataBox page into a
+:class:`FlightBatch`: one list per :class:`~utils.flight.Flight` field plus an
+``array`` of scheduled times as seconds since 1970-01-01 (naive local time
+at the home airport, not the host clock). Work that is the same for every flight
+of the page happens once: ``last_update`` is read once, each distinct
+timestamp string is parsed once, and flights that the per-flight functions
+would reject are skipped with a single log line instead of one exception each.
+
+The records it builds are the ones ``process_flight_data_adb`` and
+``process_flight_data_aeroapi`` return for the same flights.
+"""
+
+from __future__ import annotations
+
+from array import array
+from datetime import datetime
+from itertools import compress, repeat
+from typing import Any, Iterable
+
+from loguru import logger
+
+from utils import clock
+from utils.data_processing import _HOME_ICAO, _HOME_NAME, _HOME_TIMEZONE, _parse_datetime
+from utils.flight import FLIGHT_FIELDS, Flight, clean_text, intern_text
+from utils.timestamps import parse_timestamp
+
+
+_EPOCH = datetime(1970, 1, 1)
+_AEROAPI_DEPARTURE_TIMES = (
+    "actual_out",
+    "estimated_out",
+    "scheduled_out",
+    "actual_off",
+    "estimated_off",
+    "scheduled_off",
+)
+_AEROAPI_ARRIVAL_TIMES = (
+    "actual_in",
+    "estimated_in",
+    "scheduled_in",
+    "actual_on",
+    "estimated_on",
+    "scheduled_on",
+)
+_TEXT_COLUMNS = tuple(name for name in FLIGHT_FIELDS if name not in ("scheduled_time", "last_update", "diverted"))
+
+
+def epoch_seconds(value: datetime) -> float:
+    """Seconds since 1970-01-01 for a naive local time, without a timezone lookup."""
+    return (value - _EPOCH).total_seconds()
+
+
+class FlightBatch:
+    """Column-oriented flights of one page; row ``i`` is the ``i``-th kept flight."""
+
+    __slots__ = (*_TEXT_COLUMNS, "scheduled_time", "scheduled_epoch", "diverted", "last_update", "skipped")
+
+    def __init__(self, last_update: datetime | None) -> None:
+        for name in _TEXT_COLUMNS:
+            setattr(self, name, [])
+        self.scheduled_time: list[datetime] = []
+        self.scheduled_epoch = array("d")
+        self.diverted: list[bool | None] = []
+        self.last_update = last_update
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self.scheduled_time)
+
+    def _columns(self) -> list[list[Any]]:
+        return [getattr(self, name) for name in _TEXT_COLUMNS] + [self.scheduled_time, self.diverted]
+
+    def _subset(self, mask: Iterable[bool]) -> FlightBatch:
+        mask = list(mask)
+        subset = FlightBatch(self.last_update)
+        for name in _TEXT_COLUMNS:
+            setattr(subset, name, list(compress(getattr(self, name), mask)))
+        subset.scheduled_time = list(compress(self.scheduled_time, mask))
+        subset.scheduled_epoch = array("d", compress(self.scheduled_epoch, mask))
+        subset.diverted = list(compress(self.diverted, mask))
+        return subset
+
+    def within(self, start: datetime, end: datetime) -> FlightBatch:
+        """Rows whose ``scheduled_time`` is in ``[start, end)``.
+
+        ``scheduled_time`` is the best-known event time (actual, estimated or
+        revised), so a delayed flight can fall outside the window it was
+        fetched for; the live cycle does not filter with this.
+        """
+        low, high = epoch_seconds(start), epoch_seconds(end)
+        return self._subset([low <= value < high for value in self.scheduled_epoch])
+
+    def dedupe(self) -> FlightBatch:
+        """One row per flight, merged the way ``check_existing`` merges the page's flights one by one.
+
+        A row joins an earlier row stored under its IATA number or, failing
+        that, its callsign, and only fills that row's empty fields. Rows with
+        neither identifier are dropped.
+        """
+        columns = self._columns()
+        owner: dict[str, int] = {}
+        keep = [False] * len(self)
+        merges: list[tuple[int, int]] = []
+        for index, (iata, name) in enumerate(zip(self.flight_name_iata, self.flight_name)):
+            if iata is not None and iata in owner:
+                merges.append((owner[iata], index))
+            elif name is not None and name in owner:
+                merges.append((owner[name], index))
+            elif iata is not None or name is not None:
+                owner[iata if iata is not None else name] = index
+                keep[index] = True
+
+        for target, source in merges:
+            for column in columns:
+                if column[target] is None and column[source] is not None:
+                    column[target] = column[source]
+        # scheduled_time is never None in a batch, so the epoch column needs no merge.
+        return self._subset(keep)
+
+    def records(self) -> list[Flight]:
+        """The rows as :class:`Flight` records (field order is ``FLIGHT_FIELDS``)."""
+        return [
+            Flight(*row)
+            for row in zip(
+                *(getattr(self, name) for name in _TEXT_COLUMNS),
+                self.scheduled_time,
+                repeat(self.last_update),
+                self.diverted,
+            )
+        ]
+
+    def _append(self, values: tuple[Any, ...], scheduled: datetime, diverted: bool | None) -> None:
+        for name, value in zip(_TEXT_COLUMNS, values):
+            getattr(self, name).append(value)
+        self.scheduled_time.append(scheduled)
+        self.scheduled_epoch.append(epoch_seconds(scheduled))
+        self.diverted.append(diverted)
+
+
+def _joined(value: str | None) -> str | None:
+    return None if value is None else "".join(value.split())
+
+
+def _normalize_adb(batch: FlightBatch, flights: list[dict[str, Any]], movement: str, now: datetime) -> None:
+    side = movement.removesuffix("s")
+    departures = movement == "departures"
+    parsed_times: dict[str, datetime] = {}
+    unparsed_times = 0
+
+    for flight in flights:
+        aircraft = flight.get("aircraft")
+        airline = flight.get("airline")
+        endpoint = flight.get("arrival" if departures else "departure")
+        own_side = flight.get(side)
+        airport = endpoint.get("airport") if isinstance(endpoint, dict) else None
+        if not (
+            isinstance(aircraft, dict)
+            and isinstance(airline, dict)
+            and isinstance(own_side, dict)
+            and isinstance(airport, dict)
+            and "icao" in airport
+            and "name" in airport
+        ):
+            batch.skipped += 1
+            continue
+
+        if departures:
+            origin_icao, origin_name = _HOME_ICAO, _HOME_NAME
+            destination_icao, destination_name = intern_text(airport["icao"]), intern_text(airport["name"])
+        else:
+            origin_icao, origin_name = intern_text(airport["icao"]), intern_text(airport["name"])
+            destination_icao, destination_name = _HOME_ICAO, _HOME_NAME
+
+        revised = own_side.get("revisedTime")
+        local = revised.get("local") if isinstance(revised, dict) else None
+        scheduled = parsed_times.get(local) if isinstance(local, str) else None
+        if scheduled is None:
+            scheduled = parse_timestamp(local, _HOME_TIMEZONE)
+            if scheduled is None:
+                scheduled = now
+                unparsed_times += 1
+            else:
+                parsed_times[local] = scheduled
+
+        batch._append(
+            (
+                _joined(clean_text(flight.get("callSign"))),
+                clean_text(flight.get("number")),
+                clean_text(aircraft.get("reg")),
+                intern_text(aircraft.get("model")),
+                None,
+                intern_text(airline.get("icao")),
+                intern_text(airline.get("name")),
+                origin_icao,
+                origin_name,
+                destination_icao,
+                destination_name,
+                intern_text(own_side.get("terminal")),
+            ),
+            scheduled,
+            None,
+        )
+
+    if unparsed_times:
+        logger.error(f"Failed to parse scheduled time of {unparsed_times} ADB {movement} flight(s); using now")
+
+
+def _first_present(flight: dict[str, Any], keys: tuple[str, ...]) -> Any:
+    for key in keys:
+        value = flight.get(key)
+        if clean_text(value) is not None:
+            return value
+    return None
+
+
+def _normalize_aeroapi(batch: FlightBatch, flights: list[dict[str, Any]], now: datetime) -> None:
+    parsed_times: dict[str, datetime] = {}
+    missing_registration = 0
+
+    for flight in flights:
+        if "registration" not in flight:
+            missing_registration += 1
+            batch.skipped += 1
+            continue
+
+        origin = flight.get("origin") or {}
+        destination = flight.get("destination") or {}
+        if origin.get("code_icao") == _HOME_ICAO:
+            raw_time = _first_present(flight, _AEROAPI_DEPARTURE_TIMES)
+            terminal = flight.get("terminal_origin")
+            origin_icao, origin_name = _HOME_ICAO, _HOME_NAME
+            destination_icao = intern_text(destination.get("code_icao"))
+            destination_name = intern_text(destination.get("name"))
+        else:
+            raw_time = _first_present(flight, _AEROAPI_ARRIVAL_TIMES)
+            terminal = flight.get("terminal_destination")
+            origin_icao = intern_text(origin.get("code_icao"))
+            origin_name = intern_text(origin.get("name"))
+            destination_icao, destination_name = _HOME_ICAO, _HOME_NAME
+
+        if isinstance(raw_time, str):
+            scheduled = parsed_times.get(raw_time)
+            if scheduled is None:
+                scheduled = parsed_times[raw_time] = _parse_datetime(raw_time)
+        elif isinstance(raw_time, datetime):
+            scheduled = raw_time
+        else:
+            scheduled = now
+
+        diverted = flight.get("diverted")
+        batch._append(
+            (
+                _joined(clean_text(_first_present(flight, ("atc_ident", "ident_icao")))),
+                clean_text(_first_present(flight, ("ident_iata",))),
+                clean_text(flight["registration"]),
+                None,
+                intern_text(flight.get("aircraft_type")),
+                intern_text(flight.get("operator_icao")),
+                intern_text(flight.get("operator")),
+                origin_icao,
+                origin_name,
+                destination_icao,
+                destination_name,
+                intern_text(terminal),
+            ),
+            scheduled,
+            None if clean_text(diverted) is None else bool(diverted),
+        )
+
+    if missing_registration:
+        logger.warning(f"Skipped {missing_registration} AeroAPI flight(s) without a registration field")
+
+
+def normalize_page(provider: str, movement: str, flights: list[dict[str, Any]]) -> FlightBatch:
+    """Normalize one provider page into a :class:`FlightBatch`."""
+    now = clock.now()
+    batch = FlightBatch(now.replace(second=0, microsecond=0))
+    if provider == "aeroapi":
+        _normalize_aeroapi(batch, flights, now)
+    else:
+        _normalize_adb(batch, flights, movement, now)
+    return batch
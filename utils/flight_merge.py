@@ -0,0 +1,205 @@
+"""Merge the normalized flights of every provider into one record per flight.
+
+Each incoming :class:`~utils.flight.Flight` is indexed under all of its
+identities: the IATA flight number, the ICAO callsign and its registration
+together with the direction and a scheduled-time bucket. A record that shares
+any identity with an earlier one joins that flight (union-find), so an ADB
+record keyed by ``IB 3170`` and an AeroAPI record that only carries
+``IBE3170`` end up together once either of them, or a third record, links
+the two. Registration matches also try the neighbouring buckets, so two
+providers reporting times on either side of a bucket edge still meet.
+
+Every field keeps one winning value per flight: the one from the source
+ranked first for that field (``api.merge.field_precedence``, else
+``api.merge.source_precedence``), then the fresher record (``last_update``),
+then the one seen first. Adding a record costs a constant number of index
+lookups and one comparison per field.
+"""
+
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+import config.config as cfg
+from utils.data_processing import _HOME_ICAO
+from utils.flight import FLIGHT_FIELDS, Flight
+from utils.flight_batch import epoch_seconds
+
+
+_DEFAULT_SOURCE_PRECEDENCE = ("aerodatabox", "aeroapi")
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_sources(value: Any) -> tuple[str, ...] | None:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)):
+        return None
+    sources = tuple(str(item).strip().lower() for item in value if str(item).strip())
+    return sources or None
+
+
+def load_merge_config() -> dict[str, Any]:
+    raw = cfg.get_config("api.merge") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+    raw_fields = raw.get("field_precedence") if isinstance(raw.get("field_precedence"), dict) else {}
+
+    field_precedence = {}
+    for name, sources in raw_fields.items():
+        parsed = _as_sources(sources)
+        if name in FLIGHT_FIELDS and parsed:
+            field_precedence[name] = parsed
+
+    return {
+        "source_precedence": _as_sources(raw.get("source_precedence")) or _DEFAULT_SOURCE_PRECEDENCE,
+        "field_precedence": field_precedence,
+        "registration_bucket_minutes": max(1.0, _as_float(raw.get("registration_bucket_minutes"), 30.0)),
+    }
+
+
+class _Candidate(NamedTuple):
+    rank: int
+    freshness: float
+    sequence: int
+    value: Any
+    source: str
+
+
+def _identity_text(value: str | None) -> str | None:
+    if value is None:
+        return None
+    return "".join(value.split()).upper() or None
+
+
+def _comparable(value: Any) -> Any:
+    # "IB 3170" / "IB3170" or "Iberia" / "IBERIA" are the same value written differently, not a conflict.
+    return _identity_text(value) if isinstance(value, str) else value
+
+
+class FlightMergeEngine:
+    """Accumulates one cycle's records; read the result with :meth:`flights` and :meth:`stats`."""
+
+    def __init__(self, config: dict[str, Any] | None = None) -> None:
+        self.config = config or load_merge_config()
+        precedence = self.config["source_precedence"]
+        self._ranks = [
+            {source: rank for rank, source in enumerate(self.config["field_precedence"].get(name, precedence))}
+            for name in FLIGHT_FIELDS
+        ]
+        self._bucket_seconds = self.config["registration_bucket_minutes"] * 60.0
+        self._parent: list[int] = []
+        self._size: list[int] = []
+        self._winners: dict[int, list[_Candidate | None]] = {}
+        self._index: dict[tuple[Any, ...], int] = {}
+        self._records = 0
+        self._matches = {"iata": 0, "callsign": 0, "registration": 0}
+        self._conflicts: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._winners)
+
+    def _find(self, node: int) -> int:
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _pick(self, field_index: int, current: _Candidate | None, incoming: _Candidate | None) -> _Candidate | None:
+        if current is None:
+            return incoming
+        if incoming is None:
+            return current
+        if _comparable(current.value) != _comparable(incoming.value):
+            name = FLIGHT_FIELDS[field_index]
+            self._conflicts[name] = self._conflicts.get(name, 0) + 1
+        # Lower rank first, then the fresher record, then the one seen first.
+        if (incoming.rank, -incoming.freshness, incoming.sequence) < (current.rank, -current.freshness, current.sequence):
+            return incoming
+        return current
+
+    def _union(self, node: int, other: int, kind: str) -> int:
+        root, other_root = self._find(node), self._find(other)
+        if root == other_root:
+            return root
+        if self._size[root] < self._size[other_root]:
+            root, other_root = other_root, root
+        self._parent[other_root] = root
+        self._size[root] += self._size[other_root]
+        kept, absorbed = self._winners[root], self._winners.pop(other_root)
+        for field_index, candidate in enumerate(absorbed):
+            kept[field_index] = self._pick(field_index, kept[field_index], candidate)
+        self._matches[kind] += 1
+        return root
+
+    def _identities(self, record: Flight) -> list[tuple[tuple[Any, ...], list[tuple[Any, ...]]]]:
+        """``(identity to index, identities to look up)`` pairs for ``record``."""
+        identities = []
+        iata = _identity_text(record.flight_name_iata)
+        if iata is not None:
+            identities.append((("iata", iata), [("iata", iata)]))
+        callsign = _identity_text(record.flight_name)
+        if callsign is not None:
+            identities.append((("callsign", callsign), [("callsign", callsign)]))
+        registration = _identity_text(record.registration)
+        if registration is not None and record.scheduled_time is not None:
+            direction = "departure" if record.origin_icao == _HOME_ICAO else "arrival"
+            bucket = int(epoch_seconds(record.scheduled_time) // self._bucket_seconds)
+            identities.append(
+                (
+                    ("registration", registration, direction, bucket),
+                    [("registration", registration, direction, bucket + offset) for offset in (0, -1, 1)],
+                )
+            )
+        return identities
+
+    def add(self, record: Flight, source: str) -> None:
+        """Merge ``record`` (normalized from ``source``) into the flight it belongs to."""
+        identities = self._identities(record)
+        if not identities:
+            return
+
+        self._records += 1
+        node = len(self._parent)
+        self._parent.append(node)
+        self._size.append(1)
+        freshness = epoch_seconds(record.last_update) if record.last_update is not None else 0.0
+        self._winners[node] = [
+            None
+            if value is None
+            else _Candidate(self._ranks[field_index].get(source, len(self._ranks[field_index])), freshness, node, value, source)
+            for field_index, value in enumerate(getattr(record, name) for name in FLIGHT_FIELDS)
+        ]
+
+        for own, lookups in identities:
+            for identity in lookups:
+                other = self._index.get(identity)
+                if other is not None:
+                    node = self._union(node, other, own[0])
+            self._index.setdefault(own, node)
+
+    def flights(self) -> dict[str, Flight]:
+        """The merged flights keyed like ``check_existing`` keys them (IATA number, else callsign)."""
+        merged: dict[str, Flight] = {}
+        for root, winners in self._winners.items():
+            flight = Flight(*(None if candidate is None else candidate.value for candidate in winners))
+            key = flight.key or flight.registration or str(root)
+            if key in merged:
+                key = f"{key}#{root}"
+            merged[key] = flight
+        return merged
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "records": self._records,
+            "flights": len(self._winners),
+            "identity_matches": dict(self._matches),
+            "conflicts": dict(sorted(self._conflicts.items())),
+        }
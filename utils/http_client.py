@@ -0,0 +1,167 @@
+"""Application-scoped aiohttp sessions with keep-alive pools, one per upstream.
+
+``run_periodically`` opens the registry once and closes it on shutdown. Code
+paths that run outside it (scripts, tests, a different event loop) get a
+short-lived session with the same settings instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import aiohttp
+from loguru import logger
+
+import config.config as cfg
+from monitoring.metrics import METRICS
+
+try:  # aiohttp can only decode "br" bodies when Brotli is installed
+    import brotli  # noqa: F401
+
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:  # pragma: no cover - depends on the environment
+    _ACCEPT_ENCODING = "gzip, deflate"
+
+
+_DEFAULT_CLIENT = "default"
+
+_REGISTRY_LOCK = threading.Lock()
+_SESSIONS: dict[str, aiohttp.ClientSession] = {}
+_REGISTRY_LOOP: asyncio.AbstractEventLoop | None = None
+_CONNECTIONS_OPENED: dict[str, int] = {}
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _as_int(value: Any, default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_http_client_config(name: str = _DEFAULT_CLIENT) -> dict[str, Any]:
+    """Return pool settings for ``name``; ``http_client.clients.<name>`` overrides the shared values."""
+    raw = cfg.get_config("http_client") or {}
+    if not isinstance(raw, dict):
+        raw = {}
+    clients = raw.get("clients") if isinstance(raw.get("clients"), dict) else {}
+    override = clients.get(name) if isinstance(clients.get(name), dict) else {}
+    merged = {**raw, **override}
+
+    return {
+        "limit": max(1, _as_int(merged.get("limit"), 32)),
+        "limit_per_host": max(1, _as_int(merged.get("limit_per_host"), 8)),
+        "dns_cache_ttl_seconds": max(0, _as_int(merged.get("dns_cache_ttl_seconds"), 300)),
+        "keepalive_timeout_seconds": max(1.0, _as_float(merged.get("keepalive_timeout_seconds"), 60.0)),
+        "total_timeout_seconds": max(1.0, _as_float(merged.get("total_timeout_seconds"), 60.0)),
+        "connect_timeout_seconds": max(1.0, _as_float(merged.get("connect_timeout_seconds"), 10.0)),
+    }
+
+
+def _connection_trace(name: str) -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+
+    async def on_connection_create_end(_session, _context, _params) -> None:
+        with _REGISTRY_LOCK:
+            _CONNECTIONS_OPENED[name] = _CONNECTIONS_OPENED.get(name, 0) + 1
+        METRICS.inc("plane_spotter_http_connections_total", client=name)
+
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config
+
+
+def build_session(name: str = _DEFAULT_CLIENT) -> aiohttp.ClientSession:
+    """Create a session configured for ``name``. Must be called inside a running loop."""
+    client_cfg = load_http_client_config(name)
+    connector = aiohttp.TCPConnector(
+        limit=client_cfg["limit"],
+        limit_per_host=client_cfg["limit_per_host"],
+        ttl_dns_cache=client_cfg["dns_cache_ttl_seconds"] or None,
+        use_dns_cache=client_cfg["dns_cache_ttl_seconds"] > 0,
+        keepalive_timeout=client_cfg["keepalive_timeout_seconds"],
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=client_cfg["total_timeout_seconds"],
+        connect=client_cfg["connect_timeout_seconds"],
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={"Accept-Encoding": _ACCEPT_ENCODING},
+        trace_configs=[_connection_trace(name)],
+    )
+
+
+async def open_http_clients() -> None:
+    """Bind the registry to the running loop. Sessions are created lazily per client name."""
+    global _REGISTRY_LOOP
+
+    loop = asyncio.get_running_loop()
+    with _REGISTRY_LOCK:
+        _REGISTRY_LOOP = loop
+
+
+async def close_http_clients() -> None:
+    global _REGISTRY_LOOP
+
+    with _REGISTRY_LOCK:
+        sessions = list(_SESSIONS.values())
+        _SESSIONS.clear()
+        _REGISTRY_LOOP = None
+
+    for session in sessions:
+        try:
+            await session.close()
+        except Exception as exc:
+            logger.warning(f"Error while closing HTTP session: {exc}")
+
+
+def get_http_session(name: str = _DEFAULT_CLIENT) -> aiohttp.ClientSession | None:
+    """Return the shared session for ``name`` or ``None`` when the registry is not open on this loop."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+    with _REGISTRY_LOCK:
+        if _REGISTRY_LOOP is not loop:
+            return None
+        session = _SESSIONS.get(name)
+        if session is None or session.closed:
+            session = _SESSIONS[name] = build_session(name)
+        return session
+
+
+@asynccontextmanager
+async def http_session(name: str = _DEFAULT_CLIENT) -> AsyncIterator[aiohttp.ClientSession]:
+    """Yield the shared session for ``name``, or a temporary one outside the registry."""
+    shared = get_http_session(name)
+    if shared is not None:
+        yield shared
+        return
+
+    session = build_session(name)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+def connection_counts() -> dict[str, int]:
+    """New TCP connections (and therefore TLS handshakes) opened per client since start."""
+    with _REGISTRY_LOCK:
+        return dict(_CONNECTIONS_OPENED)
+
+
+def reset_connection_counts() -> None:
+    with _REGISTRY_LOCK:
+        _CONNECTIONS_OPENED.clear()
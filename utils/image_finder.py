@@ -12,7 +12,10 @@ from bs4 import BeautifulSoup
 from loguru import logger
 
 import config.config as cfg
-from monitoring.api_usage import record_api_event
+from monitoring.api_usage import enforce_circuit_or_raise, record_api_event
+from monitoring.circuit_breaker import CircuitOpenError, get_breaker
+from monitoring.cycle_ledger import note_retry
+from monitoring.metrics import METRICS
 
 
 JETPHOTOS_PROVIDER = "jetphotos"
@@ -428,8 +431,13 @@ def _request_with_retry(
 
     max_retries = config["max_retries"]
     request_timeout = config["request_timeout_seconds"]
+    breaker = get_breaker(provider)
 
     for attempt in range(max_retries):
+        try:
+            enforce_circuit_or_raise(provider, endpoint)
+        except CircuitOpenError:
+            return LookupResult(url=None, reason="circuit_open")
         started = time.perf_counter()
         try:
             request_kwargs: dict[str, Any] = {
@@ -441,6 +449,7 @@ def _request_with_retry(
             response = scraper.get(request_url, **request_kwargs)
             duration_ms = (time.perf_counter() - started) * 1000.0
         except Exception as exc:
+            breaker.record_failure()
             duration_ms = (time.perf_counter() - started) * 1000.0
             _record_image_event(
                 provider,
@@ -463,10 +472,15 @@ def _request_with_retry(
             )
             if sleep_seconds > 0:
                 time.sleep(sleep_seconds)
+            note_retry(provider)
             continue
 
         status_code = response.status_code
         success = 200 <= status_code < 300
+        if status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
         _record_image_event(
             provider,
             endpoint,
@@ -500,6 +514,7 @@ def _request_with_retry(
                     )
                     if sleep_seconds > 0:
                         time.sleep(sleep_seconds)
+                    note_retry(provider)
                     continue
                 _set_provider_cooldown(provider, config["provider_cooldown_seconds"])
                 return LookupResult(url=None, reason="captcha_detected")
@@ -524,6 +539,7 @@ def _request_with_retry(
             )
             if sleep_seconds > 0:
                 time.sleep(sleep_seconds)
+            note_retry(provider)
             continue
 
         return LookupResult(url=None, reason=f"http_{status_code}")
@@ -534,6 +550,11 @@ def _request_with_retry(
 def _lookup_provider_image_url(provider: str, registration: str, config: dict[str, Any]) -> LookupResult:
     cache_key = f"{provider}:{registration}"
     cached = _cache_get(cache_key)
+    METRICS.inc(
+        "plane_spotter_cache_requests_total",
+        cache="image_finder",
+        result="miss" if cached is _CACHE_MISS else "hit",
+    )
     if cached is not _CACHE_MISS:
         if cached:
             return LookupResult(url=cached, reason="cache_hit")
@@ -569,7 +590,8 @@ def _lookup_provider_image_url(provider: str, registration: str, config: dict[st
                 _cache_set(cache_key, parsed_url, config["positive_cache_ttl_seconds"])
                 return LookupResult(url=parsed_url, reason="ok")
 
-        _cache_set(cache_key, None, config["negative_cache_ttl_seconds"])
+        if request_result.reason != "circuit_open":
+            _cache_set(cache_key, None, config["negative_cache_ttl_seconds"])
         return LookupResult(url=None, reason=request_result.reason or "no_image")
 
     if provider == PLANESPOTTERS_PROVIDER:
@@ -587,7 +609,8 @@ def _lookup_provider_image_url(provider: str, registration: str, config: dict[st
                 _cache_set(cache_key, parsed_url, config["positive_cache_ttl_seconds"])
                 return LookupResult(url=parsed_url, reason="ok")
 
-        _cache_set(cache_key, None, config["negative_cache_ttl_seconds"])
+        if request_result.reason != "circuit_open":
+            _cache_set(cache_key, None, config["negative_cache_ttl_seconds"])
         return LookupResult(url=None, reason=request_result.reason or "no_image")
 
     return LookupResult(url=None, reason="unsupported_provider")
@@ -608,7 +631,7 @@ def _lookup_with_logs(provider: str, registration: Any) -> str | None:
         logger.success(f"Image found {result.url}")
         return result.url
 
-    if result.reason in {"provider_cooldown", "negative_cache_hit"}:
+    if result.reason in {"provider_cooldown", "circuit_open", "negative_cache_hit"}:
         logger.debug(f"{provider} image lookup skipped for {normalized_registration}: {result.reason}")
     elif result.reason.startswith("http_"):
         logger.warning(f"{provider} lookup failed for {normalized_registration}: {result.reason}")
@@ -0,0 +1,216 @@
+"""Match flights against the interesting-models index in one pass per name.
+
+A :class:`ModelMatcher` is built once per index load. Model names and
+aliases are normalized to lowercase tokens with letters and digits split
+apart (``"Airbus A321 NEO"`` and ``"A321neo"`` both become ``" airbus a 321
+neo "`` / ``" a 321 neo "``), so patterns only match whole tokens. All
+patterns go into one Aho-Corasick automaton; a flight's ``aircraft_name`` is
+scanned once and the result is cached per distinct name.
+
+A flight is interesting when
+
+- its ``aircraft_icao`` is an indexed ICAO code,
+- an indexed model's name occurs in its ``aircraft_name`` (as before), or
+- the longest alias or designator found in its ``aircraft_name`` resolves to
+  an indexed code, so ``"Boeing 747-8"`` finds ``B748`` and
+  ``"Airbus A320 NEO"`` resolves to ``A20N`` rather than ``A320``.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from typing import Any, Mapping
+
+
+_TOKEN = re.compile(r"[a-z]+|\d+")
+_CACHE_SIZE = 4096
+
+# ADB (marketing) model names -> ICAO type designators. Patterns match whole
+# tokens anywhere in the name, so the manufacturer may be omitted.
+MODEL_ALIASES: dict[str, str] = {
+    "A220-100": "BCS1",
+    "A220-300": "BCS3",
+    "A318": "A318",
+    "A319": "A319",
+    "A319neo": "A19N",
+    "A320": "A320",
+    "A320neo": "A20N",
+    "A321": "A321",
+    "A321neo": "A21N",
+    "A300-600": "A306",
+    "A310": "A310",
+    "A330-200": "A332",
+    "A330-300": "A333",
+    "A330-800": "A338",
+    "A330-900": "A339",
+    "A340-300": "A343",
+    "A340-500": "A345",
+    "A340-600": "A346",
+    "A350-900": "A359",
+    "A350-1000": "A35K",
+    "A380": "A388",
+    "A380-800": "A388",
+    "A400M": "A400",
+    "Beluga": "A3ST",
+    "BelugaXL": "A337",
+    "Boeing 717": "B712",
+    "737-700": "B737",
+    "737-800": "B738",
+    "737-900": "B739",
+    "737 MAX 7": "B37M",
+    "737 MAX 8": "B38M",
+    "737 MAX 9": "B39M",
+    "737 MAX 10": "B3XM",
+    "747-400": "B744",
+    "747-8": "B748",
+    "747-8F": "B748",
+    "747-8i": "B748",
+    "757-200": "B752",
+    "757-300": "B753",
+    "767-300": "B763",
+    "767-300ER": "B763",
+    "767-400": "B764",
+    "777-200": "B772",
+    "777-200ER": "B772",
+    "777-200LR": "B77L",
+    "777F": "B77L",
+    "777-300": "B773",
+    "777-300ER": "B77W",
+    "777-9": "B779",
+    "787-8": "B788",
+    "787-9": "B789",
+    "787-10": "B78X",
+    "MD-11": "MD11",
+    "CRJ200": "CRJ2",
+    "CRJ700": "CRJ7",
+    "CRJ900": "CRJ9",
+    "CRJ1000": "CRJX",
+    "Embraer 170": "E170",
+    "Embraer 175": "E175",
+    "Embraer 190": "E190",
+    "Embraer 195": "E195",
+    "E190-E2": "E290",
+    "E195-E2": "E295",
+    "ATR 42": "AT45",
+    "ATR 72": "AT72",
+    "ATR 72-600": "AT76",
+    "Dash 8 Q400": "DH8D",
+    "DHC-8-400": "DH8D",
+    "An-124": "A124",
+    "An-225": "A225",
+    "Il-76": "IL76",
+    "C-17": "C17",
+    "Concorde": "CONC",
+}
+
+
+def normalize_model_name(value: Any) -> str:
+    """Space-padded lowercase tokens, letters and digits split: ``"A321neo"`` -> ``" a 321 neo "``."""
+    tokens = _TOKEN.findall(str(value or "").lower())
+    return f" {' '.join(tokens)} " if tokens else ""
+
+
+def _normalize_code(value: Any) -> str | None:
+    code = str(value or "").strip().upper()
+    return code if code and code not in ("NULL", "NONE") else None
+
+
+class _Automaton:
+    """Aho-Corasick over characters; ``outputs[state]`` lists the patterns ending there."""
+
+    def __init__(self, patterns: Mapping[str, tuple[str, str]]) -> None:
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.outputs: list[list[tuple[int, str, str]]] = [[]]
+        for text, (kind, code) in patterns.items():
+            state = 0
+            for char in text:
+                following = self.goto[state].get(char)
+                if following is None:
+                    following = len(self.goto)
+                    self.goto[state][char] = following
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                state = following
+            self.outputs[state].append((len(text), kind, code))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self.goto[state].items():
+                queue.append(following)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[following] = target if target != following else 0
+                self.outputs[following] = self.outputs[following] + self.outputs[self.fail[following]]
+
+    def scan(self, text: str) -> list[tuple[int, str, str]]:
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        hits: list[tuple[int, str, str]] = []
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                hits.extend(outputs[state])
+        return hits
+
+
+class ModelMatcher:
+    """Compiled form of ``get_interesting_models_index()`` output."""
+
+    def __init__(self, model_db: Mapping[str, Mapping[str, Any]], aliases: Mapping[str, str] | None = None) -> None:
+        self.codes = {code for code in (_normalize_code(key) for key in model_db) if code}
+        alias_table = MODEL_ALIASES if aliases is None else aliases
+        patterns: dict[str, tuple[str, str]] = {}
+        # Aliases and bare designators compete on length; indexed names match on their own.
+        for alias, designator in alias_table.items():
+            patterns.setdefault(normalize_model_name(alias), ("alias", designator.upper()))
+        for designator in sorted({*self.codes, *(code.upper() for code in alias_table.values())}):
+            patterns.setdefault(normalize_model_name(designator), ("alias", designator))
+        for key, entry in model_db.items():
+            code = _normalize_code(key)
+            name = normalize_model_name(entry.get("name")) if isinstance(entry, Mapping) else ""
+            if code and name:
+                patterns[name] = ("name", code)
+        patterns.pop("", None)
+        self._automaton = _Automaton(patterns)
+        self._cache: dict[str, str | None] = {}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _match_name(self, aircraft_name: str) -> str | None:
+        longest: tuple[int, str] | None = None
+        for length, kind, code in self._automaton.scan(normalize_model_name(aircraft_name)):
+            if kind == "name":
+                return code
+            if longest is None or length > longest[0]:
+                longest = (length, code)
+        if longest is not None and longest[1] in self.codes:
+            return longest[1]
+        return None
+
+    def match(self, aircraft_icao: Any = None, aircraft_name: Any = None) -> str | None:
+        """The indexed ICAO code this aircraft matches, if any."""
+        code = _normalize_code(aircraft_icao)
+        if code in self.codes:
+            return code
+        if not aircraft_name or not self.codes:
+            return None
+
+        name = str(aircraft_name)
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        matched = self._match_name(name)
+        if len(self._cache) >= _CACHE_SIZE:
+            self._cache.clear()
+        self._cache[name] = matched
+        return matched
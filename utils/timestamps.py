@@ -0,0 +1,135 @@
+"""Timestamp parsing shared by the normalizers, database providers and senders.
+
+Provider timestamps come in a handful of shapes (``"2025-02-12T10:00:00Z"``,
+``"2025-02-12 13:30"``, ...). :func:`parse_timestamp` works out which parser
+handles a shape the first time it is seen (the shape is the string with every
+digit replaced by ``0``) and remembers the result for recently parsed strings,
+so a page full of flights scheduled on the same few minutes parses each
+distinct string once. Aware values are converted to naive local time in the
+zone :func:`airport_timezone` resolves, once, per airport.
+
+Flights keep ``datetime`` values from normalization through the database
+providers and the senders; only message text formats them.
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime, tzinfo
+from typing import Any, Callable
+from zoneinfo import ZoneInfo
+
+
+DEFAULT_TIMEZONE = "Europe/Madrid"
+# Known airport zones; any other airport uses DEFAULT_TIMEZONE.
+AIRPORT_TIMEZONES: dict[str, str] = {
+    "LEMD": "Europe/Madrid",
+    "LEBL": "Europe/Madrid",
+    "LEPA": "Europe/Madrid",
+    "LEMG": "Europe/Madrid",
+    "LEAL": "Europe/Madrid",
+    "LEVC": "Europe/Madrid",
+    "LEZL": "Europe/Madrid",
+    "LEBB": "Europe/Madrid",
+    "GCLP": "Atlantic/Canary",
+    "GCTS": "Atlantic/Canary",
+    "GCXO": "Atlantic/Canary",
+    "GCRR": "Atlantic/Canary",
+    "LPPT": "Europe/Lisbon",
+    "LPPR": "Europe/Lisbon",
+    "LFPG": "Europe/Paris",
+    "EGLL": "Europe/London",
+    "EDDF": "Europe/Berlin",
+    "EHAM": "Europe/Amsterdam",
+    "LIRF": "Europe/Rome",
+}
+
+_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S")
+_SHAPE = str.maketrans("123456789", "000000000")
+_CACHE_SIZE = 4096
+
+Parser = Callable[[str], datetime]
+
+_timezones: dict[str, tzinfo] = {}
+_timezones_lock = threading.Lock()
+_parsers: dict[str, Parser] = {}
+_parsed: dict[tuple[str, tzinfo | None], datetime | None] = {}
+
+
+def airport_timezone(airport_icao: str | None) -> tzinfo:
+    """Local zone of ``airport_icao`` (``DEFAULT_TIMEZONE`` when unknown)."""
+    code = str(airport_icao or "").strip().upper()
+    zone = _timezones.get(code)
+    if zone is None:
+        with _timezones_lock:
+            zone = _timezones.get(code)
+            if zone is None:
+                zone = _timezones[code] = ZoneInfo(AIRPORT_TIMEZONES.get(code, DEFAULT_TIMEZONE))
+    return zone
+
+
+def _strptime(fmt: str) -> Parser:
+    def parse(text: str) -> datetime:
+        return datetime.strptime(text, fmt)
+
+    return parse
+
+
+_CANDIDATES: tuple[Parser, ...] = (datetime.fromisoformat, *(_strptime(fmt) for fmt in _FORMATS))
+
+
+def _detect(text: str) -> tuple[Parser, datetime] | None:
+    for parser in _CANDIDATES:
+        try:
+            return parser, parser(text)
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_text(text: str, tz: tzinfo | None) -> datetime | None:
+    if not text:
+        return None
+    shape = text.translate(_SHAPE)
+    parser = _parsers.get(shape)
+    parsed = None
+    if parser is not None:
+        try:
+            parsed = parser(text)
+        except ValueError:
+            # Same shape, impossible value (month 13, ...): let every parser have a go.
+            parser = None
+    if parser is None:
+        detected = _detect(text)
+        if detected is None:
+            return None
+        parser, parsed = detected
+        if len(_parsers) < _CACHE_SIZE:
+            _parsers[shape] = parser
+
+    if tz is not None and parsed.tzinfo is not None:
+        return parsed.astimezone(tz).replace(tzinfo=None)
+    return parsed
+
+
+def parse_timestamp(value: Any, tz: tzinfo | None = None) -> datetime | None:
+    """``value`` as a datetime, or ``None`` when it is missing or unparseable.
+
+    Datetimes are returned unchanged. Strings with an offset are converted to
+    naive local time in ``tz``; without ``tz`` they stay aware.
+    """
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+
+    key = (value, tz)
+    try:
+        return _parsed[key]
+    except KeyError:
+        pass
+    parsed = _parse_text(value.strip(), tz)
+    if len(_parsed) >= _CACHE_SIZE:
+        _parsed.clear()
+    _parsed[key] = parsed
+    return parsed